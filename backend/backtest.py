@@ -0,0 +1,226 @@
+import argparse
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Contract / judge timing (ProofOfIntelligence.SUBMISSION_WINDOW, judge polls every 5s)
+SUBMISSION_WINDOW = 30
+ROUND_INTERVAL = 45  # start-to-start, includes the Pyth update + finalize + restart txs
+SUBMIT_DELAY = 5  # agents poll every 5s, so they submit ~5s into the round
+FINALIZE_DELAY = 10  # judge notices the deadline, updates Pyth, then finalizes
+
+# Agent template parameters (see get_eth_prediction_agent_code in main.py)
+HISTORY_COUNT = 10  # fetch_agent_history reads the last 10 entries
+GOOD_PREDICTION = 1.0  # analyze_history counts |diff| < $1 as a win
+TICK_INTERVAL = 5
+TICK_WINDOW = 64
+PREDICTION_HORIZON_SECONDS = 60
+LOCAL_MAX_MOVE = 0.005  # LocalPredictor defaults
+LOCAL_EMA_WEIGHT = 0.05
+LOCAL_BIAS_WEIGHT = 0.5
+
+
+def load_price_series(path: Path) -> Dict[str, np.ndarray]:
+    """Load a recorded Hermes series (publish_time, price[, ema_price]) from CSV"""
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    if not rows:
+        raise ValueError(f"No price rows in {path}")
+
+    t = np.array([float(r["publish_time"]) for r in rows])
+    price = np.array([float(r["price"]) for r in rows])
+    if "ema_price" in rows[0] and rows[0]["ema_price"]:
+        ema = np.array([float(r["ema_price"]) for r in rows])
+    else:
+        ema = price.copy()
+
+    order = np.argsort(t, kind="stable")
+    return {"t": t[order], "price": price[order], "ema": ema[order]}
+
+
+def load_round_schedule(path: Path) -> np.ndarray:
+    """Load round start times (column start_time) from CSV"""
+    with open(path, newline='') as f:
+        return np.array([float(r["start_time"]) for r in csv.DictReader(f)])
+
+
+def make_round_schedule(series: Dict[str, np.ndarray], interval: float = ROUND_INTERVAL) -> np.ndarray:
+    """Evenly spaced round starts covering the series (leaving room for finalization)"""
+    first = series["t"][0] + TICK_WINDOW * TICK_INTERVAL
+    last = series["t"][-1] - SUBMIT_DELAY - SUBMISSION_WINDOW - FINALIZE_DELAY
+    if last <= first:
+        raise ValueError("Price series too short for a single round")
+    return np.arange(first, last, interval)
+
+
+def price_at(series: Dict[str, np.ndarray], times: np.ndarray, key: str = "price") -> np.ndarray:
+    """Latest price published at or before each time (what Pyth/Hermes would return)"""
+    idx = np.searchsorted(series["t"], times, side="right") - 1
+    return series[key][np.clip(idx, 0, len(series["t"]) - 1)]
+
+
+def local_predictions(series: Dict[str, np.ndarray], times: np.ndarray,
+                      ema_weight: float = LOCAL_EMA_WEIGHT) -> np.ndarray:
+    """LocalPredictor drift/EMA model evaluated for every round at once (before bias correction and clipping)"""
+    # Ticks the agent would have sampled: one every TICK_INTERVAL seconds, last TICK_WINDOW of them
+    offsets = np.arange(-(TICK_WINDOW - 1), 1) * TICK_INTERVAL
+    tick_times = times[:, None] + offsets[None, :]
+    p = price_at(series, tick_times)
+    t = offsets.astype(np.float64)[None, :]
+    valid = tick_times >= series["t"][0]
+
+    w = np.exp(t / PREDICTION_HORIZON_SECONDS) * valid
+    w_sum = w.sum(axis=1, keepdims=True)
+    t_mean = (w * t).sum(axis=1, keepdims=True) / w_sum
+    p_mean = (w * p).sum(axis=1, keepdims=True) / w_sum
+    var = (w * (t - t_mean) ** 2).sum(axis=1) / w_sum[:, 0]
+    cov = (w * (t - t_mean) * (p - p_mean)).sum(axis=1) / w_sum[:, 0]
+    slope = np.divide(cov, var, out=np.zeros_like(cov), where=var > 0)
+
+    current = p[:, -1]
+    ema = price_at(series, times, "ema")
+    return current + slope * PREDICTION_HORIZON_SECONDS + ema_weight * (ema - current)
+
+
+def validate_ai_prediction(raw: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Clamping rules of get_ai_prediction (random jitter replaced by the current price)"""
+    change = np.abs(raw - current) / current
+    clamped = np.where(raw > current, current * 1.01, current * 0.99)
+    validated = np.where(change > 0.01, clamped, raw)
+    return np.where(change > 0.05, current, validated)
+
+
+def run_backtest(series: Dict[str, np.ndarray], starts: np.ndarray, deviations: np.ndarray,
+                 strategy: str = "local") -> Dict[str, np.ndarray]:
+    """Replay every round for every deviation setting, all settings competing in each round
+
+    Price features are computed for all rounds in one shot; the only sequential part is the
+    per-round history feedback (bias correction + adaptive deviation), which is vectorized
+    across the deviation settings.
+    """
+    submit_times = starts + SUBMIT_DELAY
+    current = price_at(series, submit_times)
+    actual = price_at(series, starts + SUBMISSION_WINDOW + FINALIZE_DELAY)
+
+    if strategy == "local":
+        raw = local_predictions(series, submit_times)
+    elif strategy == "hold":
+        # The asi1-fast prompt anchors on the current price; this is its offline stand-in
+        raw = current.copy()
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    validated = validate_ai_prediction(raw, current) if strategy == "hold" else raw
+    # LocalPredictor.predict: newest history entry weighs most, halving per entry back
+    decay = 0.5 ** np.arange(HISTORY_COUNT - 1, -1, -1)
+
+    n_rounds = len(starts)
+    n_settings = len(deviations)
+    base_dev = deviations.astype(np.float64) / 10.0
+
+    # Rolling window of the last HISTORY_COUNT differences (predicted - actual) per setting
+    hist = np.zeros((n_settings, HISTORY_COUNT))
+    hist_len = 0
+    submitted = np.empty((n_rounds, n_settings))
+
+    for r in range(n_rounds):
+        count = min(hist_len, HISTORY_COUNT)
+        window = hist[:, HISTORY_COUNT - count:]
+        if count:
+            avg_bias = window.mean(axis=1)
+            avg_error = np.abs(window).mean(axis=1)
+            win_rate = (np.abs(window) < GOOD_PREDICTION).mean(axis=1)
+        else:
+            avg_bias = avg_error = win_rate = np.zeros(n_settings)
+
+        if strategy == "local":
+            # LocalPredictor.predict: subtract a share of the decayed bias, then clip the move
+            pred = np.full(n_settings, raw[r])
+            if count:
+                w = decay[HISTORY_COUNT - count:]
+                pred = pred - LOCAL_BIAS_WEIGHT * (window * w).sum(axis=1) / w.sum()
+            pred = np.clip(pred, current[r] * (1 - LOCAL_MAX_MOVE), current[r] * (1 + LOCAL_MAX_MOVE))
+        else:
+            # Step 3 of get_ai_prediction: ±1% bias correction once there are >3 entries
+            pred = np.full(n_settings, validated[r])
+            if count > 3:
+                pred = np.where(avg_bias > 0, pred * 0.99, np.where(avg_bias < 0, pred * 1.01, pred))
+
+        # Adaptive deviation from check_and_submit_prediction once there are >5 entries
+        dev = base_dev
+        if count > 5:
+            excellent = (avg_error < 1.0) & (win_rate > 0.7)
+            poor = (avg_error > 5.0) | (win_rate < 0.3)
+            dev = np.where(excellent, np.maximum(1.0, base_dev - 1.0),
+                           np.where(poor, np.minimum(9.9, base_dev + 1.0), base_dev))
+        adjusted = pred * (1 - dev / 100)
+
+        # Final safety check: >5% from current is overridden back to the current price
+        adjusted = np.where(np.abs(adjusted - current[r]) > current[r] * 0.05, current[r], adjusted)
+        submitted[r] = adjusted
+
+        hist = np.roll(hist, -1, axis=1)
+        hist[:, -1] = adjusted - actual[r]
+        hist_len += 1
+
+    # _determineWinner: strict '<' means the first participant wins ties
+    errors = submitted - actual[:, None]
+    abs_errors = np.abs(errors)
+    winners = np.argmin(abs_errors, axis=1)
+
+    return {
+        "deviations": deviations,
+        "submitted": submitted,
+        "actual": actual,
+        "win_rate": np.bincount(winners, minlength=n_settings) / n_rounds,
+        "good_rate": (abs_errors < GOOD_PREDICTION).mean(axis=0),
+        "mae": abs_errors.mean(axis=0),
+        "bias": errors.mean(axis=0),
+    }
+
+
+def format_report(result: Dict[str, np.ndarray], top: Optional[int] = None) -> str:
+    """Table of settings ordered by win rate, then error"""
+    order = np.lexsort((result["mae"], -result["win_rate"]))
+    if top:
+        order = order[:top]
+
+    lines = [f"{'deviation':>9} {'win rate':>9} {'<$1 rate':>9} {'MAE $':>10} {'bias $':>10}"]
+    for i in order:
+        lines.append(
+            f"{int(result['deviations'][i]):>9} {result['win_rate'][i]:>9.1%} "
+            f"{result['good_rate'][i]:>9.1%} {result['mae'][i]:>10.4f} {result['bias'][i]:>+10.4f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_deviations(spec: str) -> np.ndarray:
+    """'10:99' (inclusive range), '10:99:5' (with step) or '10,50,84'"""
+    if ":" in spec:
+        parts: List[int] = [int(x) for x in spec.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return np.arange(start, stop + 1, step)
+    return np.array([int(x) for x in spec.split(",")])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest agent prediction + deviation logic on a recorded price series")
+    parser.add_argument("prices", type=Path, help="CSV with publish_time, price[, ema_price]")
+    parser.add_argument("--rounds", type=Path, help="CSV with start_time per round (default: evenly spaced)")
+    parser.add_argument("--interval", type=float, default=ROUND_INTERVAL, help="Seconds between generated round starts")
+    parser.add_argument("--deviations", default="10:99", help="Deviation settings, e.g. 10:99, 10:99:5 or 10,50,84")
+    parser.add_argument("--strategy", choices=["local", "hold"], default="local")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    series = load_price_series(args.prices)
+    starts = load_round_schedule(args.rounds) if args.rounds else make_round_schedule(series, args.interval)
+    result = run_backtest(series, starts, parse_deviations(args.deviations), args.strategy)
+
+    print(f"{len(starts)} rounds, {len(result['deviations'])} deviation settings, strategy={args.strategy}")
+    print(format_report(result, args.top))
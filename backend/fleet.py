@@ -0,0 +1,488 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+FLEET_POLL_CONCURRENCY = 32  # agents polled at once (two Agentverse requests each)
+FLEET_TICK = 5.0  # seconds between scheduler ticks
+FLEET_MIN_INTERVAL = 30.0  # poll interval for new, changed or unhealthy agents
+FLEET_MAX_INTERVAL = 300.0  # healthy agents back off to this
+FLEET_HTTP_TIMEOUT = 10.0
+FLEET_UNREACHABLE_AFTER = 3  # consecutive failed polls before an agent is unreachable
+FLEET_STALE_ROUNDS = 3  # indexed rounds without a PredictionSubmitted before a running agent is stale
+FLEET_SUBMIT_GRACE = 600.0  # seconds after deploy before a missing first submission counts
+FLEET_LOG_LINES = 50  # latest log lines inspected for errors
+
+# Most severe first; an agent is reported in the first state that applies
+FLEET_STATES = ["unreachable", "stopped", "stale", "erroring", "healthy", "pending"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    agent_address TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    deviation INTEGER NOT NULL,
+    predictor TEXT NOT NULL,
+    wallet_address TEXT NOT NULL,
+    api_key TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    code_hash TEXT
+);
+"""
+
+
+class FleetRegistry:
+    """Deployed agents and the parameters their code was rendered from
+
+    Rows hold agent seeds and Agentverse API keys, so the database is created readable by
+    its owner only (SQLite gives the -wal / -shm files the same mode).
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.close(os.open(db_path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(db_path, 0o600)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def register(self, agent_address: str, name: str, seed: str, deviation: int, predictor: str,
+                 wallet_address: str, api_key: str, code_hash: Optional[str] = None, replace: bool = False) -> bool:
+        """Add an agent; an existing row is only overwritten with replace=True, once the
+        caller has proven it controls the agent. Returns whether a row was written."""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self.lock, self.conn:
+            return self.conn.execute(
+                f"{verb} INTO agents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (agent_address, name, seed, deviation, predictor, wallet_address, api_key, time.time(), code_hash),
+            ).rowcount > 0
+
+    def remove(self, agent_address: str) -> bool:
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM agents WHERE agent_address = ?", (agent_address,)).rowcount > 0
+
+    def agents(self) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.conn.execute("SELECT * FROM agents ORDER BY created_at").fetchall()]
+
+    def get(self, agent_address: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM agents WHERE agent_address = ?", (agent_address,)).fetchone()
+        return dict(row) if row else None
+
+    def set_code_hash(self, agent_address: str, code_hash: str):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE agents SET code_hash = ? WHERE agent_address = ?", (code_hash, agent_address))
+
+    def size(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+
+def log_has_errors(logs: List[Dict]) -> bool:
+    return any(
+        str(line.get("log_level", "")).lower() in ("error", "critical")
+        for line in logs[-FLEET_LOG_LINES:]
+    )
+
+
+class FleetMonitor:
+    """Polls Agentverse for every registered agent and cross-checks on-chain submissions
+
+    Each agent has its own next-poll time: healthy agents back off from FLEET_MIN_INTERVAL
+    to FLEET_MAX_INTERVAL, anything new, changed or unhealthy drops back to the minimum.
+    Due agents are polled concurrently over one pooled client, at most
+    FLEET_POLL_CONCURRENCY agents at a time. `submissions` returns the latest indexed
+    round and each agent's last PredictionSubmitted round (or None with no indexer).
+    """
+
+    def __init__(self, registry: FleetRegistry, base_url: str, submissions: Callable[[], Optional[Dict]]):
+        self.registry = registry
+        self.base_url = base_url
+        self.submissions = submissions
+        self.semaphore = asyncio.Semaphore(FLEET_POLL_CONCURRENCY)
+        self.health: Dict[str, Dict] = {}
+        self.latest_round: Optional[int] = None
+        self.stats = {"ticks": 0, "polls": 0, "poll_errors": 0, "rate_limited": 0, "last_tick_duration": 0.0}
+
+    def _entry(self, agent_address: str) -> Dict:
+        if agent_address not in self.health:
+            self.health[agent_address] = {
+                "state": "pending",
+                "state_since": time.time(),
+                "running": None,
+                "log_errors": False,
+                "last_log_at": None,
+                "last_polled": None,
+                "failures": 0,
+                "interval": FLEET_MIN_INTERVAL,
+                "next_poll": 0.0,
+                "last_round": None,
+                "last_block": None,
+                "error": None,
+            }
+        return self.health[agent_address]
+
+    async def poll(self, client: httpx.AsyncClient, agent: Dict):
+        """Read one agent's hosting status and latest logs"""
+        entry = self._entry(agent["agent_address"])
+        url = f"{self.base_url}/hosting/agents/{agent['agent_address']}"
+        headers = {"Authorization": f"Bearer {agent['api_key']}"}
+        async with self.semaphore:
+            try:
+                info, logs = await asyncio.gather(
+                    client.get(url, headers=headers),
+                    client.get(f"{url}/logs/latest", headers=headers),
+                )
+                if 429 in (info.status_code, logs.status_code):
+                    self.stats["rate_limited"] += 1
+                    entry["next_poll"] = time.time() + entry["interval"] * 2
+                    return
+                info.raise_for_status()
+                running = bool(info.json().get("running"))
+                log_lines = logs.json() if logs.status_code == 200 else []
+            except Exception as e:
+                self.stats["poll_errors"] += 1
+                entry["failures"] += 1
+                entry["error"] = str(e) or type(e).__name__
+                entry["interval"] = FLEET_MIN_INTERVAL
+                entry["next_poll"] = time.time() + entry["interval"]
+                return
+        self.stats["polls"] += 1
+
+        changed = running != entry["running"] or log_has_errors(log_lines) != entry["log_errors"]
+        entry["running"] = running
+        entry["log_errors"] = log_has_errors(log_lines)
+        if log_lines:
+            entry["last_log_at"] = log_lines[-1].get("log_timestamp")
+        entry["failures"] = 0
+        entry["error"] = None
+        entry["last_polled"] = time.time()
+        healthy = running and not entry["log_errors"]
+        entry["interval"] = min(entry["interval"] * 2, FLEET_MAX_INTERVAL) if healthy and not changed else FLEET_MIN_INTERVAL
+        entry["next_poll"] = time.time() + entry["interval"]
+
+    def classify(self, agent: Dict, entry: Dict) -> str:
+        if entry["failures"] >= FLEET_UNREACHABLE_AFTER:
+            return "unreachable"
+        if entry["running"] is None:
+            return "pending"
+        if not entry["running"]:
+            return "stopped"
+        if self.latest_round is not None:
+            if entry["last_round"] is None:
+                if time.time() - agent["created_at"] > FLEET_SUBMIT_GRACE:
+                    return "stale"
+            elif self.latest_round - entry["last_round"] >= FLEET_STALE_ROUNDS:
+                return "stale"
+        if entry["log_errors"]:
+            return "erroring"
+        return "healthy"
+
+    def cross_check(self, agents: List[Dict], submissions: Optional[Dict]):
+        """Fold in each agent's last on-chain submission and update states"""
+        if submissions:
+            self.latest_round = submissions["latest_round"]
+        alerts = {}
+        for agent in agents:
+            entry = self._entry(agent["agent_address"])
+            if submissions:
+                last = submissions["agents"].get(agent["agent_address"])
+                entry["last_round"] = last["last_round"] if last else None
+                entry["last_block"] = last["last_block"] if last else None
+            state = self.classify(agent, entry)
+            if state != entry["state"]:
+                if state not in ("healthy", "pending"):
+                    alerts[state] = alerts.get(state, 0) + 1
+                entry["state"] = state
+                entry["state_since"] = time.time()
+                # Re-check soon after any transition
+                entry["next_poll"] = min(entry["next_poll"], time.time() + FLEET_MIN_INTERVAL)
+        if alerts:
+            logger.warning("Fleet agents newly unhealthy: %s", alerts)
+
+    async def tick(self, client: httpx.AsyncClient):
+        started = time.time()
+        agents = await asyncio.to_thread(self.registry.agents)
+        due = [agent for agent in agents if self._entry(agent["agent_address"])["next_poll"] <= started]
+        if due:
+            await asyncio.gather(*(self.poll(client, agent) for agent in due))
+        self.cross_check(agents, await asyncio.to_thread(self.submissions))
+        # Forget agents removed from the registry
+        registered = {agent["agent_address"] for agent in agents}
+        for agent_address in [a for a in self.health if a not in registered]:
+            del self.health[agent_address]
+        self.stats["ticks"] += 1
+        self.stats["last_tick_duration"] = time.time() - started
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=FLEET_POLL_CONCURRENCY * 2, max_keepalive_connections=FLEET_POLL_CONCURRENCY)
+        async with httpx.AsyncClient(timeout=FLEET_HTTP_TIMEOUT, limits=limits) as client:
+            while True:
+                try:
+                    await self.tick(client)
+                except Exception as e:
+                    logger.warning("Fleet monitor tick failed: %s", e)
+                await asyncio.sleep(FLEET_TICK)
+
+    def view(self, agent_address: str) -> Optional[Dict]:
+        entry = self.health.get(agent_address)
+        if entry is None:
+            return None
+        return {
+            "agent_address": agent_address,
+            **{k: v for k, v in entry.items() if k not in ("interval", "next_poll")},
+            "poll_interval": entry["interval"],
+            "rounds_behind": self.latest_round - entry["last_round"]
+            if self.latest_round is not None and entry["last_round"] is not None else None,
+        }
+
+    def summary(self, state: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict:
+        """Counts per state, alerts (anything not healthy) and a page of agents"""
+        counts = {name: 0 for name in FLEET_STATES}
+        alerts = []
+        rows = []
+        for agent_address, entry in self.health.items():
+            counts[entry["state"]] += 1
+            if entry["state"] not in ("healthy", "pending"):
+                alerts.append({
+                    "agent_address": agent_address,
+                    "state": entry["state"],
+                    "since": entry["state_since"],
+                    "last_round": entry["last_round"],
+                    "error": entry["error"],
+                })
+            if state is None or entry["state"] == state:
+                rows.append(agent_address)
+        alerts.sort(key=lambda alert: (FLEET_STATES.index(alert["state"]), alert["since"]))
+        return {
+            "total_agents": len(self.health),
+            "latest_round": self.latest_round,
+            "states": counts,
+            "alerts": alerts,
+            "agents": [self.view(agent_address) for agent_address in rows[offset:offset + limit]],
+            "monitor": self.stats,
+        }
+
+
+ROLLOUT_PARALLELISM = 16  # default agents updated at once
+ROLLOUT_CANARY_PERCENT = 5.0  # default share of the fleet updated first
+ROLLOUT_CANARY_ROUNDS = 1  # new indexed rounds every canary must submit to
+ROLLOUT_CANARY_TIMEOUT = 900.0  # seconds canaries get to prove themselves before the rollout halts
+ROLLOUT_CANARY_PASS = 0.9  # share of canaries that must pass
+ROLLOUT_CANARY_CHECK = 15.0  # seconds between canary checks
+ROLLOUT_MAX_FAILURES = 5  # failed agent updates after the canary phase before the rollout halts
+ROLLOUT_RETRIES = 3  # attempts per Agentverse request on 429 / 5xx
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class FleetRollout:
+    """Re-renders every registered agent's code from its stored parameters and redeploys it
+
+    Agents whose stored code hash already matches the freshly rendered code are skipped, so
+    re-running a halted rollout resumes it. A canary share of the fleet is updated first;
+    the rest only follows once enough canaries are running cleanly and have submitted
+    predictions to rounds indexed after their restart. Updates are PUT /code, stop, start,
+    at most `parallelism` agents at a time. Halting stops new updates from starting but lets
+    the ones already in flight finish, so no agent is left stopped on its old code.
+    """
+
+    def __init__(self, registry: FleetRegistry, monitor: FleetMonitor, base_url: str, render: Callable[[Dict], str]):
+        self.registry = registry
+        self.monitor = monitor
+        self.base_url = base_url
+        self.render = render
+        self.task: Optional[asyncio.Task] = None
+        self.state: Optional[Dict] = None
+        self.halt_reason: Optional[str] = None
+        self.deploys: Set[asyncio.Task] = set()
+
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def plan(self, agent_addresses: Optional[List[str]] = None, force: bool = False) -> List[Dict]:
+        """Registered agents (optionally a subset) whose deployed code is out of date"""
+        selected = set(agent_addresses) if agent_addresses else None
+        pending = []
+        for agent in self.registry.agents():
+            if selected is not None and agent["agent_address"] not in selected:
+                continue
+            code = self.render(agent)
+            if force or agent["code_hash"] != code_hash(code):
+                pending.append({**agent, "code": code})
+        return pending
+
+    def start(self, agents: List[Dict], parallelism: int, canary_percent: float) -> Dict:
+        canary_count = min(len(agents), math.ceil(len(agents) * canary_percent / 100)) if canary_percent > 0 else 0
+        self.state = {
+            "status": "canary" if canary_count else "rolling",
+            "started_at": time.time(),
+            "finished_at": None,
+            "parallelism": parallelism,
+            "canary_percent": canary_percent,
+            "total": len(agents),
+            "canaries": [agent["agent_address"] for agent in agents[:canary_count]],
+            "canary_results": {},
+            "updated": 0,
+            "failed": 0,
+            "errors": {},
+            "reason": None,
+        }
+        self.halt_reason = None
+        self.task = asyncio.create_task(self.run(agents, parallelism, canary_count))
+        return self.state
+
+    def finish(self, status: str, reason: Optional[str] = None):
+        if self.state["finished_at"] is not None:
+            return
+        self.state["status"] = status
+        self.state["reason"] = reason
+        self.state["finished_at"] = time.time()
+        if reason:
+            logger.warning("Fleet rollout %s: %s", status, reason)
+        else:
+            logger.info("Fleet rollout %s: %d updated, %d failed", status, self.state["updated"], self.state["failed"])
+
+    def halt(self, reason: str):
+        """Stop an in-flight rollout; agents already updated keep their new code
+
+        Updates already pushing code finish in the background before the rollout reports halted.
+        """
+        if self.running() and self.halt_reason is None:
+            self.halt_reason = reason
+            self.state["status"] = "halting"
+            self.task.cancel()
+
+    async def _request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(ROLLOUT_RETRIES):
+            response = await client.request(method, url, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
+                break
+            await asyncio.sleep(2 ** attempt)
+        response.raise_for_status()
+        return response
+
+    async def deploy(self, client: httpx.AsyncClient, agent: Dict) -> bool:
+        """Push one agent's new code, restart it and record the new code hash"""
+        url = f"{self.base_url}/hosting/agents/{agent['agent_address']}"
+        headers = {"Authorization": f"Bearer {agent['api_key']}"}
+        code = json.dumps([{"id": 0, "name": "agent.py", "value": agent["code"], "language": "python"}])
+        try:
+            await self._request(client, "PUT", f"{url}/code", headers=headers, json={"code": code})
+            await self._request(client, "POST", f"{url}/stop", headers=headers)
+            await self._request(client, "POST", f"{url}/start", headers=headers)
+        except Exception as e:
+            self.state["failed"] += 1
+            self.state["errors"][agent["agent_address"]] = str(e) or type(e).__name__
+            return False
+        await asyncio.to_thread(self.registry.set_code_hash, agent["agent_address"], code_hash(agent["code"]))
+        self.state["updated"] += 1
+        # Have the monitor look at it again on its next tick
+        self.monitor._entry(agent["agent_address"])["next_poll"] = 0.0
+        return True
+
+    async def update(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, agent: Dict) -> bool:
+        """Deploy one agent once a slot is free; a halt only cancels the wait, never the deploy"""
+        async with semaphore:
+            if self.halt_reason is not None:
+                return False
+            task = asyncio.create_task(self.deploy(client, agent))
+            self.deploys.add(task)
+            task.add_done_callback(self.deploys.discard)
+            return await asyncio.shield(task)
+
+    async def check_canaries(self, client: httpx.AsyncClient, canaries: List[Dict], baseline_round: Optional[int]) -> Dict[str, bool]:
+        """Whether each canary is running without log errors and, with an indexer, has submitted since its restart"""
+        await asyncio.gather(*(self.monitor.poll(client, agent) for agent in canaries))
+        submissions = await asyncio.to_thread(self.monitor.submissions)
+        results = {}
+        for agent in canaries:
+            entry = self.monitor._entry(agent["agent_address"])
+            passed = bool(entry["running"]) and not entry["log_errors"]
+            if submissions and baseline_round is not None:
+                last = submissions["agents"].get(agent["agent_address"])
+                passed = passed and last is not None and last["last_round"] >= baseline_round + ROLLOUT_CANARY_ROUNDS
+            results[agent["agent_address"]] = passed
+        return results
+
+    async def run(self, agents: List[Dict], parallelism: int, canary_count: int):
+        try:
+            reason = await self._run(agents, parallelism, canary_count)
+        except asyncio.CancelledError:
+            self.finish("halted", self.halt_reason or "cancelled")
+            raise
+        except Exception as e:
+            return self.finish("failed", str(e) or type(e).__name__)
+        if reason:
+            self.finish("halted", reason)
+        else:
+            self.finish("completed")
+
+    async def _run(self, agents: List[Dict], parallelism: int, canary_count: int) -> Optional[str]:
+        """Canary phase then the rest of the fleet; returns why it halted, if it did"""
+        semaphore = asyncio.Semaphore(parallelism)
+        canaries, rest = agents[:canary_count], agents[canary_count:]
+        limits = httpx.Limits(max_connections=parallelism * 2, max_keepalive_connections=parallelism)
+        async with httpx.AsyncClient(timeout=FLEET_HTTP_TIMEOUT, limits=limits) as client:
+            try:
+                return await self._phases(client, semaphore, canaries, rest, canary_count)
+            finally:
+                # Let deploys already pushing code finish before the client closes
+                while self.deploys:
+                    await asyncio.wait(set(self.deploys))
+
+    async def _phases(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, canaries: List[Dict], rest: List[Dict], canary_count: int) -> Optional[str]:
+        if canaries:
+            submissions = await asyncio.to_thread(self.monitor.submissions)
+            baseline_round = submissions["latest_round"] if submissions else None
+            updated = await asyncio.gather(*(self.update(client, semaphore, agent) for agent in canaries))
+            canaries = [agent for agent, ok in zip(canaries, updated) if ok]
+            if len(canaries) < ROLLOUT_CANARY_PASS * canary_count:
+                return f"{canary_count - len(canaries)} of {canary_count} canary updates failed"
+
+            self.state["status"] = "waiting"
+            deadline = time.time() + ROLLOUT_CANARY_TIMEOUT
+            while True:
+                await asyncio.sleep(ROLLOUT_CANARY_CHECK)
+                results = await self.check_canaries(client, canaries, baseline_round)
+                self.state["canary_results"] = results
+                if sum(results.values()) >= ROLLOUT_CANARY_PASS * canary_count:
+                    break
+                if time.time() > deadline:
+                    stopped = [address for address, ok in results.items() if not ok]
+                    return f"{len(stopped)} canaries not running or submitting after {ROLLOUT_CANARY_TIMEOUT:.0f}s"
+
+        self.state["status"] = "rolling"
+        failures_before = self.state["failed"]
+        pending = [asyncio.create_task(self.update(client, semaphore, agent)) for agent in rest]
+        try:
+            for done in asyncio.as_completed(pending):
+                await done
+                if self.state["failed"] - failures_before > ROLLOUT_MAX_FAILURES:
+                    return f"more than {ROLLOUT_MAX_FAILURES} agent updates failed"
+        finally:
+            for task in pending:
+                task.cancel()
+        return None
+
+    def view(self) -> Optional[Dict]:
+        if self.state is None:
+            return None
+        return {**self.state, "errors": dict(list(self.state["errors"].items())[:100])}
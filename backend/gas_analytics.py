@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from gas_ledger import GasLedger, GasTxLog
+
+
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+PERCENTILES = (50, 90, 95, 99)
+BURN_WINDOW = 86400  # seconds of recent spend the burn rate (and so runway) is based on
+ANALYTICS_CACHE_SIZE = 32  # distinct queries kept per log version
+ANALYTICS_TTL = 60  # seconds a result is reused even if nothing was appended (burn rate moves with time)
+
+
+def grouped_percentiles(groups: np.ndarray, values: np.ndarray, group_count: int) -> Dict[int, np.ndarray]:
+    """Linear-interpolated percentiles of values within each group id, for all groups at once"""
+    order = np.lexsort((values, groups))
+    ordered = values[order].astype(np.float64)
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    result = {}
+    for p in PERCENTILES:
+        position = starts + (counts - 1).clip(min=0) * (p / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        low[~present] = high[~present] = 0
+        value = ordered[low] + (ordered[high] - ordered[low]) * (position - low) if len(ordered) else np.zeros(group_count)
+        result[p] = np.where(present, value, np.nan)
+    return result
+
+
+def spend_buckets(timestamp: np.ndarray, cost: np.ndarray, bucket_seconds: int, since: float) -> List[Dict]:
+    """Fleet spend and transaction count per time bucket from `since` on"""
+    recent = timestamp >= since
+    buckets = (timestamp[recent] // bucket_seconds).astype(np.int64)
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    spent = np.bincount(inverse, weights=cost[recent], minlength=len(keys))
+    counts = np.bincount(inverse, minlength=len(keys))
+    return [
+        {
+            "bucket_start": int(key * bucket_seconds),
+            "bucket": datetime.fromtimestamp(int(key * bucket_seconds)).isoformat(),
+            "spent": float(s),
+            "tx_count": int(c),
+        }
+        for key, s, c in zip(keys, spent, counts)
+    ]
+
+
+def percentile_dict(values: Dict[int, np.ndarray], index: int) -> Dict:
+    return {f"p{p}": None if np.isnan(values[p][index]) else float(values[p][index]) for p in PERCENTILES}
+
+
+def fleet_percentiles(values: np.ndarray) -> Dict:
+    if not len(values):
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+class GasAnalytics:
+    """Spend, gas percentiles and runway computed over the whole columnar gas log
+
+    Every statistic is a vectorized pass over the memory-mapped columns. Results are cached
+    per query and invalidated when the log grows, the ledger is rewritten or the
+    ANALYTICS_TTL time bucket rolls over.
+    """
+
+    def __init__(self, log: GasTxLog, ledger: GasLedger):
+        self.log = log
+        self.ledger = ledger
+        self.lock = threading.Lock()
+        self.version = None
+        self.cache: OrderedDict = OrderedDict()
+        self.stats = {"requests": 0, "computes": 0}
+
+    def compute(self, bucket: str, days: int, now: Optional[float] = None) -> Dict:
+        now = now or time.time()
+        columns = self.log.columns()
+        agents = self.log.agents
+        agent_ids = np.asarray(columns["agent"], dtype=np.int64)
+        timestamp = np.asarray(columns["timestamp"])
+        cost = np.asarray(columns["cost"])
+        group_count = len(agents)
+
+        tx_count = np.bincount(agent_ids, minlength=group_count)
+        spent = np.bincount(agent_ids, weights=cost, minlength=group_count)
+        recent = timestamp >= now - BURN_WINDOW
+        burn_per_second = np.bincount(agent_ids[recent], weights=cost[recent], minlength=group_count) / BURN_WINDOW
+        gas_used = grouped_percentiles(agent_ids, np.asarray(columns["gas_used"]), group_count)
+        gas_price = grouped_percentiles(agent_ids, np.asarray(columns["gas_price"]), group_count)
+
+        with self.ledger.lock:
+            ledger = self.ledger.load()
+        per_agent = []
+        for i, agent_address in enumerate(agents):
+            remaining = ledger.get(agent_address, {}).get("remaining")
+            burn = burn_per_second[i]
+            per_agent.append({
+                "agent_address": agent_address,
+                "tx_count": int(tx_count[i]),
+                "spent": float(spent[i]),
+                "gas_used": percentile_dict(gas_used, i),
+                "gas_price": percentile_dict(gas_price, i),
+                "burn_rate_per_hour": float(burn * 3600),
+                "remaining": remaining,
+                "runway_hours": float(remaining / burn / 3600) if remaining is not None and burn > 0 else None,
+            })
+
+        fleet_burn = float(burn_per_second.sum())
+        fleet_remaining = sum(info.get("remaining", 0) for info in ledger.values())
+        return {
+            "transactions": int(len(cost)),
+            "bucket": bucket,
+            "spend": spend_buckets(timestamp, cost, BUCKET_SECONDS[bucket], now - days * 86400),
+            "fleet": {
+                "spent": float(cost.sum()),
+                "burn_rate_per_hour": fleet_burn * 3600,
+                "remaining": fleet_remaining,
+                "runway_hours": fleet_remaining / fleet_burn / 3600 if fleet_burn > 0 else None,
+                "gas_used": fleet_percentiles(columns["gas_used"]),
+                "gas_price": fleet_percentiles(columns["gas_price"]),
+            },
+            "agents": per_agent,
+        }
+
+    def get(self, bucket: str = "hour", days: int = 7) -> Dict:
+        """Cached analytics for the current log, ledger and time bucket"""
+        if bucket not in BUCKET_SECONDS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        self.stats["requests"] += 1
+        now = time.time()
+        with self.lock:
+            ledger_mtime = self.ledger.path.stat().st_mtime_ns if self.ledger.path.exists() else None
+            version = (self.log.rows(), ledger_mtime, int(now // ANALYTICS_TTL))
+            if version != self.version:
+                self.cache.clear()
+                self.version = version
+            key = (bucket, days)
+            if key not in self.cache:
+                self.cache[key] = self.compute(bucket, days, now)
+                self.stats["computes"] += 1
+                while len(self.cache) > ANALYTICS_CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            self.cache.move_to_end(key)
+            return self.cache[key]
@@ -0,0 +1,484 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_BATCH_SIZE = 100  # eth_getTransactionReceipt calls per JSON-RPC batch
+RECONCILE_CONCURRENCY = 4  # batches in flight (the RPC scheduler's "analytics" share)
+RECONCILE_INTERVAL = 300.0  # seconds between background passes
+RECONCILE_MISSING_AFTER = 3600.0  # seconds before a recorded tx with no receipt counts as dropped
+RECONCILE_MISMATCH_LOG = 200  # recent mismatches kept for the status endpoint
+
+COMPACT_HORIZON = 7 * 86400.0  # seconds of raw transaction detail kept in the ledger
+COMPACT_DAILY_AFTER = 30 * 86400.0  # hourly summaries older than this merge into daily ones
+COMPACT_MAX_ENTRIES = 20000  # raw entries archived per pass, bounding each pass's work
+COMPACT_INTERVAL = 600.0  # seconds between background passes
+
+# Entries that were never charged on chain and so do not count towards `spent`
+UNCHARGED = {"missing", "duplicate"}
+
+# Settled transaction log: one fixed-width little-endian file per column
+GAS_LOG_COLUMNS = {
+    "agent": np.dtype("<u4"),  # index into agents.json
+    "timestamp": np.dtype("<f8"),  # unix seconds the transaction was recorded
+    "gas_used": np.dtype("<u8"),
+    "gas_price": np.dtype("<u8"),  # wei
+    "cost": np.dtype("<f8"),  # ETH
+}
+
+
+class GasLedger:
+    """gas_tracking.json: each agent's stake, spend and transaction records
+
+    Every read-modify-write holds `lock`, so the reconciler's corrections and the hot
+    path's appends never overwrite each other.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+
+    def load(self) -> Dict:
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def save(self, data: Dict):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class GasTxLog:
+    """Append-only columnar log of settled ledger transactions
+
+    Row i of every column file is the same transaction, so a column is mapped with
+    numpy.memmap and scanned without parsing anything. Agent addresses are stored once in
+    agents.json and referenced by index. A torn append (crash mid-write) is cut back to the
+    shortest column on the next append.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.lock = threading.Lock()
+        agents_file = self.directory / "agents.json"
+        self.agents: List[str] = json.loads(agents_file.read_text()) if agents_file.exists() else []
+        self.agent_ids = {agent: i for i, agent in enumerate(self.agents)}
+
+    def _path(self, column: str) -> Path:
+        return self.directory / f"{column}.bin"
+
+    def rows(self) -> int:
+        sizes = [
+            self._path(column).stat().st_size // dtype.itemsize if self._path(column).exists() else 0
+            for column, dtype in GAS_LOG_COLUMNS.items()
+        ]
+        return min(sizes)
+
+    def _agent_id(self, agent_address: str) -> int:
+        if agent_address not in self.agent_ids:
+            self.agent_ids[agent_address] = len(self.agents)
+            self.agents.append(agent_address)
+        return self.agent_ids[agent_address]
+
+    def append(self, records: List[Tuple[str, float, int, int, float]]):
+        """Append (agent_address, timestamp, gas_used, gas_price, cost_eth) rows"""
+        if not records:
+            return
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            known = len(self.agents)
+            ids = [self._agent_id(record[0]) for record in records]
+            if len(self.agents) > known:
+                tmp = self.directory / "agents.json.tmp"
+                tmp.write_text(json.dumps(self.agents))
+                os.replace(tmp, self.directory / "agents.json")
+
+            rows = self.rows()
+            values = [ids] + [[record[i] for record in records] for i in range(1, 5)]
+            for (column, dtype), column_values in zip(GAS_LOG_COLUMNS.items(), values):
+                path = self._path(column)
+                with open(path, "r+b" if path.exists() else "wb") as f:
+                    f.truncate(rows * dtype.itemsize)
+                    f.seek(rows * dtype.itemsize)
+                    f.write(np.asarray(column_values, dtype=dtype).tobytes())
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only memory maps of every column (zero-copy)"""
+        rows = self.rows()
+        if rows == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in GAS_LOG_COLUMNS.items()}
+        return {
+            column: np.memmap(self._path(column), dtype=dtype, mode="r", shape=(rows,))
+            for column, dtype in GAS_LOG_COLUMNS.items()
+        }
+
+
+def log_record(agent_address: str, entry: Dict) -> Tuple[str, float, int, int, float]:
+    try:
+        timestamp = datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, ValueError):
+        timestamp = 0.0
+    return (agent_address, timestamp, entry["gas_used"], entry["gas_price"], entry_cost_wei(entry) / 1e18)
+
+
+def entry_cost_wei(entry: Dict) -> int:
+    if entry.get("verified") in UNCHARGED:
+        return 0
+    return entry["gas_used"] * entry["gas_price"]
+
+
+def settle(info: Dict):
+    """Recompute an agent's spent / remaining exactly (in wei) from its transactions and summaries"""
+    spent_wei = sum(entry_cost_wei(entry) for entry in info["transactions"])
+    for level in ("hourly", "daily"):
+        spent_wei += sum(bucket["cost_wei"] for bucket in info.get(level, {}).values())
+    info["spent"] = spent_wei / 1e18
+    info["remaining"] = info["staked"] - info["spent"]
+
+
+def entry_time(entry: Dict) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, ValueError):
+        return None
+
+
+def entry_age(entry: Dict, now: float) -> float:
+    recorded = entry_time(entry)
+    return now - recorded if recorded is not None else 0.0
+
+
+def add_to_bucket(buckets: Dict, start: int, tx_count: int, gas_used: int, cost_wei: int, uncharged: int):
+    bucket = buckets.setdefault(str(start), {"tx_count": 0, "gas_used": 0, "cost_wei": 0, "uncharged": 0})
+    bucket["tx_count"] += tx_count
+    bucket["gas_used"] += gas_used
+    bucket["cost_wei"] += cost_wei
+    bucket["uncharged"] += uncharged
+
+
+class GasReconciler:
+    """Checks agent-reported gas usage against on-chain receipts
+
+    Each agent's transactions carry a `verified_through` watermark: everything before it
+    has been settled (ok, corrected, missing or duplicate), so a pass only looks up the
+    entries recorded since. Receipts are fetched in JSON-RPC batches with a bounded number
+    in flight; the ledger lock is only held while collecting work and applying results.
+    Charged entries are appended to the columnar log as the watermark passes them.
+    """
+
+    def __init__(self, w3, ledger: GasLedger, log: Optional[GasTxLog] = None):
+        self.w3 = w3
+        self.ledger = ledger
+        self.log = log
+        self.pass_lock = threading.Lock()
+        self.mismatches = deque(maxlen=RECONCILE_MISMATCH_LOG)
+        self.stats = {
+            "passes": 0, "checked": 0, "verified": 0, "corrected": 0, "missing": 0, "duplicates": 0,
+            "batches": 0, "batch_errors": 0, "backlog": 0, "last_pass": None,
+        }
+
+    def _fetch_batch(self, hashes: List[str]) -> Optional[List[Dict]]:
+        try:
+            responses = self.w3.provider.make_batch_request(
+                [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+            )
+        except Exception as e:
+            logger.warning("Receipt batch failed: %s", e)
+            responses = None
+        self.stats["batches"] += 1
+        if not isinstance(responses, list):
+            self.stats["batch_errors"] += 1
+            return None
+        return responses
+
+    def fetch_receipts(self, hashes: List[str]) -> Dict[str, Optional[Dict]]:
+        """Raw receipts by hash (None if not mined); hashes whose lookup failed are left out"""
+        batches = [hashes[i:i + RECONCILE_BATCH_SIZE] for i in range(0, len(hashes), RECONCILE_BATCH_SIZE)]
+        receipts = {}
+        with ThreadPoolExecutor(max_workers=RECONCILE_CONCURRENCY) as pool:
+            for batch, responses in zip(batches, pool.map(self._fetch_batch, batches)):
+                for tx_hash, response in zip(batch, responses or []):
+                    if "error" not in response:
+                        receipts[tx_hash] = response.get("result")
+        return receipts
+
+    def _flag(self, agent_address: str, info: Dict, entry: Dict, kind: str, **detail):
+        info["mismatches"] = info.get("mismatches", 0) + 1
+        self.mismatches.append({
+            "agent_address": agent_address,
+            "tx_hash": entry["tx_hash"],
+            "kind": kind,
+            "detected_at": datetime.now().isoformat(),
+            **detail
+        })
+
+    def _apply(self, agent_address: str, info: Dict, entry: Dict, raw: Optional[Dict], now: float):
+        if raw is None:
+            if entry_age(entry, now) > RECONCILE_MISSING_AFTER:
+                entry["verified"] = "missing"
+                self.stats["missing"] += 1
+                self._flag(agent_address, info, entry, "missing")
+            return
+
+        gas_used = int(raw["gasUsed"], 16)
+        gas_price = int(raw.get("effectiveGasPrice") or "0x0", 16)
+        entry["block_number"] = int(raw["blockNumber"], 16)
+        entry["tx_status"] = int(raw.get("status") or "0x0", 16)
+        if (gas_used, gas_price) == (entry["gas_used"], entry["gas_price"]):
+            entry["verified"] = "ok"
+            self.stats["verified"] += 1
+            return
+
+        self._flag(agent_address, info, entry, "gas",
+                   reported={"gas_used": entry["gas_used"], "gas_price": entry["gas_price"]},
+                   actual={"gas_used": gas_used, "gas_price": gas_price})
+        entry["reported_gas_used"] = entry["gas_used"]
+        entry["reported_gas_price"] = entry["gas_price"]
+        entry["gas_used"] = gas_used
+        entry["gas_price"] = gas_price
+        entry["gas_cost_eth"] = gas_used * gas_price / 1e18
+        entry["verified"] = "corrected"
+        self.stats["corrected"] += 1
+
+    def _settle_pass(self, receipts: Dict[str, Optional[Dict]]) -> int:
+        """Apply looked-up receipts, flag duplicates and advance watermarks; returns the backlog"""
+        with self.ledger.lock:
+            # Re-read: entries may have been recorded while receipts were in flight
+            data = self.ledger.load()
+            now = time.time()
+            seen = set()
+            backlog = 0
+            changed = False
+            settled = []
+            for agent_address, info in data.items():
+                transactions = info.get("transactions", [])
+                watermark = info.get("verified_through", 0)
+                touched = False
+                for index, entry in enumerate(transactions):
+                    if index < watermark or "verified" in entry:
+                        seen.add(entry["tx_hash"])
+                        continue
+                    if entry["tx_hash"] in seen:
+                        # Reported twice (e.g. by the agent and the relayer): charge once
+                        entry["verified"] = "duplicate"
+                        self.stats["duplicates"] += 1
+                        self._flag(agent_address, info, entry, "duplicate")
+                        touched = True
+                        continue
+                    seen.add(entry["tx_hash"])
+                    if entry["tx_hash"] in receipts:
+                        self._apply(agent_address, info, entry, receipts[entry["tx_hash"]], now)
+                        touched = True
+                    if "verified" not in entry:
+                        backlog += 1
+                while watermark < len(transactions) and "verified" in transactions[watermark]:
+                    if transactions[watermark]["verified"] not in UNCHARGED:
+                        settled.append(log_record(agent_address, transactions[watermark]))
+                    watermark += 1
+                if touched:
+                    info["verified_through"] = watermark
+                    settle(info)
+                    changed = True
+            if changed:
+                self.ledger.save(data)
+                # After the ledger: a crash in between loses log rows rather than doubling them
+                if self.log:
+                    self.log.append(settled)
+        return backlog
+
+    def backfill_log(self, data: Dict):
+        """Seed an empty log with everything already below the watermarks"""
+        self.log.append([
+            log_record(agent_address, entry)
+            for agent_address, info in data.items()
+            for entry in info.get("transactions", [])[:info.get("verified_through", 0)]
+            if entry.get("verified") not in UNCHARGED
+        ])
+
+    def reconcile_once(self) -> Dict:
+        """Verify every entry past the watermarks; returns a summary of the pass"""
+        with self.pass_lock:
+            started = time.time()
+            with self.ledger.lock:
+                data = self.ledger.load()
+            if self.log and self.log.rows() == 0:
+                self.backfill_log(data)
+            hashes = list({
+                entry["tx_hash"]
+                for info in data.values()
+                for entry in info.get("transactions", [])[info.get("verified_through", 0):]
+                if "verified" not in entry
+            })
+
+            receipts = self.fetch_receipts(hashes)
+            backlog = self._settle_pass(receipts) if hashes else 0
+
+            self.stats["passes"] += 1
+            self.stats["checked"] += len(receipts)
+            self.stats["backlog"] = backlog
+            self.stats["last_pass"] = {
+                "started_at": datetime.fromtimestamp(started).isoformat(),
+                "duration": time.time() - started,
+                "looked_up": len(hashes),
+                "resolved": sum(1 for r in receipts.values() if r),
+                "backlog": backlog,
+            }
+            return self.stats["last_pass"]
+
+    async def run(self):
+        """Reconcile every RECONCILE_INTERVAL seconds"""
+        while True:
+            try:
+                summary = await asyncio.to_thread(self.reconcile_once)
+                if summary["looked_up"]:
+                    logger.info("Gas reconciliation: %d looked up, %d resolved, %d pending in %.1fs",
+                                summary["looked_up"], summary["resolved"], summary["backlog"], summary["duration"])
+            except Exception as e:
+                logger.warning("Gas reconciliation failed: %s", e)
+            await asyncio.sleep(RECONCILE_INTERVAL)
+
+    def status(self) -> Dict:
+        return {
+            **self.stats,
+            "recent_mismatches": list(self.mismatches)[-20:],
+        }
+
+
+class GasCompactor:
+    """Keeps the ledger's raw transaction lists to a recent horizon
+
+    Settled entries (below the reconciler's watermark) older than `horizon` seconds are
+    written to a gzipped JSON-lines segment under archive_dir, then replaced in the ledger
+    by hourly summary buckets holding their exact wei cost, so `spent` is unchanged. Hourly
+    buckets older than COMPACT_DAILY_AFTER merge into daily ones. A pass archives at most
+    COMPACT_MAX_ENTRIES entries; the ledger lock is only held to read and to apply.
+    """
+
+    def __init__(self, ledger: GasLedger, archive_dir: Path, horizon: float = COMPACT_HORIZON):
+        self.ledger = ledger
+        self.archive_dir = archive_dir
+        self.horizon = horizon
+        self.pass_lock = threading.Lock()
+        self.stats = {"passes": 0, "archived": 0, "segments": 0, "merged_hours": 0, "last_pass": None}
+
+    def _select(self, data: Dict, cutoff: float) -> Dict[str, List[Dict]]:
+        """Per agent, the leading run of settled entries recorded before cutoff (within budget)"""
+        selected = {}
+        budget = COMPACT_MAX_ENTRIES
+        for agent_address, info in data.items():
+            transactions = info.get("transactions", [])
+            count = 0
+            for entry in transactions[:min(info.get("verified_through", 0), budget)]:
+                recorded = entry_time(entry)
+                if recorded is None or recorded >= cutoff:
+                    break
+                count += 1
+            if count:
+                selected[agent_address] = transactions[:count]
+                budget -= count
+            if budget <= 0:
+                break
+        return selected
+
+    def _archive(self, selected: Dict[str, List[Dict]]) -> Path:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"segment-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.jsonl.gz"
+        with gzip.open(path, "wt") as f:
+            for agent_address, entries in selected.items():
+                for entry in entries:
+                    f.write(json.dumps({"agent_address": agent_address, **entry}) + "\n")
+        return path
+
+    def compact_once(self, now: Optional[float] = None) -> Dict:
+        """Archive and summarize one bounded batch of old entries; returns a summary of the pass"""
+        with self.pass_lock:
+            now = now or time.time()
+            started = time.time()
+            with self.ledger.lock:
+                data = self.ledger.load()
+            selected = self._select(data, now - self.horizon)
+            segment = self._archive(selected) if selected else None
+
+            archived = 0
+            merged = 0
+            with self.ledger.lock:
+                data = self.ledger.load()
+                changed = False
+                for agent_address, info in data.items():
+                    entries = selected.get(agent_address, [])
+                    transactions = info.get("transactions", [])
+                    touched = False
+                    # Only entries are appended meanwhile, so the archived run is still the prefix
+                    if entries and [e["tx_hash"] for e in transactions[:len(entries)]] == [e["tx_hash"] for e in entries]:
+                        hourly = info.setdefault("hourly", {})
+                        for entry in entries:
+                            charged = entry.get("verified") not in UNCHARGED
+                            add_to_bucket(hourly, int(entry_time(entry) // 3600 * 3600), 1,
+                                          entry["gas_used"] if charged else 0, entry_cost_wei(entry), 0 if charged else 1)
+                        info["transactions"] = transactions[len(entries):]
+                        info["verified_through"] -= len(entries)
+                        info["compacted"] = info.get("compacted", 0) + len(entries)
+                        archived += len(entries)
+                        touched = True
+
+                    old_hours = [start for start in info.get("hourly", {}) if int(start) < now - COMPACT_DAILY_AFTER]
+                    if old_hours:
+                        daily = info.setdefault("daily", {})
+                        for start in old_hours:
+                            bucket = info["hourly"].pop(start)
+                            add_to_bucket(daily, int(start) // 86400 * 86400, bucket["tx_count"],
+                                          bucket["gas_used"], bucket["cost_wei"], bucket["uncharged"])
+                        merged += len(old_hours)
+                        touched = True
+
+                    if touched:
+                        settle(info)
+                        changed = True
+                if changed:
+                    self.ledger.save(data)
+
+            self.stats["passes"] += 1
+            self.stats["archived"] += archived
+            self.stats["segments"] += 1 if segment else 0
+            self.stats["merged_hours"] += merged
+            self.stats["last_pass"] = {
+                "started_at": datetime.fromtimestamp(started).isoformat(),
+                "duration": time.time() - started,
+                "archived": archived,
+                "merged_hours": merged,
+                "segment": segment.name if segment else None,
+                # A full batch means more is waiting; the next pass follows immediately
+                "more": archived >= COMPACT_MAX_ENTRIES,
+            }
+            return self.stats["last_pass"]
+
+    async def run(self):
+        """Compact every COMPACT_INTERVAL seconds, back to back while a backlog remains"""
+        while True:
+            try:
+                summary = await asyncio.to_thread(self.compact_once)
+                if summary["archived"] or summary["merged_hours"]:
+                    logger.info("Gas ledger compaction: %d entries archived, %d hours merged in %.1fs",
+                                summary["archived"], summary["merged_hours"], summary["duration"])
+                if summary["more"]:
+                    await asyncio.sleep(1.0)
+                    continue
+            except Exception as e:
+                logger.warning("Gas ledger compaction failed: %s", e)
+            await asyncio.sleep(COMPACT_INTERVAL)
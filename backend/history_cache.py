@@ -0,0 +1,270 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from web3 import Web3
+
+
+HISTORY_CHUNK_SIZE = 50  # entries per getBlocks / getPredictionRounds call
+HISTORY_FETCH_WORKERS = 4
+HISTORY_FINALITY_DEPTH = 10  # chain blocks before a mined block / finalized round is cached
+HISTORY_HEAD_TTL = 1.0  # seconds between head checks
+
+BLOCK_TUPLE = {
+    "components": [
+        {"internalType": "uint256", "name": "blockNumber", "type": "uint256"},
+        {"internalType": "uint256", "name": "timestamp", "type": "uint256"},
+        {"internalType": "string", "name": "minerAgent", "type": "string"},
+        {"internalType": "bytes32", "name": "blockHash", "type": "bytes32"},
+        {"internalType": "bytes32", "name": "previousBlockHash", "type": "bytes32"},
+        {"internalType": "int256", "name": "targetPrice", "type": "int256"}
+    ],
+    "internalType": "struct ProofOfIntelligence.Block[]",
+    "name": "",
+    "type": "tuple[]"
+}
+
+
+def history_abi(round_struct: Dict) -> List[Dict]:
+    """Range getters; rounds use the PredictionRound struct from the shared contract ABI"""
+    round_tuple = {**round_struct, "internalType": round_struct["internalType"] + "[]", "name": "", "type": "tuple[]"}
+    return [
+        {"inputs": [], "name": "currentBlockNumber", "stateMutability": "view", "type": "function",
+         "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}]},
+        {"inputs": [], "name": "currentPredictionRound", "stateMutability": "view", "type": "function",
+         "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}]},
+        {"inputs": [{"internalType": "uint256", "name": "startBlock", "type": "uint256"},
+                    {"internalType": "uint256", "name": "endBlock", "type": "uint256"}],
+         "name": "getBlocks", "outputs": [BLOCK_TUPLE], "stateMutability": "view", "type": "function"},
+        {"inputs": [{"internalType": "uint256", "name": "startRound", "type": "uint256"},
+                    {"internalType": "uint256", "name": "endRound", "type": "uint256"}],
+         "name": "getPredictionRounds", "outputs": [round_tuple], "stateMutability": "view", "type": "function"},
+    ]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS block_index (
+    block_number INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS round_index (
+    round_id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+"""
+
+
+def block_entry(raw) -> Dict:
+    return {
+        "block_number": raw[0],
+        "timestamp": raw[1],
+        "miner_agent": raw[2],
+        "block_hash": "0x" + bytes(raw[3]).hex(),
+        "previous_block_hash": "0x" + bytes(raw[4]).hex(),
+        "target_price": raw[5],
+    }
+
+
+def round_entry(round_id: int, raw) -> Dict:
+    return {
+        "round_id": round_id,
+        "for_block_number": raw[0],
+        "start_time": raw[1],
+        "submission_deadline": raw[2],
+        "prediction_count": raw[3],
+        "finalized": raw[4],
+        "winner_agent": raw[5],
+        "actual_price": raw[6],
+        "participants": list(raw[7]),
+    }
+
+
+def chunks(ids: List[int], size: int) -> List[Tuple[int, int]]:
+    """Split sorted ids into contiguous (start, end) ranges of at most size entries"""
+    ranges = []
+    for i in ids:
+        if ranges and ranges[-1][1] == i - 1 and i - ranges[-1][0] < size:
+            ranges[-1] = (ranges[-1][0], i)
+        else:
+            ranges.append((i, i))
+    return ranges
+
+
+class HistoryCache:
+    """Content-addressed cache of mined blocks and finalized rounds
+
+    Entries are stored once under the sha256 of their canonical JSON and indexed by block
+    number / round id. Anything at least HISTORY_FINALITY_DEPTH chain blocks old can never
+    change, so it is cached forever; only missing ids are read from chain, in chunked
+    parallel range calls pinned to that depth. Entries newer than that are read live.
+    The database is bound to one contract address and emptied if opened for another.
+    """
+
+    def __init__(self, w3: Web3, contract_address: str, db_path: Path, round_struct: Dict):
+        self.w3 = w3
+        self.contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=history_abi(round_struct))
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._bind_contract(self.contract.address.lower())
+        self.executor = ThreadPoolExecutor(max_workers=HISTORY_FETCH_WORKERS)
+        self.heads: Dict = {}
+        self.heads_checked_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "live": 0, "range_calls": 0}
+
+    def _bind_contract(self, contract_address: str):
+        """Forget entries cached from a different contract (e.g. after a redeploy)"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'contract_address'").fetchone()
+            if row and row[0] == contract_address:
+                return
+            for table in ("objects", "block_index", "round_index"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('contract_address', ?)", (contract_address,)
+            )
+
+    def chain_heads(self) -> Dict:
+        """Contract block / round counters at the chain head and at finality depth"""
+        with self.lock:
+            if self.heads and time.time() - self.heads_checked_at < HISTORY_HEAD_TTL:
+                return self.heads
+        head = self.w3.eth.block_number
+        safe = max(0, head - HISTORY_FINALITY_DEPTH)
+        with self.w3.batch_requests() as batch:
+            batch.add(self.contract.functions.currentBlockNumber().call(block_identifier=head))
+            batch.add(self.contract.functions.currentPredictionRound().call(block_identifier=head))
+            batch.add(self.contract.functions.currentBlockNumber().call(block_identifier=safe))
+            batch.add(self.contract.functions.currentPredictionRound().call(block_identifier=safe))
+            latest_block, latest_round, safe_block, safe_round = batch.execute()
+        heads = {
+            "chain_head": head,
+            "chain_safe": safe,
+            "latest_block": latest_block,
+            "latest_round": latest_round,
+            # The round open at the safe height may still be finalized later
+            "safe_block": safe_block,
+            "safe_round": safe_round,
+        }
+        with self.lock:
+            self.heads = heads
+            self.heads_checked_at = time.time()
+        return heads
+
+    def _load(self, index: str, key: str, start: int, end: int) -> Dict[int, Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT i.{key}, o.body FROM {index} i JOIN objects o ON o.digest = i.digest "
+                f"WHERE i.{key} BETWEEN ? AND ?",
+                (start, end),
+            ).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def _store(self, index: str, entries: List[Tuple[int, Dict]]):
+        objects = []
+        refs = []
+        for key, entry in entries:
+            body = json.dumps(entry, sort_keys=True, separators=(",", ":"))
+            digest = hashlib.sha256(body.encode()).hexdigest()
+            objects.append((digest, body))
+            refs.append((key, digest))
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO objects VALUES (?, ?)", objects)
+            self.conn.executemany(f"INSERT OR REPLACE INTO {index} VALUES (?, ?)", refs)
+
+    def _fetch_ranges(self, fn_name: str, ranges: List[Tuple[int, int]], block_identifier) -> Dict[int, object]:
+        """Read every range in parallel; returns raw entries by id"""
+        fn = getattr(self.contract.functions, fn_name)
+        futures = {
+            start: self.executor.submit(lambda s=start, e=end: fn(s, e).call(block_identifier=block_identifier))
+            for start, end in ranges
+        }
+        self.stats["range_calls"] += len(ranges)
+        raw = {}
+        for start, future in futures.items():
+            for offset, item in enumerate(future.result()):
+                raw[start + offset] = item
+        return raw
+
+    def blocks(self, start: int, end: int) -> List[Dict]:
+        """Mined blocks start..end (inclusive), clamped to what exists"""
+        heads = self.chain_heads()
+        start, end = max(1, start), min(end, heads["latest_block"])
+        if end < start:
+            return []
+
+        cached = self._load("block_index", "block_number", start, end)
+        self.stats["hits"] += len(cached)
+
+        # Mined at the safe height: immutable, fetch once and keep
+        missing = [n for n in range(start, min(end, heads["safe_block"]) + 1) if n not in cached]
+        if missing:
+            self.stats["misses"] += len(missing)
+            fetched = self._fetch_ranges("getBlocks", chunks(missing, HISTORY_CHUNK_SIZE), heads["chain_safe"])
+            entries = [(n, block_entry(raw)) for n, raw in fetched.items()]
+            self._store("block_index", entries)
+            cached.update(entries)
+
+        # Mined since: read live at the head
+        recent_start = max(start, heads["safe_block"] + 1)
+        if recent_start <= end:
+            self.stats["live"] += end - recent_start + 1
+            fetched = self._fetch_ranges(
+                "getBlocks", chunks(list(range(recent_start, end + 1)), HISTORY_CHUNK_SIZE), heads["chain_head"]
+            )
+            cached.update((n, block_entry(raw)) for n, raw in fetched.items())
+
+        return [cached[n] for n in range(start, end + 1) if n in cached]
+
+    def latest_blocks(self, count: int) -> List[Dict]:
+        latest = self.chain_heads()["latest_block"]
+        return self.blocks(latest - count + 1, latest)
+
+    def rounds(self, start: int, end: int) -> List[Dict]:
+        """Prediction rounds start..end (inclusive), clamped to what exists"""
+        heads = self.chain_heads()
+        start, end = max(1, start), min(end, heads["latest_round"])
+        if end < start:
+            return []
+
+        cached = self._load("round_index", "round_id", start, end)
+        self.stats["hits"] += len(cached)
+
+        missing = [r for r in range(start, min(end, heads["safe_round"]) + 1) if r not in cached]
+        if missing:
+            self.stats["misses"] += len(missing)
+            fetched = self._fetch_ranges(
+                "getPredictionRounds", chunks(missing, HISTORY_CHUNK_SIZE), heads["chain_safe"]
+            )
+            entries = [(r, round_entry(r, raw)) for r, raw in fetched.items()]
+            # Only finalized rounds are immutable; the open one is served but not kept
+            self._store("round_index", [(r, e) for r, e in entries if e["finalized"]])
+            cached.update(entries)
+
+        live = [r for r in range(start, end + 1) if r not in cached or not cached[r]["finalized"]]
+        if live:
+            self.stats["live"] += len(live)
+            fetched = self._fetch_ranges(
+                "getPredictionRounds", chunks(live, HISTORY_CHUNK_SIZE), heads["chain_head"]
+            )
+            cached.update((r, round_entry(r, raw)) for r, raw in fetched.items())
+
+        return [cached[r] for r in range(start, end + 1) if r in cached]
+
+    def latest_rounds(self, count: int) -> List[Dict]:
+        latest = self.chain_heads()["latest_round"]
+        return self.rounds(latest - count + 1, latest)
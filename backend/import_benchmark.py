@@ -0,0 +1,86 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+
+BASELINE_FILE = Path(__file__).parent / "import_baseline.json"
+RUNS = 5
+HEADROOM = 1.5  # a module may import this much slower than its baseline before the check fails
+
+# Entry points and the heavy modules they must only load on first use
+MODULES = {
+    "main": ["web3", "eth_account", "indexer", "history_cache", "rpc", "uagents", "gas_ledger", "gas_analytics", "price_ticks", "numpy"],
+    "judging_agent": ["web3", "eth_account", "rpc"],
+}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by a fresh `import module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=Path(__file__).parent, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure(module: str, runs: int = RUNS) -> Dict:
+    """Median import time of module over several cold interpreters, plus its slowest dependencies"""
+    import_times(module)  # populate __pycache__ so compilation isn't measured
+    samples = [import_times(module) for _ in range(runs)]
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1], reverse=True)
+    return {
+        "ms": round(statistics.median(s[module] for s in samples) / 1000, 1),
+        "loaded": set(samples[-1]),
+        "slowest": [(name, round(us / 1000, 1)) for name, us in slowest[1:11]],
+    }
+
+
+def check(baseline: Dict, results: Dict[str, Dict]) -> List[str]:
+    """Regressions against the baseline: too slow, or a deferred module imported eagerly"""
+    failures = []
+    for module, result in results.items():
+        threshold = baseline[module]["threshold_ms"]
+        if result["ms"] > threshold:
+            failures.append(f"{module}: {result['ms']:.0f} ms > {threshold:.0f} ms threshold")
+        for lazy in MODULES[module]:
+            if lazy in result["loaded"]:
+                failures.append(f"{module}: imports {lazy} at import time")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check backend cold-start import time against the checked-in baseline")
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--update", action="store_true", help="Record the measured times as the new baseline")
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.runs) for module in args.modules}
+    for module, result in results.items():
+        print(f"{module}: {result['ms']:.1f} ms")
+        for name, ms in result["slowest"]:
+            print(f"  {ms:>8.1f} ms  {name}")
+
+    if args.update:
+        baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+        for module, result in results.items():
+            baseline[module] = {"ms": result["ms"], "threshold_ms": round(result["ms"] * HEADROOM)}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+        sys.exit(0)
+
+    failures = check(json.loads(BASELINE_FILE.read_text()), results)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,415 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from web3 import Web3
+
+
+logger = logging.getLogger("indexer")
+
+INDEXER_CHUNK_SIZE = 500  # blocks per eth_getLogs call
+INDEXER_POLL_INTERVAL = 1.0  # seconds (Base produces a block every 2s)
+INDEXER_CONFIRMATIONS = 3  # blocks behind head to stay, so head-block reorgs never reach the store
+INDEXER_BACKFILL = 5000  # blocks to look back on first start without a start block
+REORG_DEPTH = 128  # recent block hashes kept for fork detection
+
+# ProofOfIntelligence events (string indexed params only carry their keccak hash in topics)
+EVENTS_ABI = [
+    {"anonymous": False, "name": "PredictionRoundStarted", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": False, "name": "forBlockNumber", "type": "uint256"}]},
+    {"anonymous": False, "name": "PredictionSubmitted", "type": "event", "inputs": [
+        {"indexed": True, "name": "agentAddress", "type": "string"},
+        {"indexed": False, "name": "price", "type": "int256"},
+        {"indexed": False, "name": "roundId", "type": "uint256"}]},
+    {"anonymous": False, "name": "RoundFinalized", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": False, "name": "winner", "type": "string"},
+        {"indexed": False, "name": "actualPrice", "type": "int256"}]},
+    {"anonymous": False, "name": "BlockMined", "type": "event", "inputs": [
+        {"indexed": True, "name": "blockNumber", "type": "uint256"},
+        {"indexed": True, "name": "minerAgent", "type": "string"},
+        {"indexed": False, "name": "blockHash", "type": "bytes32"}]},
+    {"anonymous": False, "name": "HistoryRecorded", "type": "event", "inputs": [
+        {"indexed": True, "name": "agentAddress", "type": "string"},
+        {"indexed": False, "name": "roundId", "type": "uint256"},
+        {"indexed": False, "name": "predicted", "type": "int256"},
+        {"indexed": False, "name": "actual", "type": "int256"},
+        {"indexed": False, "name": "difference", "type": "int256"}]},
+    {"anonymous": False, "name": "RewardsDistributed", "type": "event", "inputs": [
+        {"indexed": True, "name": "roundId", "type": "uint256"},
+        {"indexed": True, "name": "winner", "type": "string"},
+        {"indexed": False, "name": "winnerReward", "type": "uint256"},
+        {"indexed": False, "name": "participantReward", "type": "uint256"}]},
+    # Only used to recover the agent string behind a hashed PredictionSubmitted topic
+    {"inputs": [{"name": "agentAddress", "type": "string"}, {"name": "predictedPrice", "type": "int256"}],
+     "name": "submitPrediction", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen_blocks (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agent_hashes (
+    topic_hash TEXT PRIMARY KEY,
+    agent_address TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    round_id INTEGER PRIMARY KEY,
+    for_block INTEGER NOT NULL,
+    chain_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finalizations (
+    round_id INTEGER PRIMARY KEY,
+    winner TEXT NOT NULL,
+    actual_price INTEGER NOT NULL,
+    chain_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    round_id INTEGER NOT NULL,
+    agent_address TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    chain_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (round_id, agent_address)
+);
+CREATE INDEX IF NOT EXISTS predictions_by_agent ON predictions (agent_address, round_id);
+CREATE TABLE IF NOT EXISTS blocks (
+    block_number INTEGER PRIMARY KEY,
+    miner_agent TEXT NOT NULL,
+    block_hash TEXT NOT NULL,
+    chain_block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    agent_address TEXT NOT NULL,
+    round_id INTEGER NOT NULL,
+    predicted INTEGER NOT NULL,
+    actual INTEGER NOT NULL,
+    difference INTEGER NOT NULL,
+    chain_block INTEGER NOT NULL,
+    PRIMARY KEY (agent_address, round_id)
+);
+CREATE INDEX IF NOT EXISTS history_by_round ON history (round_id);
+CREATE TABLE IF NOT EXISTS rewards (
+    round_id INTEGER PRIMARY KEY,
+    winner TEXT NOT NULL,
+    winner_reward TEXT NOT NULL,
+    participant_reward TEXT NOT NULL,
+    chain_block INTEGER NOT NULL
+);
+"""
+
+# Tables rolled back on reorg (every row records the chain block it came from)
+EVENT_TABLES = ["rounds", "finalizations", "predictions", "blocks", "history", "rewards"]
+# Tables cleared when the store is pointed at a different contract
+CONTRACT_TABLES = EVENT_TABLES + ["cursor", "seen_blocks"]
+
+
+class IndexStore:
+    """SQLite store for one contract's indexed events; one connection guarded by a lock"""
+
+    def __init__(self, path: Path, contract_address: str):
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._bind_contract(contract_address.lower())
+
+    def _bind_contract(self, contract_address: str):
+        """Drop rows indexed from a different contract (e.g. after a redeploy)"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'contract_address'").fetchone()
+            if row and row["value"] == contract_address:
+                return
+            if row:
+                logger.warning(f"Index was built for {row['value']}, resetting for {contract_address}")
+            for table in CONTRACT_TABLES:
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('contract_address', ?)", (contract_address,)
+            )
+
+    def query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def cursor(self) -> Optional[Dict]:
+        rows = self.query("SELECT block_number, block_hash FROM cursor WHERE id = 1")
+        return rows[0] if rows else None
+
+    def recent_hashes(self) -> List[Dict]:
+        return self.query("SELECT block_number, block_hash FROM seen_blocks ORDER BY block_number DESC")
+
+    def agent_for_hash(self, topic_hash: str) -> Optional[str]:
+        rows = self.query("SELECT agent_address FROM agent_hashes WHERE topic_hash = ?", (topic_hash,))
+        return rows[0]["agent_address"] if rows else None
+
+    def rollback(self, block_number: int):
+        """Drop everything indexed after block_number"""
+        with self.lock, self.conn:
+            for table in EVENT_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE chain_block > ?", (block_number,))
+            self.conn.execute("DELETE FROM seen_blocks WHERE block_number > ?", (block_number,))
+            row = self.conn.execute(
+                "SELECT block_hash FROM seen_blocks WHERE block_number = ?", (block_number,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursor (id, block_number, block_hash) VALUES (1, ?, ?)",
+                (block_number, row["block_hash"] if row else ""),
+            )
+
+    def commit_range(self, rows: Dict[str, List[tuple]], agent_hashes: Dict[str, str],
+                     seen: Dict[int, str], cursor_block: int, cursor_hash: str):
+        """Write one indexed range atomically and advance the cursor"""
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO agent_hashes VALUES (?, ?)", agent_hashes.items())
+            self.conn.executemany("INSERT OR REPLACE INTO rounds VALUES (?, ?, ?, ?)", rows["rounds"])
+            self.conn.executemany("INSERT OR REPLACE INTO finalizations VALUES (?, ?, ?, ?, ?)", rows["finalizations"])
+            self.conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)", rows["predictions"])
+            self.conn.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?)", rows["blocks"])
+            self.conn.executemany("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?)", rows["history"])
+            self.conn.executemany("INSERT OR REPLACE INTO rewards VALUES (?, ?, ?, ?, ?)", rows["rewards"])
+            self.conn.executemany("INSERT OR REPLACE INTO seen_blocks VALUES (?, ?)", seen.items())
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursor (id, block_number, block_hash) VALUES (1, ?, ?)",
+                (cursor_block, cursor_hash),
+            )
+            self.conn.execute(
+                "DELETE FROM seen_blocks WHERE block_number < (SELECT MAX(block_number) FROM seen_blocks) - ?",
+                (REORG_DEPTH,),
+            )
+
+
+class ChainIndexer:
+    """Tails ProofOfIntelligence logs into an IndexStore, rolling back on reorgs"""
+
+    def __init__(self, w3: Web3, contract_address: str, db_path: Path, start_block: Optional[int] = None):
+        self.w3 = w3
+        self.contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=EVENTS_ABI)
+        self.store = IndexStore(db_path, self.contract.address)
+        self.start_block = start_block
+        self.head: Optional[int] = None
+        self.listeners: List[Callable[[str, Dict], None]] = []
+        self.events = {
+            Web3.keccak(text=f"{e['name']}({','.join(i['type'] for i in e['inputs'])})").to_0x_hex(): e["name"]
+            for e in EVENTS_ABI if e["type"] == "event"
+        }
+
+    def subscribe(self, listener: Callable[[str, Dict], None]):
+        """Call listener(event_name, payload) for every newly indexed event, and ('Rollback', {...}) on reorgs"""
+        self.listeners.append(listener)
+
+    def _notify(self, name: str, payload: Dict):
+        for listener in self.listeners:
+            try:
+                listener(name, payload)
+            except Exception as e:
+                logger.error(f"Indexer listener failed on {name}: {e}")
+
+    def _check_reorg(self) -> Optional[int]:
+        """Return the last block still on the canonical chain if our cursor was reorged out"""
+        cursor = self.store.cursor()
+        if not cursor or not cursor["block_hash"]:
+            return None
+        if self.w3.eth.get_block(cursor["block_number"])["hash"].to_0x_hex() == cursor["block_hash"]:
+            return None
+
+        for seen in self.store.recent_hashes():
+            if self.w3.eth.get_block(seen["block_number"])["hash"].to_0x_hex() == seen["block_hash"]:
+                return seen["block_number"]
+        # Deeper than we track: re-index the whole tracked window
+        hashes = self.store.recent_hashes()
+        return (hashes[-1]["block_number"] - 1) if hashes else cursor["block_number"] - REORG_DEPTH
+
+    def _resolve_agent(self, topic_hash: str, tx_hash: str, known: Dict[str, str]) -> str:
+        """Map a hashed string topic back to the agent address"""
+        agent = known.get(topic_hash) or self.store.agent_for_hash(topic_hash)
+        if agent:
+            return agent
+        try:
+            tx = self.w3.eth.get_transaction(tx_hash)
+            _, args = self.contract.decode_function_input(tx["input"])
+            agent = args["agentAddress"]
+            if Web3.keccak(text=agent).to_0x_hex() == topic_hash:
+                known[topic_hash] = agent
+                return agent
+        except Exception as e:
+            logger.warning(f"Could not decode agent for topic {topic_hash}: {e}")
+        return topic_hash
+
+    def sync_once(self) -> int:
+        """Index up to the current head; returns the number of events indexed"""
+        fork_point = self._check_reorg()
+        if fork_point is not None:
+            logger.warning(f"Reorg detected - rolling back to block {fork_point}")
+            self.store.rollback(fork_point)
+            self._notify("Rollback", {"block_number": fork_point})
+
+        self.head = self.w3.eth.block_number
+        target = self.head - INDEXER_CONFIRMATIONS
+        cursor = self.store.cursor()
+        if cursor:
+            next_block = cursor["block_number"] + 1
+        elif self.start_block is not None:
+            next_block = self.start_block
+        else:
+            next_block = max(0, target - INDEXER_BACKFILL)
+
+        indexed = 0
+        while next_block <= target:
+            end = min(target, next_block + INDEXER_CHUNK_SIZE - 1)
+            indexed += self._index_range(next_block, end)
+            next_block = end + 1
+        return indexed
+
+    def _index_range(self, start: int, end: int) -> int:
+        logs = self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": start,
+            "toBlock": end,
+            "topics": [list(self.events)],
+        })
+
+        rows = {table: [] for table in EVENT_TABLES}
+        agent_hashes: Dict[str, str] = {}
+        seen: Dict[int, str] = {}
+        notifications = []
+
+        for log in logs:
+            name = self.events[log["topics"][0].to_0x_hex()]
+            args = getattr(self.contract.events, name)().process_log(log)["args"]
+            block = log["blockNumber"]
+            tx_hash = log["transactionHash"].to_0x_hex()
+            seen[block] = log["blockHash"].to_0x_hex()
+
+            if name == "PredictionRoundStarted":
+                rows["rounds"].append((args["roundId"], args["forBlockNumber"], block, tx_hash))
+                payload = {"round_id": args["roundId"], "for_block": args["forBlockNumber"]}
+            elif name == "PredictionSubmitted":
+                topic = log["topics"][1].to_0x_hex()
+                agent = self._resolve_agent(topic, tx_hash, agent_hashes)
+                rows["predictions"].append((args["roundId"], agent, args["price"], block, tx_hash, log["logIndex"]))
+                payload = {"round_id": args["roundId"], "agent_address": agent, "price": args["price"]}
+            elif name == "RoundFinalized":
+                if args["winner"]:
+                    agent_hashes[Web3.keccak(text=args["winner"]).to_0x_hex()] = args["winner"]
+                rows["finalizations"].append((args["roundId"], args["winner"], args["actualPrice"], block, tx_hash))
+                payload = {"round_id": args["roundId"], "winner": args["winner"], "actual_price": args["actualPrice"]}
+            elif name == "BlockMined":
+                topic = log["topics"][2].to_0x_hex()
+                miner = self._resolve_agent(topic, tx_hash, agent_hashes)
+                mined_hash = "0x" + bytes(args["blockHash"]).hex()
+                rows["blocks"].append((args["blockNumber"], miner, mined_hash, block, tx_hash))
+                payload = {"block_number": args["blockNumber"], "miner_agent": miner, "block_hash": mined_hash}
+            elif name == "HistoryRecorded":
+                topic = log["topics"][1].to_0x_hex()
+                agent = self._resolve_agent(topic, tx_hash, agent_hashes)
+                rows["history"].append((agent, args["roundId"], args["predicted"], args["actual"],
+                                        args["difference"], block))
+                payload = {"agent_address": agent, "round_id": args["roundId"], "predicted": args["predicted"],
+                           "actual": args["actual"], "difference": args["difference"]}
+            else:  # RewardsDistributed
+                topic = log["topics"][2].to_0x_hex()
+                winner = self._resolve_agent(topic, tx_hash, agent_hashes)
+                rows["rewards"].append((args["roundId"], winner, str(args["winnerReward"]),
+                                        str(args["participantReward"]), block))
+                payload = {"round_id": args["roundId"], "winner": winner}
+
+            payload["chain_block"] = block
+            payload["tx_hash"] = tx_hash
+            notifications.append((name, payload))
+
+        # Remember the range end so the next pass can detect a fork at the cursor
+        end_hash = self.w3.eth.get_block(end)["hash"].to_0x_hex()
+        seen[end] = end_hash
+        self.store.commit_range(rows, agent_hashes, seen, end, end_hash)
+
+        for name, payload in notifications:
+            self._notify(name, payload)
+        return len(logs)
+
+    async def run(self):
+        """Background loop: keep the store in sync with the chain"""
+        while True:
+            try:
+                indexed = await asyncio.to_thread(self.sync_once)
+                if indexed:
+                    logger.info(f"Indexed {indexed} events up to block {self.head}")
+            except Exception as e:
+                logger.error(f"Indexer sync failed: {e}")
+            await asyncio.sleep(INDEXER_POLL_INTERVAL)
+
+    # Queries
+
+    def status(self) -> Dict:
+        cursor = self.store.cursor()
+        return {
+            "cursor_block": cursor["block_number"] if cursor else None,
+            "head_block": self.head,
+            "lag": (self.head - cursor["block_number"]) if cursor and self.head is not None else None,
+        }
+
+    def rounds(self, limit: int = 50, before: Optional[int] = None) -> List[Dict]:
+        rows = self.store.query(
+            """SELECT r.round_id, r.for_block, r.chain_block AS started_block,
+                      f.winner, f.actual_price, f.chain_block AS finalized_block,
+                      f.round_id IS NOT NULL AS finalized,
+                      (SELECT COUNT(*) FROM predictions p WHERE p.round_id = r.round_id) AS prediction_count
+               FROM rounds r LEFT JOIN finalizations f ON f.round_id = r.round_id
+               WHERE r.round_id < ? ORDER BY r.round_id DESC LIMIT ?""",
+            (before if before is not None else 2 ** 62, limit),
+        )
+        for row in rows:
+            row["finalized"] = bool(row["finalized"])
+        return rows
+
+    def round(self, round_id: int) -> Optional[Dict]:
+        rounds = self.rounds(limit=1, before=round_id + 1)
+        if not rounds or rounds[0]["round_id"] != round_id:
+            return None
+        result = rounds[0]
+        result["predictions"] = self.predictions(round_id)
+        return result
+
+    def predictions(self, round_id: int) -> List[Dict]:
+        return self.store.query(
+            """SELECT p.agent_address, p.price, p.chain_block, p.tx_hash, h.difference
+               FROM predictions p LEFT JOIN history h
+                 ON h.round_id = p.round_id AND h.agent_address = p.agent_address
+               WHERE p.round_id = ? ORDER BY p.chain_block, p.log_index""",
+            (round_id,),
+        )
+
+    def agent_predictions(self, agent_address: str, limit: int = 50) -> List[Dict]:
+        return self.store.query(
+            """SELECT p.round_id, p.price, p.chain_block, p.tx_hash, h.actual, h.difference
+               FROM predictions p LEFT JOIN history h
+                 ON h.round_id = p.round_id AND h.agent_address = p.agent_address
+               WHERE p.agent_address = ? ORDER BY p.round_id DESC LIMIT ?""",
+            (agent_address, limit),
+        )
+
+    def blocks(self, limit: int = 50, before: Optional[int] = None) -> List[Dict]:
+        return self.store.query(
+            """SELECT block_number, miner_agent, block_hash, chain_block, tx_hash FROM blocks
+               WHERE block_number < ? ORDER BY block_number DESC LIMIT ?""",
+            (before if before is not None else 2 ** 62, limit),
+        )
@@ -1,7 +1,10 @@
+import asyncio
 from datetime import datetime
+import functools
 import httpx
 import json
-from web3 import Web3
+import os
+import threading
 from uagents import Context, Agent, Protocol
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
@@ -14,15 +17,33 @@ from uuid import uuid4
 
 # Smart Contract Configuration
 RPC_URL = "https://base-sepolia.g.alchemy.com/v2/FTdaypPQy2TZuLJhehmqRullM2x0dJPJ"  # Sepolia testnet
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", RPC_URL).split(",") if url.strip()]  # fallbacks / hedges
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "25"))  # requests/s this process may send upstream
 POI_TOKEN_ADDRESS = "0x5ef3c7bdddbe1dcef0bc697e04614fe3d1f46736"
 CONTRACT_ADDRESS = "0x254697169376c0a51b48afc117010493316fc28a"
 PYTH_CONTRACT_ADDRESS = "0xA2aa501b19aff244D90cc15a4Cf739D2725B5729"  # Pyth contract on Sepolia
 PRIVATE_KEY = ''
 PYTH_PRICE_FEED_ID = "0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace"
 CHAIN_ID = 84532  # Sepolia testnet
+HERMES_URL = "https://hermes.pyth.network"
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Round finalization: "direct" runs finalizeRoundAndMineBlock (winner computed on-chain, gas
+# grows with every participant), "optimistic" claims the off-chain winner and settles it
+# after the challenge window (constant gas), "auto" goes optimistic for large rounds
+FINALIZE_MODE = os.getenv("FINALIZE_MODE", "auto")
+OPTIMISTIC_MIN_PARTICIPANTS = 16  # auto mode: rounds this large are claimed optimistically
+CHALLENGE_WINDOW = 60  # seconds, must match ProofOfIntelligence.CHALLENGE_WINDOW
+RESULTS_BATCH_SIZE = 20  # participants recorded per recordRoundResults transaction
+ROUND_LOG_LOOKBACK = 10000  # blocks searched for a round's start when the judge didn't start it
+
+# Chain clients are built on first use (see get_w3 / get_contract below) so the agent
+# starts without waiting on the web3 import
+w3 = None
+rpc_cache = None
+receipts = None
+contract = None
+pyth_contract = None
+clients_lock = threading.RLock()
 
 # ProofOfIntelligence contract ABI
 contract_abi = [
@@ -42,6 +63,86 @@ contract_abi = [
         "stateMutability": "nonpayable",
         "type": "function"
     },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "priceFeedId", "type": "bytes32"},
+            {"internalType": "uint256", "name": "winnerIndex", "type": "uint256"}
+        ],
+        "name": "claimRoundWinner",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "roundId", "type": "uint256"},
+            {"internalType": "uint256", "name": "betterIndex", "type": "uint256"}
+        ],
+        "name": "challengeRoundWinner",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256", "name": "roundId", "type": "uint256"}],
+        "name": "settleRound",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "roundId", "type": "uint256"},
+            {"internalType": "uint256", "name": "maxCount", "type": "uint256"}
+        ],
+        "name": "recordRoundResults",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "name": "roundClaims",
+        "outputs": [
+            {"internalType": "uint256", "name": "winnerIndex", "type": "uint256"},
+            {"internalType": "uint256", "name": "claimedAt", "type": "uint256"},
+            {"internalType": "address", "name": "claimer", "type": "address"},
+            {"internalType": "uint256", "name": "resultsRecorded", "type": "uint256"},
+            {"internalType": "bool", "name": "settled", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "priceFeed", "type": "bytes32"}],
+        "name": "readPythPrice",
+        "outputs": [
+            {"internalType": "int256", "name": "", "type": "int256"},
+            {"internalType": "uint256", "name": "", "type": "uint256"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256", "name": "roundId", "type": "uint256"}],
+        "name": "getRoundPredictions",
+        "outputs": [
+            {"internalType": "string[]", "name": "", "type": "string[]"},
+            {
+                "components": [
+                    {"internalType": "string", "name": "agentAddress", "type": "string"},
+                    {"internalType": "int256", "name": "predictedPrice", "type": "int256"},
+                    {"internalType": "uint256", "name": "timestamp", "type": "uint256"},
+                    {"internalType": "bool", "name": "submitted", "type": "bool"}
+                ],
+                "internalType": "struct ProofOfIntelligence.Prediction[]",
+                "name": "",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
     {
         "inputs": [],
         "name": "getCurrentMempoolCount",
@@ -98,8 +199,69 @@ pyth_abi = [
     }
 ]
 
-contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=contract_abi)
-pyth_contract = w3.eth.contract(address=Web3.to_checksum_address(PYTH_CONTRACT_ADDRESS), abi=pyth_abi)
+
+
+def get_w3():
+    """Web3 on the judge's RPC pool, with its read cache and receipt tracker (created on first use)"""
+    global w3, rpc_cache, receipts
+    with clients_lock:
+        if w3 is None:
+            from web3 import Web3
+            from rpc import ReceiptTracker, RpcPool, RpcScheduler, enable_block_cache
+
+            # Round start / finalize run as "consensus" and overtake the judge's other reads
+            client = Web3(RpcPool(RPC_URLS, scheduler=RpcScheduler(RPC_RATE_LIMIT), default_priority="judge"))
+            rpc_cache = enable_block_cache(client)
+            receipts = ReceiptTracker(client, priority="consensus")
+            w3 = client
+    return w3
+
+
+def get_receipts():
+    """Receipt tracker on the judge's RPC pool"""
+    get_w3()
+    return receipts
+
+
+def describe_receipt(receipt) -> str:
+    """Outcome of a tracked transaction (the tracker passes None when it expired unmined)"""
+    if receipt is None:
+        return "expired unmined"
+    return f"mined in block {receipt['blockNumber']} ({'success' if receipt['status'] == 1 else 'FAILED'}, gas used {receipt['gasUsed']})"
+
+
+def get_contract():
+    """ProofOfIntelligence contract (created on first use)"""
+    global contract
+    with clients_lock:
+        if contract is None:
+            from web3 import Web3
+
+            contract = get_w3().eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=contract_abi)
+    return contract
+
+
+def get_pyth_contract():
+    """Pyth contract (created on first use)"""
+    global pyth_contract
+    with clients_lock:
+        if pyth_contract is None:
+            from web3 import Web3
+
+            pyth_contract = get_w3().eth.contract(address=Web3.to_checksum_address(PYTH_CONTRACT_ADDRESS), abi=pyth_abi)
+    return pyth_contract
+
+
+def consensus_priority(fn):
+    """Send fn's RPC traffic at "consensus" priority"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        from rpc import rpc_priority
+
+        with rpc_priority("consensus"):
+            return fn(*args, **kwargs)
+    return wrapper
+
 
 agent = Agent(name='JudgingAgent', seed='poi_judge_v1')
 protocol = Protocol(spec=chat_protocol_spec)
@@ -117,7 +279,7 @@ MAX_EMPTY_ROUND_DELAY = 120  # max 2 minutes delay
 def fetch_pyth_price_update():
     """Fetch Pyth price update from Hermes API"""
     try:
-        url = f"https://hermes.pyth.network/v2/updates/price/latest?ids[]={PYTH_PRICE_FEED_ID}"
+        url = f"{HERMES_URL}/v2/updates/price/latest?ids[]={PYTH_PRICE_FEED_ID}"
         response = httpx.get(url, timeout=10.0)
         data = response.json()
         
@@ -134,7 +296,7 @@ def fetch_pyth_price_update():
 def has_valid_mempool_transactions(ctx):
     """Check if there are actual mempool transactions available"""
     try:
-        mempool_count = contract.functions.getCurrentMempoolCount().call()
+        mempool_count = get_contract().functions.getCurrentMempoolCount().call()
         
         # mempool_count is a count (0 = none, 1 = one tx at index 0, etc.)
         if mempool_count == 0:
@@ -161,9 +323,9 @@ def should_start_new_round(ctx):
     
     # Check if previous round had predictions
     try:
-        current_round_id = contract.functions.currentPredictionRound().call()
+        current_round_id = get_contract().functions.currentPredictionRound().call()
         if current_round_id > 0:
-            prev_round = contract.functions.predictionRounds(current_round_id).call()
+            prev_round = get_contract().functions.predictionRounds(current_round_id).call()
             prev_prediction_count = prev_round[3]
             
             if prev_prediction_count == 0:
@@ -204,12 +366,12 @@ def should_start_new_round(ctx):
 def get_current_round_info(ctx):
     """Get current round information from contract"""
     try:
-        round_id = contract.functions.currentPredictionRound().call()
+        round_id = get_contract().functions.currentPredictionRound().call()
         
         if round_id == 0:
             return None
             
-        round_data = contract.functions.predictionRounds(round_id).call()
+        round_data = get_contract().functions.predictionRounds(round_id).call()
         
         return {
             "round_id": round_id,
@@ -226,6 +388,7 @@ def get_current_round_info(ctx):
         return None
 
 
+@consensus_priority
 def start_new_round(ctx):
     """Start a new prediction round (mempool txs are reusable!)"""
     try:
@@ -233,36 +396,39 @@ def start_new_round(ctx):
             ctx.logger.error("ERROR: No private key configured")
             return None
         
-        mempool_count = contract.functions.getCurrentMempoolCount().call()
+        mempool_count = get_contract().functions.getCurrentMempoolCount().call()
         ctx.logger.info(f"Starting round with mempool (counter: {mempool_count})")
         ctx.logger.info(f"Mempool transactions carry over - efficient reuse!")
         
         # Prepare account
-        account = w3.eth.account.from_key(PRIVATE_KEY)
+        account = get_w3().eth.account.from_key(PRIVATE_KEY)
         
         # Build transaction
         ctx.logger.info("Building startNewRound transaction...")
-        transaction = contract.functions.startNewRound().build_transaction({
+        transaction = get_contract().functions.startNewRound().build_transaction({
             'from': account.address,
-            'nonce': w3.eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to include pending txs
+            'nonce': get_w3().eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to include pending txs
             'gas': 500000,
-            'gasPrice': w3.eth.gas_price,
+            'gasPrice': get_w3().eth.gas_price,
             'chainId': CHAIN_ID
         })
         
         # Sign and send
         ctx.logger.info("Signing transaction...")
         signed_txn = account.sign_transaction(transaction)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        tx_hash = get_w3().eth.send_raw_transaction(signed_txn.raw_transaction)
         
         ctx.logger.info(f"New round started! TX: {tx_hash.hex()}")
         
         # Wait for confirmation to avoid nonce issues
         ctx.logger.info("Waiting for confirmation...")
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+        receipt = get_receipts().wait(tx_hash, timeout=60)
         
         if receipt['status'] == 1:
             ctx.logger.info(f"Round start confirmed! Block: {receipt['blockNumber']}")
+            if rpc_cache:
+                cache_stats = rpc_cache.stats()
+                ctx.logger.info(f"RPC read cache: {cache_stats['hit_rate']:.0%} hit rate ({cache_stats['hits']} hits)")
         else:
             ctx.logger.error("ERROR: Round start transaction failed")
             return None
@@ -284,6 +450,57 @@ def start_new_round(ctx):
         return None
 
 
+def update_pyth_price(ctx, account):
+    """Fetch a signed price update from Hermes and push it to the Pyth contract; True once mined"""
+    # STEP 1: Fetch Pyth price update from Hermes
+    ctx.logger.info("Step 1: Fetching fresh Pyth price data from Hermes...")
+    price_update = fetch_pyth_price_update()
+    
+    if not price_update:
+        ctx.logger.error("ERROR: Failed to fetch Pyth price update")
+        return False
+    
+    ctx.logger.info(f"Got price update: {len(price_update)} bytes")
+    
+    # STEP 2: Update Pyth contract on-chain
+    ctx.logger.info("Step 2: Updating Pyth contract on-chain...")
+    
+    update_data = [price_update]
+    
+    # Get Pyth update fee
+    pyth_fee = get_pyth_contract().functions.getUpdateFee(update_data).call()
+    ctx.logger.info(f"Pyth fee: {pyth_fee} wei ({get_w3().from_wei(pyth_fee, 'ether')} ETH)")
+    
+    # Build Pyth update transaction
+    pyth_transaction = get_pyth_contract().functions.updatePriceFeeds(update_data).build_transaction({
+        'from': account.address,
+        'nonce': get_w3().eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to include pending txs
+        'gas': 500000,
+        'gasPrice': get_w3().eth.gas_price,
+        'chainId': CHAIN_ID,
+        'value': pyth_fee
+    })
+    
+    # Sign and send Pyth update
+    ctx.logger.info("Signing Pyth update transaction...")
+    signed_pyth_txn = account.sign_transaction(pyth_transaction)
+    pyth_tx_hash = get_w3().eth.send_raw_transaction(signed_pyth_txn.raw_transaction)
+    
+    ctx.logger.info(f"Pyth update sent: {pyth_tx_hash.hex()}")
+    ctx.logger.info("Waiting for Pyth update confirmation...")
+    
+    # Wait for Pyth update to be mined
+    pyth_receipt = get_receipts().wait(pyth_tx_hash, timeout=120)
+    
+    if pyth_receipt['status'] != 1:
+        ctx.logger.error("ERROR: Pyth update transaction failed!")
+        return False
+    
+    ctx.logger.info("Pyth price updated on-chain!")
+    return True
+
+
+@consensus_priority
 def finalize_round(ctx):
     """Finalize the current prediction round and mine block (2-step process like test-contract.mjs)"""
     try:
@@ -292,55 +509,13 @@ def finalize_round(ctx):
             return None
         
         # Prepare account
-        account = w3.eth.account.from_key(PRIVATE_KEY)
+        account = get_w3().eth.account.from_key(PRIVATE_KEY)
         ctx.logger.info(f"Judge Account: {account.address}")
         
-        # STEP 1: Fetch Pyth price update from Hermes
-        ctx.logger.info("Step 1: Fetching fresh Pyth price data from Hermes...")
-        price_update = fetch_pyth_price_update()
-        
-        if not price_update:
-            ctx.logger.error("ERROR: Failed to fetch Pyth price update")
+        # STEPS 1-2: Push a fresh Pyth price on-chain
+        if not update_pyth_price(ctx, account):
             return None
         
-        ctx.logger.info(f"Got price update: {len(price_update)} bytes")
-        
-        # STEP 2: Update Pyth contract on-chain
-        ctx.logger.info("Step 2: Updating Pyth contract on-chain...")
-        
-        update_data = [price_update]
-        
-        # Get Pyth update fee
-        pyth_fee = pyth_contract.functions.getUpdateFee(update_data).call()
-        ctx.logger.info(f"Pyth fee: {pyth_fee} wei ({w3.from_wei(pyth_fee, 'ether')} ETH)")
-        
-        # Build Pyth update transaction
-        pyth_transaction = pyth_contract.functions.updatePriceFeeds(update_data).build_transaction({
-            'from': account.address,
-            'nonce': w3.eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to include pending txs
-            'gas': 500000,
-            'gasPrice': w3.eth.gas_price,
-            'chainId': CHAIN_ID,
-            'value': pyth_fee
-        })
-        
-        # Sign and send Pyth update
-        ctx.logger.info("Signing Pyth update transaction...")
-        signed_pyth_txn = account.sign_transaction(pyth_transaction)
-        pyth_tx_hash = w3.eth.send_raw_transaction(signed_pyth_txn.rawTransaction)
-        
-        ctx.logger.info(f"Pyth update sent: {pyth_tx_hash.hex()}")
-        ctx.logger.info("Waiting for Pyth update confirmation...")
-        
-        # Wait for Pyth update to be mined
-        pyth_receipt = w3.eth.wait_for_transaction_receipt(pyth_tx_hash, timeout=120)
-        
-        if pyth_receipt['status'] != 1:
-            ctx.logger.error("ERROR: Pyth update transaction failed!")
-            return None
-        
-        ctx.logger.info("Pyth price updated on-chain!")
-        
         # STEP 3: Finalize round (contract will read on-chain price)
         ctx.logger.info("Step 3: Finalizing round (contract reads on-chain price)...")
         
@@ -356,28 +531,30 @@ def finalize_round(ctx):
         
         ctx.logger.info(f"Using gas limit: {gas_limit} for {participant_count} participants (includes Pyth overhead)")
         
-        # Convert price feed ID to bytes32
-        price_feed_bytes32 = bytes.fromhex(PYTH_PRICE_FEED_ID[2:] if PYTH_PRICE_FEED_ID.startswith('0x') else PYTH_PRICE_FEED_ID)
+        price_feed_bytes32 = price_feed_id_bytes()
         
         # Build finalization transaction with dynamic gas
         # Use 'pending' nonce since we just sent Pyth update
-        transaction = contract.functions.finalizeRoundAndMineBlock(
+        transaction = get_contract().functions.finalizeRoundAndMineBlock(
             price_feed_bytes32
         ).build_transaction({
             'from': account.address,
-            'nonce': w3.eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to get correct nonce after Pyth update
+            'nonce': get_w3().eth.get_transaction_count(account.address, 'pending'),  # Use 'pending' to get correct nonce after Pyth update
             'gas': gas_limit,  # Dynamic gas based on participants
-            'gasPrice': w3.eth.gas_price,
+            'gasPrice': get_w3().eth.gas_price,
             'chainId': CHAIN_ID
         })
         
         # Sign and send
         ctx.logger.info("Signing finalization transaction...")
         signed_txn = account.sign_transaction(transaction)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        tx_hash = get_w3().eth.send_raw_transaction(signed_txn.raw_transaction)
         
         ctx.logger.info(f"Round finalized! TX: {tx_hash.hex()}")
         ctx.logger.info(f"View: https://sepolia-explorer.base.org/tx/{tx_hash.hex()}")
+        get_receipts().track(tx_hash, callback=lambda receipt: ctx.logger.info(
+            f"Finalization {describe_receipt(receipt)}"
+        ))
         
         return tx_hash.hex()
         
@@ -388,6 +565,278 @@ def finalize_round(ctx):
         return None
 
 
+# ===== OPTIMISTIC FINALIZATION =====
+#
+# For large rounds the judge finds the winner off-chain from the round's PredictionSubmitted
+# logs (their order is the order of round.participants) and only claims its index. The
+# contract checks nothing but index bounds; instead the judge (or anyone) can challenge a
+# claim with a closer prediction until the window closes, then settleRound mines the block.
+# claimRoundWinner is permissionless, so claimed rounds are checked and settled in every
+# FINALIZE_MODE. What is pending always comes from the contract (the claim's winner and
+# resultsRecorded); the judge only remembers which of its transactions are still unmined,
+# so a failed or dropped challenge or result batch is sent again on a later check.
+
+# Off-chain winner per claimed round (round_id -> index), unmined challenges (round_id -> tx
+# hash), unmined result batches per round, and settled rounds that may still need results
+verified_claims = {}
+challenges_pending = {}
+results_pending = {}
+results_lock = threading.Lock()  # receipt callbacks update results_pending from the tracker thread
+results_due = set()
+last_round_seen = None
+round_start_blocks = {}
+
+
+def price_feed_id_bytes():
+    """PYTH_PRICE_FEED_ID as bytes32"""
+    return bytes.fromhex(PYTH_PRICE_FEED_ID[2:] if PYTH_PRICE_FEED_ID.startswith('0x') else PYTH_PRICE_FEED_ID)
+
+
+def use_optimistic(prediction_count):
+    if FINALIZE_MODE == "direct" or prediction_count == 0:
+        return False
+    return FINALIZE_MODE == "optimistic" or prediction_count >= OPTIMISTIC_MIN_PARTICIPANTS
+
+
+def send_judge_transaction(account, call, gas, nonce=None):
+    """Sign and send a contract call from the judge account, returns the tx hash"""
+    transaction = call.build_transaction({
+        'from': account.address,
+        'nonce': nonce if nonce is not None else get_w3().eth.get_transaction_count(account.address, 'pending'),
+        'gas': gas,
+        'gasPrice': get_w3().eth.gas_price,
+        'chainId': CHAIN_ID
+    })
+    signed_txn = account.sign_transaction(transaction)
+    return get_w3().eth.send_raw_transaction(signed_txn.raw_transaction)
+
+
+def get_round_claim(ctx, round_id):
+    """The round's optimistic claim, or None if it has none"""
+    try:
+        winner_index, claimed_at, claimer, results_recorded, settled = get_contract().functions.roundClaims(round_id).call()
+    except Exception as e:
+        ctx.logger.error(f"Error fetching round claim: {e}")
+        return None
+    if not claimed_at:
+        return None
+    return {
+        "winner_index": winner_index,
+        "claimed_at": claimed_at,
+        "claimer": claimer,
+        "results_recorded": results_recorded,
+        "settled": settled
+    }
+
+
+def find_round_start_block(round_id):
+    """Block of the round's PredictionRoundStarted event (searched once per round)"""
+    if round_id not in round_start_blocks:
+        from web3 import Web3
+
+        head = get_w3().eth.block_number
+        logs = get_w3().eth.get_logs({
+            "address": get_contract().address,
+            "fromBlock": max(0, head - ROUND_LOG_LOOKBACK),
+            "toBlock": head,
+            "topics": [
+                Web3.keccak(text="PredictionRoundStarted(uint256,uint256)").to_0x_hex(),
+                "0x" + round_id.to_bytes(32, "big").hex()
+            ]
+        })
+        if not logs:
+            return None
+        round_start_blocks[round_id] = logs[0]["blockNumber"]
+    return round_start_blocks[round_id]
+
+
+def round_prediction_prices(ctx, round_id, prediction_count):
+    """Every prediction of the round in round.participants order"""
+    from web3 import Web3
+
+    start_block = find_round_start_block(round_id)
+    if start_block is not None:
+        logs = get_w3().eth.get_logs({
+            "address": get_contract().address,
+            "fromBlock": start_block,
+            "toBlock": "latest",
+            "topics": [Web3.keccak(text="PredictionSubmitted(string,int256,uint256)").to_0x_hex()]
+        })
+        prices = []
+        for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+            data = bytes(log["data"])
+            if int.from_bytes(data[32:64], "big") == round_id:
+                prices.append(int.from_bytes(data[:32], "big", signed=True))
+        if len(prices) == prediction_count:
+            return prices
+        ctx.logger.warning(f"Found {len(prices)} of {prediction_count} PredictionSubmitted logs - reading the round instead")
+    _, predictions = get_contract().functions.getRoundPredictions(round_id).call()
+    return [prediction[1] for prediction in predictions]
+
+
+def best_prediction_index(prices, actual_price):
+    """Index of the closest prediction; ties go to the earliest, as in _determineWinner"""
+    return min(range(len(prices)), key=lambda i: (abs(prices[i] - actual_price), i))
+
+
+@consensus_priority
+def claim_round(ctx, round_info):
+    """Optimistic finalization: push the price, compute the winner off-chain and claim it"""
+    try:
+        if not PRIVATE_KEY:
+            ctx.logger.error("ERROR: No private key configured")
+            return None
+        
+        account = get_w3().eth.account.from_key(PRIVATE_KEY)
+        if not update_pyth_price(ctx, account):
+            return None
+        if rpc_cache:
+            rpc_cache.expire_head()  # read the price from the block with our update
+        
+        round_id = round_info['round_id']
+        actual_price, _ = get_contract().functions.readPythPrice(price_feed_id_bytes()).call()
+        prices = round_prediction_prices(ctx, round_id, round_info['prediction_count'])
+        winner_index = best_prediction_index(prices, actual_price)
+        ctx.logger.info(
+            f"Step 3: Claiming participant #{winner_index} of {len(prices)} "
+            f"(off by {abs(prices[winner_index] - actual_price) / 1e8:.8f})"
+        )
+        
+        # Constant gas: Pyth read (~2M) plus a handful of storage writes, whatever the round size
+        tx_hash = send_judge_transaction(
+            account, get_contract().functions.claimRoundWinner(price_feed_id_bytes(), winner_index), 3000000
+        )
+        receipt = get_receipts().wait(tx_hash, timeout=120)
+        if receipt['status'] != 1:
+            ctx.logger.error("ERROR: Claim transaction failed")
+            return None
+        
+        ctx.logger.info(f"Round #{round_id} claimed (gas used {receipt['gasUsed']}), challenge window {CHALLENGE_WINDOW}s")
+        return tx_hash.hex()
+        
+    except Exception as e:
+        ctx.logger.error(f"ERROR: Error claiming round: {e}")
+        import traceback
+        ctx.logger.error(traceback.format_exc())
+        return None
+
+
+@consensus_priority
+def settle_round(ctx, round_info, claim):
+    """Check a claimed winner while the challenge window is open (challenging if wrong), settle after"""
+    try:
+        if not PRIVATE_KEY:
+            ctx.logger.error("ERROR: No private key configured")
+            return None
+        
+        account = get_w3().eth.account.from_key(PRIVATE_KEY)
+        round_id = round_info['round_id']
+        # settleRound checks block.timestamp, so time the window on the chain's clock
+        window_left = claim['claimed_at'] + CHALLENGE_WINDOW - get_w3().eth.get_block('latest')['timestamp']
+        
+        if window_left >= 0:
+            if round_id not in verified_claims:
+                # The stored price is what the contract judges against
+                prices = round_prediction_prices(ctx, round_id, round_info['prediction_count'])
+                verified_claims[round_id] = best_prediction_index(prices, round_info['actual_price'])
+            best = verified_claims[round_id]
+            if best == claim['winner_index']:
+                ctx.logger.info(f"Claim for round #{round_id} verified (participant #{best}) - settling in {window_left + 1}s")
+                return None
+            if round_id in challenges_pending:
+                ctx.logger.info(f"Challenge for round #{round_id} not mined yet ({challenges_pending[round_id]})")
+                return None
+            
+            ctx.logger.warning(f"Claimed participant #{claim['winner_index']} is not the closest - challenging with #{best}")
+            tx_hash = send_judge_transaction(account, get_contract().functions.challengeRoundWinner(round_id, best), 300000)
+            challenges_pending[round_id] = tx_hash.hex()
+            
+            def on_challenge(receipt):
+                # Mined, failed or expired: the next check re-reads the claim and challenges again if needed
+                challenges_pending.pop(round_id, None)
+                ctx.logger.info(f"Challenge for round #{round_id} {describe_receipt(receipt)}")
+            
+            get_receipts().track(tx_hash, callback=on_challenge)
+            return tx_hash.hex()
+        
+        tx_hash = send_judge_transaction(account, get_contract().functions.settleRound(round_id), 800000)
+        receipt = get_receipts().wait(tx_hash, timeout=60)
+        if receipt['status'] != 1:
+            ctx.logger.error("ERROR: Settle transaction failed")
+            return None
+        ctx.logger.info(f"Round #{round_id} settled! Block mined (gas used {receipt['gasUsed']})")
+        verified_claims.pop(round_id, None)
+        
+        results_due.add(round_id)
+        record_round_results(ctx, round_id, round_info['prediction_count'], claim['results_recorded'])
+        return tx_hash.hex()
+        
+    except Exception as e:
+        ctx.logger.error(f"ERROR: Error settling round: {e}")
+        import traceback
+        ctx.logger.error(traceback.format_exc())
+        return None
+
+
+@consensus_priority
+def record_round_results(ctx, round_id, prediction_count, results_recorded):
+    """Send the recordRoundResults batches a settled round still needs, back to back
+
+    Each batch records from the contract's resultsRecorded onwards, so batches that fail or
+    expire are made up by the next call once every batch sent has been mined or dropped.
+    """
+    if round_id in results_pending or results_recorded >= prediction_count:
+        return
+    
+    def on_batch(receipt, batch):
+        ctx.logger.info(f"Round #{round_id} results batch {batch} {describe_receipt(receipt)}")
+        with results_lock:
+            results_pending[round_id] -= 1
+            if not results_pending[round_id]:
+                del results_pending[round_id]
+    
+    try:
+        account = get_w3().eth.account.from_key(PRIVATE_KEY)
+        batches = -(-(prediction_count - results_recorded) // RESULTS_BATCH_SIZE)
+        nonce = get_w3().eth.get_transaction_count(account.address, 'pending')
+        for i in range(batches):
+            # ~300k gas per participant recorded (history, bias, leaderboard), bounded per batch
+            tx_hash = send_judge_transaction(
+                account,
+                get_contract().functions.recordRoundResults(round_id, RESULTS_BATCH_SIZE),
+                500000 + RESULTS_BATCH_SIZE * 300000,
+                nonce + i
+            )
+            with results_lock:
+                results_pending[round_id] = results_pending.get(round_id, 0) + 1
+            get_receipts().track(tx_hash, callback=lambda receipt, batch=f"{i + 1}/{batches}": on_batch(receipt, batch))
+        ctx.logger.info(f"Sent {batches} result batches for round #{round_id} ({results_recorded}/{prediction_count} recorded)")
+    except Exception as e:
+        ctx.logger.error(f"ERROR: Error sending result batches for round #{round_id}: {e}")
+
+
+def check_round_results(ctx):
+    """Send missing result batches for settled rounds, until the contract has them all"""
+    for round_id in sorted(results_due):
+        if round_id in results_pending:
+            continue
+        try:
+            _, _, _, results_recorded, settled = get_contract().functions.roundClaims(round_id).call()
+            prediction_count = get_contract().functions.predictionRounds(round_id).call()[3]
+        except Exception as e:
+            ctx.logger.error(f"Error fetching round #{round_id} results: {e}")
+            continue
+        if not settled:
+            # Finalized directly: finalizeRoundAndMineBlock recorded every result itself
+            results_due.discard(round_id)
+            continue
+        if results_recorded >= prediction_count:
+            ctx.logger.info(f"Round #{round_id} results recorded for all {prediction_count} participants")
+            results_due.discard(round_id)
+            continue
+        record_round_results(ctx, round_id, prediction_count, results_recorded)
+
+
 @agent.on_interval(period=5.0)
 async def manage_rounds(ctx: Context):
     """Every 5 seconds: intelligently manage rounds"""
@@ -411,6 +860,17 @@ async def manage_rounds(ctx: Context):
     
     ctx.logger.info(f"Round #{round_info['round_id']} - Predictions: {round_info['prediction_count']}, Finalized: {round_info['finalized']}")
     
+    # Rounds settled by anyone (or before a restart) get their results recorded: check the
+    # previous round once whenever a new round shows up, and the current one once finalized
+    global last_round_seen
+    if round_info['round_id'] != last_round_seen:
+        last_round_seen = round_info['round_id']
+        if round_info['round_id'] > 1:
+            results_due.add(round_info['round_id'] - 1)
+    if round_info['finalized']:
+        results_due.add(round_info['round_id'])
+    check_round_results(ctx)
+    
     # Check if already finalized
     if round_info['finalized']:
         ctx.logger.info("Round finalized - attempting to start new round")
@@ -435,6 +895,18 @@ async def manage_rounds(ctx: Context):
     if round_info['prediction_count'] == 0:
         ctx.logger.warning("WARNING: No predictions submitted this round")
     
+    # A claimed round (whoever claimed it) is settled or challenged: finalizeRoundAndMineBlock reverts on it
+    claim = get_round_claim(ctx, round_info['round_id'])
+    if claim:
+        settle_round(ctx, round_info, claim)
+        return
+    
+    if use_optimistic(round_info['prediction_count']):
+        tx_hash = claim_round(ctx, round_info)
+        if tx_hash:
+            ctx.logger.info(f"Claimed round #{round_info['round_id']}, TX: {tx_hash}")
+        return
+    
     # Finalize the round
     tx_hash = finalize_round(ctx)
     
@@ -449,6 +921,8 @@ async def startup(ctx: Context):
     ctx.logger.info(f"Agent Address: {AGENT_ADDRESS}")
     ctx.logger.info(f"Contract: {CONTRACT_ADDRESS}")
     ctx.logger.info(f"Managing rounds every 5 seconds")
+    # Load web3 and build the contracts off the event loop, ready for the first interval
+    await asyncio.to_thread(lambda: (get_contract(), get_pyth_contract()))
 
 
 # ===== CHAT PROTOCOL FOR STATUS UPDATES =====
@@ -475,8 +949,8 @@ async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
     # Build comprehensive on-chain status report
     try:
         # Get current round info
-        current_round_id = contract.functions.currentPredictionRound().call()
-        current_block = contract.functions.getCurrentMempoolCount().call()
+        current_round_id = get_contract().functions.currentPredictionRound().call()
+        current_block = get_contract().functions.getCurrentMempoolCount().call()
         
         response = f"""🤖 **Proof of Intelligence - Judging Agent Status**
 
@@ -489,7 +963,7 @@ async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
         
         # Add round information
         if current_round_id > 0:
-            round_data = contract.functions.predictionRounds(current_round_id).call()
+            round_data = get_contract().functions.predictionRounds(current_round_id).call()
             
             for_block = round_data[0]
             start_time = round_data[1]
@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from indexer import ChainIndexer
+
+
+def rank_key(agent_address: str, best_guesses: int, total_guesses: int) -> Tuple:
+    """Sort key matching the contract's leaderboard: accuracy, then bestGuesses (both descending)"""
+    accuracy = (best_guesses * 100) // total_guesses if total_guesses else 0
+    return (-accuracy, -best_guesses, -total_guesses, agent_address)
+
+
+class Leaderboard:
+    """Full agent ranking kept in an order-statistics list, updated per finalized round
+
+    Stats are the contract's: totalGuesses counts submissions, bestGuesses counts round wins
+    and accuracy is bestGuesses * 100 / totalGuesses. Rank lookups, top-K and windows around
+    an agent are O(log n) (plus the size of the returned slice).
+    """
+
+    def __init__(self, indexer: ChainIndexer):
+        self.indexer = indexer
+        self.lock = threading.Lock()
+        self.ranking = SortedList()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.last_round: Optional[int] = None
+
+    def rebuild(self):
+        """Recompute from the indexed finalized rounds (startup and reorgs)"""
+        totals = self.indexer.store.query(
+            """SELECT p.agent_address, COUNT(*) AS total_guesses FROM predictions p
+               JOIN finalizations f ON f.round_id = p.round_id GROUP BY p.agent_address"""
+        )
+        wins = self.indexer.store.query(
+            "SELECT winner, COUNT(*) AS best_guesses FROM finalizations WHERE winner != '' GROUP BY winner"
+        )
+        last = self.indexer.store.query("SELECT MAX(round_id) AS round_id FROM finalizations")
+
+        best = {row["winner"]: row["best_guesses"] for row in wins}
+        with self.lock:
+            self.stats = {
+                row["agent_address"]: {
+                    "total_guesses": row["total_guesses"],
+                    "best_guesses": best.get(row["agent_address"], 0),
+                }
+                for row in totals
+            }
+            self.ranking = SortedList(
+                rank_key(agent, s["best_guesses"], s["total_guesses"]) for agent, s in self.stats.items()
+            )
+            self.last_round = last[0]["round_id"] if last else None
+
+    def _apply(self, agent_address: str, total_delta: int, best_delta: int):
+        current = self.stats.get(agent_address)
+        if current:
+            self.ranking.remove(rank_key(agent_address, current["best_guesses"], current["total_guesses"]))
+        else:
+            current = self.stats[agent_address] = {"total_guesses": 0, "best_guesses": 0}
+        current["total_guesses"] += total_delta
+        current["best_guesses"] += best_delta
+        self.ranking.add(rank_key(agent_address, current["best_guesses"], current["total_guesses"]))
+
+    def on_indexed(self, name: str, payload: Dict):
+        """Indexer listener: fold each finalized round in, rebuild after a rollback"""
+        if name == "Rollback":
+            self.rebuild()
+            return
+        if name != "RoundFinalized":
+            return
+
+        participants = self.indexer.store.query(
+            "SELECT agent_address FROM predictions WHERE round_id = ?", (payload["round_id"],)
+        )
+        with self.lock:
+            for row in participants:
+                self._apply(row["agent_address"], 1, 1 if row["agent_address"] == payload["winner"] else 0)
+            self.last_round = payload["round_id"]
+
+    def _entry(self, index: int) -> Dict:
+        key = self.ranking[index]
+        agent_address = key[3]
+        stats = self.stats[agent_address]
+        return {
+            "rank": index + 1,
+            "agent_address": agent_address,
+            "accuracy": -key[0],
+            "best_guesses": stats["best_guesses"],
+            "total_guesses": stats["total_guesses"],
+            "win_rate": stats["best_guesses"] / stats["total_guesses"] * 100 if stats["total_guesses"] else 0,
+        }
+
+    def top(self, k: int, offset: int = 0) -> List[Dict]:
+        with self.lock:
+            end = min(len(self.ranking), offset + k)
+            return [self._entry(i) for i in range(offset, end)]
+
+    def rank_of(self, agent_address: str) -> Optional[int]:
+        """Zero-based position of an agent, None if it has no finalized rounds"""
+        stats = self.stats.get(agent_address)
+        if not stats:
+            return None
+        return self.ranking.index(rank_key(agent_address, stats["best_guesses"], stats["total_guesses"]))
+
+    def around(self, agent_address: str, window: int) -> Optional[Dict]:
+        """The agent's entry plus `window` neighbours on each side"""
+        with self.lock:
+            index = self.rank_of(agent_address)
+            if index is None:
+                return None
+            start = max(0, index - window)
+            end = min(len(self.ranking), index + window + 1)
+            return {
+                "agent": self._entry(index),
+                "neighbours": [self._entry(i) for i in range(start, end)],
+            }
+
+    def size(self) -> int:
+        return len(self.ranking)
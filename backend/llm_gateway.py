@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+LLM_UPSTREAM_URL = "https://api.asi1.ai/v1"
+LLM_UPSTREAM_CONCURRENCY = 16  # completions in flight to ASI:One at once, fleet-wide
+LLM_AGENT_CONCURRENCY = 4  # requests one agent may have in flight before it gets a 429
+LLM_CACHE_TTL = 30.0  # seconds a completion answers identical prompts
+LLM_CACHE_SIZE = 1024  # completions kept, least recently used evicted first
+LLM_HTTP_TIMEOUT = 60.0
+LLM_LATENCY_WINDOW = 1000  # recent requests the latency percentiles are computed over
+LLM_FORWARDED_FIELDS = ("model", "messages", "max_tokens", "temperature", "top_p", "stop")
+
+
+class AgentBusy(Exception):
+    """The agent already has LLM_AGENT_CONCURRENCY requests in flight"""
+
+
+class LLMUpstreamError(Exception):
+    pass
+
+
+def prompt_key(body: Dict) -> str:
+    """Hash of everything that determines the completion"""
+    fields = {field: body[field] for field in LLM_FORWARDED_FIELDS if field in body}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def latency_percentiles(samples: deque) -> Dict:
+    import numpy as np
+
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), (50, 95, 99))
+    return {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1)}
+
+
+class LLMGateway:
+    """Shared ASI:One chat completion proxy for the agent fleet
+
+    Agents in the same round send near-identical prompts, so completions are keyed by a
+    hash of the prompt: identical requests arriving while one is in flight wait for that
+    upstream call, and later ones within LLM_CACHE_TTL are served from cache. Upstream
+    calls share one pooled client and are capped fleet-wide; each agent is capped at
+    LLM_AGENT_CONCURRENCY requests in flight.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str = LLM_UPSTREAM_URL):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client: Optional[httpx.AsyncClient] = None
+        self.upstream = asyncio.Semaphore(LLM_UPSTREAM_CONCURRENCY)
+        self.cache: OrderedDict = OrderedDict()  # prompt key -> (expires_at, response)
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.agent_inflight: Dict[str, int] = {}
+        self.latency = deque(maxlen=LLM_LATENCY_WINDOW)
+        self.upstream_latency = deque(maxlen=LLM_LATENCY_WINDOW)
+        self.agents: Dict[str, Dict] = {}
+        self.stats = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tokens_saved": 0,
+        }
+
+    async def call_upstream(self, body: Dict) -> Dict:
+        if self.client is None:
+            limits = httpx.Limits(max_connections=LLM_UPSTREAM_CONCURRENCY, max_keepalive_connections=LLM_UPSTREAM_CONCURRENCY)
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=LLM_HTTP_TIMEOUT, limits=limits)
+        payload = {field: body[field] for field in LLM_FORWARDED_FIELDS if field in body}
+        async with self.upstream:
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(
+                    "/chat/completions",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json=payload,
+                )
+            except httpx.HTTPError as e:
+                raise LLMUpstreamError(str(e) or type(e).__name__) from e
+            self.upstream_latency.append((time.perf_counter() - started) * 1000)
+        self.stats["upstream_calls"] += 1
+        if response.status_code != 200:
+            logger.warning("LLM upstream returned HTTP %s", response.status_code)
+            raise LLMUpstreamError(f"HTTP {response.status_code}: {response.text[:200]}")
+        result = response.json()
+        usage = result.get("usage") or {}
+        self.stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        self.stats["completion_tokens"] += usage.get("completion_tokens", 0)
+        return result
+
+    async def _complete(self, key: str, body: Dict) -> tuple:
+        """Completion for a prompt and how it was served: cache, coalesced or upstream"""
+        entry = self.cache.get(key)
+        if entry and entry[0] > time.time():
+            self.cache.move_to_end(key)
+            return entry[1], "cache"
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key]), "coalesced"
+
+        future = asyncio.ensure_future(self.call_upstream(body))
+        self.inflight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self.inflight.pop(key, None)
+        self.cache[key] = (time.time() + LLM_CACHE_TTL, result)
+        self.cache.move_to_end(key)
+        while len(self.cache) > LLM_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return result, "upstream"
+
+    async def complete(self, agent_address: str, body: Dict) -> Dict:
+        """OpenAI-style chat completion on behalf of an agent"""
+        self.stats["requests"] += 1
+        agent = self.agents.setdefault(agent_address, {"requests": 0, "cache_hits": 0, "coalesced": 0, "rejected": 0, "errors": 0})
+        agent["requests"] += 1
+        if self.agent_inflight.get(agent_address, 0) >= LLM_AGENT_CONCURRENCY:
+            self.stats["rejected"] += 1
+            agent["rejected"] += 1
+            raise AgentBusy(f"{agent_address} already has {LLM_AGENT_CONCURRENCY} LLM requests in flight")
+
+        self.agent_inflight[agent_address] = self.agent_inflight.get(agent_address, 0) + 1
+        started = time.perf_counter()
+        try:
+            result, served = await self._complete(prompt_key(body), body)
+        except LLMUpstreamError:
+            self.stats["errors"] += 1
+            agent["errors"] += 1
+            raise
+        finally:
+            self.agent_inflight[agent_address] -= 1
+            if not self.agent_inflight[agent_address]:
+                del self.agent_inflight[agent_address]
+        self.latency.append((time.perf_counter() - started) * 1000)
+
+        if served != "upstream":
+            key = "cache_hits" if served == "cache" else "coalesced"
+            self.stats[key] += 1
+            agent[key] += 1
+            self.stats["tokens_saved"] += (result.get("usage") or {}).get("total_tokens", 0)
+        return result
+
+    def summary(self) -> Dict:
+        return {
+            **self.stats,
+            "cached_prompts": len(self.cache),
+            "inflight": len(self.inflight),
+            "latency": latency_percentiles(self.latency),
+            "upstream_latency": latency_percentiles(self.upstream_latency),
+            "agents": len(self.agents),
+        }
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
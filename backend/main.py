@@ -1,20 +1,55 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import uvicorn
 from pydantic import BaseModel
 import os
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal, TYPE_CHECKING
 from dotenv import load_dotenv
 import httpx
-from web3 import Web3
 import json
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from fleet import FLEET_STATES, ROLLOUT_CANARY_PERCENT, ROLLOUT_PARALLELISM, FleetMonitor, FleetRegistry, FleetRollout, code_hash
+from llm_gateway import AgentBusy, LLMGateway, LLMUpstreamError
+
+if TYPE_CHECKING:
+    from gas_analytics import GasAnalytics
+    from gas_ledger import GasCompactor, GasLedger, GasReconciler, GasTxLog
+    from history_cache import HistoryCache
+    from indexer import ChainIndexer
+    from price_ticks import HermesStream
 
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="Proof of Intelligence Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background services for the lifetime of the app"""
+    # Chain clients load in the background so the app is ready before web3 is even imported
+    tasks = [asyncio.create_task(asyncio.to_thread(get_w3))]
+    if CONTRACT_ADDRESS:
+        round_events.bind(asyncio.get_running_loop())
+        tasks.append(asyncio.create_task(run_chain_indexer()))
+    tasks.append(asyncio.create_task(run_gas_reconciler()))
+    tasks.append(asyncio.create_task(run_gas_compactor()))
+    tasks.append(asyncio.create_task(run_fleet_monitor()))
+    tasks.append(asyncio.create_task(run_hermes_stream()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await llm_gateway.close()
+
+
+app = FastAPI(title="Proof of Intelligence Backend", lifespan=lifespan)
 
 # Agentverse API configuration
 AGENTVERSE_API_KEY = os.getenv("AGENTVERSE_API_KEY")
@@ -23,70 +58,141 @@ ASI_ONE_API_KEY  = os.getenv("ASIONE_API_KEY")
 
 # Smart Contract Configuration
 SEPOLIA_RPC = "https://base-sepolia.g.alchemy.com/v2/FTdaypPQy2TZuLJhehmqRullM2x0dJPJ"
+SEPOLIA_RPC_URLS = [url.strip() for url in os.getenv("SEPOLIA_RPC_URLS", SEPOLIA_RPC).split(",") if url.strip()]  # tried fastest first
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "25"))  # requests/s this process may send upstream
+CHAIN_ID = 84532  # Base Sepolia
+HERMES_URL = os.getenv("HERMES_URL", "https://hermes.pyth.network")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 POI_TOKEN_ADDRESS = os.getenv("POI_TOKEN_ADDRESS")
 SEPOLIA_PRIVATE_KEY = os.getenv("SEPOLIA_PRIVATE_KEY")
+RELAYER_PRIVATE_KEY = os.getenv("RELAYER_PRIVATE_KEY")  # must not be SEPOLIA_PRIVATE_KEY, which agents sign with
+if RELAYER_PRIVATE_KEY and RELAYER_PRIVATE_KEY == SEPOLIA_PRIVATE_KEY:
+    print("RELAYER_PRIVATE_KEY is the agents' SEPOLIA_PRIVATE_KEY; the relayer is disabled")
+    RELAYER_PRIVATE_KEY = None
 
 # Gas tracking configuration
 GAS_TRACKING_FILE = Path("gas_tracking.json")
+GAS_LOG_DIR = Path(os.getenv("GAS_LOG_DIR", "gas_log"))  # settled transactions, one file per column
+GAS_ARCHIVE_DIR = Path(os.getenv("GAS_ARCHIVE_DIR", "gas_archive"))  # compacted raw ledger entries
+GAS_COMPACT_HORIZON_DAYS = float(os.getenv("GAS_COMPACT_HORIZON_DAYS", "7"))  # raw detail kept in the ledger
 INITIAL_STAKE_AMOUNT = 0.1  # ETH
 BACKEND_URL = os.getenv("BACKEND_URL")  # Set to ngrok URL in production
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC))
+# Chain clients
+#
+# web3 (through eth_account) is most of the process's import time, so it is only imported
+# when the provider, contracts or indexer are first needed. Use get_w3() / get_poi_contract()
+# rather than the module globals, which stay None until then.
+w3 = None
+rpc_cache = None
+receipts = None
+clients_lock = threading.RLock()
+
+def get_w3():
+    """Web3 on the shared RPC pool, with its read cache and receipt tracker (created on first use)"""
+    global w3, rpc_cache, receipts
+    with clients_lock:
+        if w3 is None:
+            from web3 import Web3
+            from rpc import ReceiptTracker, RpcPool, RpcScheduler, enable_block_cache
+
+            # Dashboards, indexer and history are "analytics"; relayed predictions run as "agent"
+            client = Web3(RpcPool(SEPOLIA_RPC_URLS, scheduler=RpcScheduler(RPC_RATE_LIMIT), default_priority="analytics"))
+            rpc_cache = enable_block_cache(client)
+            receipts = ReceiptTracker(client, priority="agent")
+            w3 = client
+    return w3
+
+# Inlined into generated agents so they share the backend's RPC pool
+RPC_POOL_SOURCE = (Path(__file__).parent / "rpc.py").read_text()
 
 # Gas tracking storage
+#
+# gas_ledger loads numpy for the columnar transaction log, so the ledger, log and compactor
+# are built on first use like the chain clients; nothing is read or created at import time.
+gas_ledger = None
+gas_tx_log = None
+gas_compactor = None
+
+def get_gas_ledger() -> "GasLedger":
+    """gas_tracking.json ledger (created on first use)"""
+    global gas_ledger
+    with clients_lock:
+        if gas_ledger is None:
+            from gas_ledger import GasLedger
+
+            gas_ledger = GasLedger(GAS_TRACKING_FILE)
+    return gas_ledger
+
+def get_gas_tx_log() -> "GasTxLog":
+    """Columnar log of settled transactions (created on first use)"""
+    global gas_tx_log
+    with clients_lock:
+        if gas_tx_log is None:
+            from gas_ledger import GasTxLog
+
+            gas_tx_log = GasTxLog(GAS_LOG_DIR)
+    return gas_tx_log
+
+def get_gas_compactor() -> "GasCompactor":
+    """Ledger compactor archiving to GAS_ARCHIVE_DIR (created on first use)"""
+    global gas_compactor
+    with clients_lock:
+        if gas_compactor is None:
+            from gas_ledger import GasCompactor
+
+            gas_compactor = GasCompactor(get_gas_ledger(), GAS_ARCHIVE_DIR, horizon=GAS_COMPACT_HORIZON_DAYS * 86400)
+    return gas_compactor
+
 def load_gas_tracking() -> Dict:
     """Load gas tracking data from JSON file"""
-    if GAS_TRACKING_FILE.exists():
-        with open(GAS_TRACKING_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    return get_gas_ledger().load()
 
 def save_gas_tracking(data: Dict):
     """Save gas tracking data to JSON file"""
-    with open(GAS_TRACKING_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    get_gas_ledger().save(data)
 
 def record_gas_deposit(agent_address: str, amount: float = INITIAL_STAKE_AMOUNT):
     """Record initial gas deposit for an agent"""
-    tracking = load_gas_tracking()
-    tracking[agent_address] = {
-        "staked": amount,
-        "spent": 0.0,
-        "remaining": amount,
-        "transactions": [],
-        "created_at": datetime.now().isoformat()
-    }
-    save_gas_tracking(tracking)
+    with get_gas_ledger().lock:
+        tracking = load_gas_tracking()
+        tracking[agent_address] = {
+            "staked": amount,
+            "spent": 0.0,
+            "remaining": amount,
+            "transactions": [],
+            "created_at": datetime.now().isoformat()
+        }
+        save_gas_tracking(tracking)
     return tracking[agent_address]
 
 def record_gas_usage(agent_address: str, tx_hash: str, gas_used: int, gas_price: int):
-    """Record gas usage for a transaction"""
-    tracking = load_gas_tracking()
-    
-    if agent_address not in tracking:
-        # Auto-create with initial stake if not exists
-        tracking[agent_address] = record_gas_deposit(agent_address)
-    
-    # Calculate gas cost in ETH
-    gas_cost_wei = gas_used * gas_price
-    gas_cost_eth = gas_cost_wei / 1e18
-    
-    # Update spent and remaining
-    tracking[agent_address]["spent"] += gas_cost_eth
-    tracking[agent_address]["remaining"] = tracking[agent_address]["staked"] - tracking[agent_address]["spent"]
-    
-    # Add transaction record
-    tracking[agent_address]["transactions"].append({
-        "tx_hash": tx_hash,
-        "gas_used": gas_used,
-        "gas_price": gas_price,
-        "gas_cost_eth": gas_cost_eth,
-        "timestamp": datetime.now().isoformat()
-    })
-    
-    save_gas_tracking(tracking)
+    """Record gas usage for a transaction (as reported; verified later by the reconciler)"""
+    with get_gas_ledger().lock:
+        tracking = load_gas_tracking()
+
+        if agent_address not in tracking:
+            # Auto-create with initial stake if not exists
+            tracking[agent_address] = record_gas_deposit(agent_address)
+
+        # Calculate gas cost in ETH
+        gas_cost_wei = gas_used * gas_price
+        gas_cost_eth = gas_cost_wei / 1e18
+
+        # Update spent and remaining
+        tracking[agent_address]["spent"] += gas_cost_eth
+        tracking[agent_address]["remaining"] = tracking[agent_address]["staked"] - tracking[agent_address]["spent"]
+
+        # Add transaction record
+        tracking[agent_address]["transactions"].append({
+            "tx_hash": tx_hash,
+            "gas_used": gas_used,
+            "gas_price": gas_price,
+            "gas_cost_eth": gas_cost_eth,
+            "timestamp": datetime.now().isoformat()
+        })
+
+        save_gas_tracking(tracking)
     return tracking[agent_address]
 
 def check_gas_balance(agent_address: str, estimated_gas: int = 500000) -> tuple[bool, float]:
@@ -97,7 +203,7 @@ def check_gas_balance(agent_address: str, estimated_gas: int = 500000) -> tuple[
         return False, 0.0
     
     # Estimate gas cost (use current gas price)
-    gas_price = w3.eth.gas_price
+    gas_price = get_w3().eth.gas_price
     estimated_cost_eth = (estimated_gas * gas_price) / 1e18
     
     remaining = tracking[agent_address]["remaining"]
@@ -110,8 +216,8 @@ def get_gas_stats(agent_address: str) -> Optional[Dict]:
     tracking = load_gas_tracking()
     return tracking.get(agent_address)
 
-# Contract ABI for registerAgent function
-CONTRACT_ABI = json.loads('''[
+# Contract ABI for registerAgent function (parsed by get_poi_contract)
+CONTRACT_ABI_JSON = '''[
     {
         "inputs": [
             {
@@ -132,8 +238,121 @@ CONTRACT_ABI = json.loads('''[
         "outputs": [],
         "stateMutability": "nonpayable",
         "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "string", "name": "agentAddress", "type": "string"},
+            {"internalType": "int256", "name": "predictedPrice", "type": "int256"}
+        ],
+        "name": "submitPrediction",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "currentPredictionRound",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getCurrentRound",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "uint256", "name": "forBlockNumber", "type": "uint256"},
+                    {"internalType": "uint256", "name": "startTime", "type": "uint256"},
+                    {"internalType": "uint256", "name": "submissionDeadline", "type": "uint256"},
+                    {"internalType": "uint256", "name": "predictionCount", "type": "uint256"},
+                    {"internalType": "bool", "name": "finalized", "type": "bool"},
+                    {"internalType": "string", "name": "winnerAgent", "type": "string"},
+                    {"internalType": "int256", "name": "actualPrice", "type": "int256"},
+                    {"internalType": "string[]", "name": "participants", "type": "string[]"}
+                ],
+                "internalType": "struct ProofOfIntelligence.PredictionRound",
+                "name": "",
+                "type": "tuple"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256", "name": "roundId", "type": "uint256"}],
+        "name": "getRoundPredictions",
+        "outputs": [
+            {"internalType": "string[]", "name": "", "type": "string[]"},
+            {
+                "components": [
+                    {"internalType": "string", "name": "agentAddress", "type": "string"},
+                    {"internalType": "int256", "name": "predictedPrice", "type": "int256"},
+                    {"internalType": "uint256", "name": "timestamp", "type": "uint256"},
+                    {"internalType": "bool", "name": "submitted", "type": "bool"}
+                ],
+                "internalType": "struct ProofOfIntelligence.Prediction[]",
+                "name": "",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "string", "name": "agentAddress", "type": "string"}],
+        "name": "getAgent",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "string", "name": "agentAddress", "type": "string"},
+                    {"internalType": "string", "name": "agentWalletAddress", "type": "string"},
+                    {"internalType": "uint256", "name": "totalGuesses", "type": "uint256"},
+                    {"internalType": "uint256", "name": "bestGuesses", "type": "uint256"},
+                    {"internalType": "uint256", "name": "accuracy", "type": "uint256"},
+                    {"internalType": "uint256", "name": "lastGuessBlock", "type": "uint256"},
+                    {"internalType": "uint256", "name": "deviation", "type": "uint256"}
+                ],
+                "internalType": "struct ProofOfIntelligence.Agent",
+                "name": "",
+                "type": "tuple"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "name": "predictionRounds",
+        "outputs": [
+            {"internalType": "uint256", "name": "forBlockNumber", "type": "uint256"},
+            {"internalType": "uint256", "name": "startTime", "type": "uint256"},
+            {"internalType": "uint256", "name": "submissionDeadline", "type": "uint256"},
+            {"internalType": "uint256", "name": "predictionCount", "type": "uint256"},
+            {"internalType": "bool", "name": "finalized", "type": "bool"},
+            {"internalType": "string", "name": "winnerAgent", "type": "string"},
+            {"internalType": "int256", "name": "actualPrice", "type": "int256"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
     }
-]''')
+]'''
+
+poi_contract = None
+
+def get_poi_contract():
+    """ProofOfIntelligence contract bound to CONTRACT_ADDRESS (created on first use)"""
+    global poi_contract
+    with clients_lock:
+        if poi_contract is None:
+            from web3 import Web3
+
+            poi_contract = get_w3().eth.contract(
+                address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=json.loads(CONTRACT_ABI_JSON)
+            )
+    return poi_contract
+
+PredictorName = Literal["local", "llm", "ensemble"]
 
 class AgentDetails(BaseModel):
     name: str
@@ -145,18 +364,27 @@ class AgentDetails(BaseModel):
     agent_seed: Optional[str] = None  # Unique seed for agent randomness
     wallet_address: str  # User's Ethereum wallet for rewards
     deviation: int = 50  # Deviation value (10-99), affects price adjustment
+    predictor: PredictorName = "ensemble"  # Prediction strategy
 
 @app.get("/")
 async def root():
     return {"message": "Proof of Intelligence", "token": AGENTVERSE_API_KEY}
 
-def get_eth_prediction_agent_code(agent_name: str, seed: str, deviation: int) -> str:
+def get_eth_prediction_agent_code(agent_name: str, seed: str, deviation: int, predictor: str = "ensemble") -> str:
     """Generate ETH price prediction agent code"""
-    return f"""from datetime import datetime, timezone
+    return f"""from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from uuid import uuid4
+import asyncio
+import hashlib
 import httpx
 import json
+import time
 
+import numpy as np
+from eth_abi import encode as abi_encode
 from openai import OpenAI
 from uagents import Context, Protocol, Agent
 from uagents_core.contrib.protocols.chat import (
@@ -170,19 +398,21 @@ from web3 import Web3
 
 subject_matter = "Ethereum (ETH) price prediction"
 
-client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key={repr(ASI_ONE_API_KEY)},
-)
-
 # Smart Contract Configuration (for agent template)
-SEPOLIA_RPC_TEMPLATE = "https://base-sepolia.g.alchemy.com/v2/FTdaypPQy2TZuLJhehmqRullM2x0dJPJ"
+SEPOLIA_RPC_TEMPLATE = {repr(SEPOLIA_RPC)}
+SEPOLIA_RPC_URLS_TEMPLATE = {repr(SEPOLIA_RPC_URLS)}
+CHAIN_ID = {CHAIN_ID}
+HERMES_URL = {repr(HERMES_URL)}
 CONTRACT_ADDRESS_TEMPLATE = {repr(CONTRACT_ADDRESS)}
 POI_TOKEN_ADDRESS_TEMPLATE = {repr(POI_TOKEN_ADDRESS)}
 PRIVATE_KEY = {repr(SEPOLIA_PRIVATE_KEY)}
 
+{RPC_POOL_SOURCE}
+
 # Initialize Web3
-w3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC_TEMPLATE))
+w3 = Web3(RpcPool(SEPOLIA_RPC_URLS_TEMPLATE))
+rpc_cache = enable_block_cache(w3)
+receipts = ReceiptTracker(w3)
 
 contract_abi = [
     {{"inputs": [{{"internalType": "string", "name": "agentAddress", "type": "string"}}, {{"internalType": "int256", "name": "predictedPrice", "type": "int256"}}], "name": "submitPrediction", "outputs": [], "stateMutability": "nonpayable", "type": "function"}},
@@ -203,9 +433,98 @@ AGENT_ADDRESS = agent.address
 # Backend URL for gas tracking (set via BACKEND_URL env var)
 BACKEND_URL = "{BACKEND_URL}"
 
+# Submit through the backend relayer (one shared nonce sequence) instead of signing locally
+USE_RELAYER = {repr(bool(BACKEND_URL and RELAYER_PRIVATE_KEY))}
+
+# LLM calls go through the backend gateway (shared cache, coalesced identical prompts)
+USE_LLM_GATEWAY = {repr(bool(BACKEND_URL))}
+
+def sign_llm_request(request):
+    \"\"\"Sign each gateway request (timestamp, nonce and body) with this agent's identity\"\"\"
+    timestamp = str(int(time.time()))
+    nonce = uuid4().hex
+    message = f"poi-llm:{{AGENT_ADDRESS}}:{{timestamp}}:{{nonce}}:{{hashlib.sha256(request.content).hexdigest()}}"
+    request.headers["X-Agent-Timestamp"] = timestamp
+    request.headers["X-Agent-Nonce"] = nonce
+    request.headers["X-Agent-Signature"] = agent.sign_digest(hashlib.sha256(message.encode()).digest())
+
+if USE_LLM_GATEWAY:
+    client = OpenAI(
+        base_url=f"{{BACKEND_URL}}/llm/v1",
+        api_key="gateway",
+        default_headers={{"X-Agent-Address": AGENT_ADDRESS}},
+        http_client=httpx.Client(event_hooks={{"request": [sign_llm_request]}}),
+    )
+else:
+    client = OpenAI(
+        base_url='https://api.asi1.ai/v1',
+        api_key={repr(ASI_ONE_API_KEY)},
+    )
+
 # Deviation parameter (10-99) - adjusts AI prediction before submission
 DEVIATION = {deviation}  # Convert to percentage: deviation/100 = 0.{deviation:02d}
 
+# Prediction strategy: "local" (NumPy model only), "llm" (asi1-fast only) or
+# "ensemble" (local model always, blended with the LLM if it answers in budget)
+PREDICTOR = {repr(predictor)}
+PREDICTION_BUDGET_SECONDS = 1.5  # How long the ensemble waits for the LLM
+PREDICTION_HORIZON_SECONDS = 60
+TICK_WINDOW = 64  # Recent Hermes ticks kept for the local model
+
+# Recent Hermes ticks as (publish_time, price, ema_price). With a backend, the window is
+# filled from its shared Hermes stream (one tick per second) instead of our own polling
+price_ticks = deque(maxlen=TICK_WINDOW)
+USE_BACKEND_TICKS = {repr(bool(BACKEND_URL))}
+prediction_executor = ThreadPoolExecutor(max_workers=2)
+
+# Chat replies: one completion answers repeats of the same question (ignoring case and
+# spacing) asked while the price stays in the same bucket and no new prediction has been scored
+CHAT_CACHE_TTL = 60  # seconds a completion is reused
+CHAT_CACHE_SIZE = 128  # completions kept, least recently used evicted first
+CHAT_PRICE_BUCKET = 1.0  # USD
+
+
+class ReplyCache:
+    \"\"\"TTL + LRU cache of chat completions with single-flight loading
+
+    Concurrent requests for a key that is being generated wait for that one completion
+    instead of starting their own. Failed completions (None) are not cached.
+    \"\"\"
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self.entries = OrderedDict()  # key -> (expires_at, reply)
+        self.inflight = {{}}
+        self.stats = {{"hits": 0, "misses": 0, "shared": 0}}
+
+    async def get(self, key, load):
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.time():
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+        if key in self.inflight:
+            self.stats["shared"] += 1
+            return await asyncio.shield(self.inflight[key])
+
+        self.stats["misses"] += 1
+        future = asyncio.ensure_future(asyncio.to_thread(load))
+        self.inflight[key] = future
+        try:
+            reply = await asyncio.shield(future)
+        finally:
+            self.inflight.pop(key, None)
+        if reply:
+            self.entries[key] = (time.time() + self.ttl, reply)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return reply
+
+
+reply_cache = ReplyCache(CHAT_CACHE_TTL, CHAT_CACHE_SIZE)
+
 # Log agent info on startup
 print("=" * 80)
 print("AGENT INITIALIZATION")
@@ -215,6 +534,7 @@ print(f"Agent Seed: {repr(seed)}")
 print(f"Agent Address (Agentverse): {{agent.address}}")
 print(f"AGENT_ADDRESS variable: {{AGENT_ADDRESS}}")
 print(f"Deviation: {{DEVIATION}}%")
+print(f"Predictor: {{PREDICTOR}}")
 print("=" * 80)
 
 
@@ -295,9 +615,21 @@ def analyze_history(history):
     }}
 
 
+def load_backend_ticks():
+    \"\"\"Append the backend's newest Hermes ticks to the tick window\"\"\"
+    try:
+        response = httpx.get(f"{{BACKEND_URL}}/prices/ticks", params={{"n": TICK_WINDOW}}, timeout=5.0)
+        data = response.json()
+        for publish_time, price, ema in zip(data["publish_time"], data["price"], data["ema"]):
+            if not price_ticks or publish_time > price_ticks[-1][0]:
+                price_ticks.append((publish_time, price, ema))
+    except Exception as e:
+        print(f"Error loading backend ticks: {{e}}")
+
+
 def fetch_pyth_hermes():
     \"\"\" Fetch ETH/USD price feed from Pyth Hermes API \"\"\"
-    url = "https://hermes.pyth.network/v2/updates/price/latest?ids[]=0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace"
+    url = f"{{HERMES_URL}}/v2/updates/price/latest?ids[]=0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace"
     
     try:
         response = httpx.get(url)
@@ -316,21 +648,30 @@ def fetch_pyth_hermes():
             ema_expo = int(eth_data["ema_price"]["expo"])
             actual_ema_price = ema_price_raw * (10 ** ema_expo)
             
+            publish_time = eth_data["price"]["publish_time"]
+            if not price_ticks or price_ticks[-1][0] != publish_time:
+                price_ticks.append((publish_time, actual_price, actual_ema_price))
+            
             return {{
                 "price": actual_price,
                 "ema_price": actual_ema_price,
-                "publish_time": eth_data["price"]["publish_time"]
+                "publish_time": publish_time
             }}
     except Exception as e:
         print(f"Error fetching Pyth price: {{e}}")
         return None
 
 
-def get_ai_prediction(eth_price_data):
-    \"\"\"Get AI prediction for ETH price in next 60 seconds\"\"\"
+def get_ai_prediction(eth_price_data, history=None, strict=False):
+    \"\"\"Get AI prediction for ETH price in next 60 seconds
+
+    With strict=True a failed or unparseable completion raises instead of falling back to
+    the current price, so the ensemble can tell "no answer" from "no movement".
+    \"\"\"
     try:
         # Fetch and analyze historical performance
-        history = fetch_agent_history()
+        if history is None:
+            history = fetch_agent_history()
         analysis = analyze_history(history)
         
         # Build enhanced system prompt with self-learning context
@@ -415,6 +756,8 @@ Example: {{current_price + 1:.2f}}
                 except:
                     continue
             else:
+                if strict:
+                    raise ValueError(f"no price in LLM reply: {{prediction_text!r}}")
                 ai_pred = eth_price_data['price']  # Fallback to current price
         
         print(f"[AI] Raw AI prediction: ${{ai_pred:.2f}} (current: ${{current_price:.2f}})")
@@ -491,9 +834,141 @@ Example: {{current_price + 1:.2f}}
             
     except Exception as e:
         print(f"Error getting AI prediction: {{e}}")
+        if strict:
+            raise
         return eth_price_data['price']
 
 
+class Predictor(ABC):
+    \"\"\"Base class for prediction strategies\"\"\"
+    name = "base"
+    
+    @abstractmethod
+    def predict(self, eth_price_data, history):
+        ...
+
+
+class LocalPredictor(Predictor):
+    \"\"\"Vectorized EMA/drift model over recent Hermes ticks with bias correction\"\"\"
+    name = "local"
+    
+    def __init__(self, horizon=PREDICTION_HORIZON_SECONDS, max_move=0.005, ema_weight=0.05, bias_weight=0.5):
+        self.horizon = horizon
+        self.max_move = max_move  # Never move more than 0.5% in one horizon
+        self.ema_weight = ema_weight  # Mean reversion toward the Hermes EMA
+        self.bias_weight = bias_weight  # Share of the on-chain bias we correct
+    
+    def predict(self, eth_price_data, history):
+        current = eth_price_data['price']
+        prediction = current
+        
+        # Drift: recency-weighted least squares slope over the tick window
+        if len(price_ticks) >= 3:
+            ticks = np.asarray(price_ticks, dtype=np.float64)
+            t = ticks[:, 0] - ticks[-1, 0]  # Seconds relative to newest tick (<= 0)
+            p = ticks[:, 1]
+            w = np.exp(t / self.horizon)
+            t_mean = np.average(t, weights=w)
+            p_mean = np.average(p, weights=w)
+            var = np.average((t - t_mean) ** 2, weights=w)
+            if var > 0:
+                slope = np.average((t - t_mean) * (p - p_mean), weights=w) / var
+                prediction = current + slope * self.horizon
+        
+        prediction += self.ema_weight * (eth_price_data['ema_price'] - current)
+        
+        # Bias correction from on-chain history (difference = predicted - actual, ×1e8)
+        if history:
+            diffs = np.array([h[3] for h in history], dtype=np.float64) / 1e8
+            w = 0.5 ** np.arange(len(diffs) - 1, -1, -1)  # Newest entry weighs most
+            prediction -= self.bias_weight * np.average(diffs, weights=w)
+        
+        return float(np.clip(prediction, current * (1 - self.max_move), current * (1 + self.max_move)))
+
+
+class LLMPredictor(Predictor):
+    \"\"\"asi1-fast completion with validation and bias correction\"\"\"
+    name = "llm"
+    
+    def __init__(self, strict=False):
+        self.strict = strict  # Raise on LLM failure instead of returning the current price
+    
+    def predict(self, eth_price_data, history):
+        return get_ai_prediction(eth_price_data, history, strict=self.strict)
+
+
+PREDICTORS = {{
+    "local": LocalPredictor(),
+    "llm": LLMPredictor(),
+}}
+ENSEMBLE_LLM = LLMPredictor(strict=True)
+
+
+def predict_price(eth_price_data, history):
+    \"\"\"Run the configured strategy, returns (price, strategy used, elapsed ms)\"\"\"
+    start = time.perf_counter()
+    
+    if PREDICTOR in PREDICTORS:
+        price = PREDICTORS[PREDICTOR].predict(eth_price_data, history)
+        return price, PREDICTOR, (time.perf_counter() - start) * 1000
+    
+    # Ensemble: the local model always answers, the LLM only counts if it beats the budget
+    llm_future = prediction_executor.submit(ENSEMBLE_LLM.predict, eth_price_data, history)
+    local_price = PREDICTORS["local"].predict(eth_price_data, history)
+    remaining = PREDICTION_BUDGET_SECONDS - (time.perf_counter() - start)
+    done, _ = wait([llm_future], timeout=max(0.0, remaining))
+    
+    if done and llm_future.exception() is None:
+        price = (local_price + llm_future.result()) / 2
+        used = "ensemble(local+llm)"
+    else:
+        price = local_price
+        used = "ensemble(local)"
+    
+    return float(price), used, (time.perf_counter() - start) * 1000
+
+
+# Submission fast path: account, calldata layout and fee are cached so the only RPCs
+# between "prediction ready" and "transaction sent" are the nonce read and send_raw_transaction
+SUBMIT_GAS_LIMIT = 500000
+GAS_PRICE_TTL_SECONDS = 30
+# A cached nonce only works for a key this agent alone signs with. PRIVATE_KEY is the fleet's
+# shared SEPOLIA_PRIVATE_KEY, where another agent has almost always taken the cached nonce, so
+# the 'pending' nonce is read right before signing (the relayer keeps one nonce sequence instead)
+CACHE_NONCE = False
+SUBMIT_SELECTOR = Web3.keccak(text="submitPrediction(string,int256)")[:4]
+
+submit_account = w3.eth.account.from_key(PRIVATE_KEY) if PRIVATE_KEY else None
+submit_calldata = {{}}  # agent_addr -> (head, tail) around the int256 price word
+submit_state = {{"nonce": None, "gas_price": None, "gas_price_at": 0.0}}
+
+
+def submit_calldata_for(agent_addr, price_int):
+    \"\"\"ABI-encode submitPrediction(agent_addr, price) by patching only the price word\"\"\"
+    if agent_addr not in submit_calldata:
+        # Layout: selector | string offset | int256 price | string length | string data
+        encoded = SUBMIT_SELECTOR + abi_encode(["string", "int256"], [agent_addr, 0])
+        submit_calldata[agent_addr] = (encoded[:36], encoded[68:])
+    head, tail = submit_calldata[agent_addr]
+    return head + price_int.to_bytes(32, "big", signed=True) + tail
+
+
+def prepare_submission(refresh_nonce=False):
+    \"\"\"Warm the fee cache (and with CACHE_NONCE the nonce) ahead of the prediction\"\"\"
+    if CACHE_NONCE and (refresh_nonce or submit_state["nonce"] is None):
+        submit_state["nonce"] = w3.eth.get_transaction_count(submit_account.address, 'pending')
+    if time.monotonic() - submit_state["gas_price_at"] > GAS_PRICE_TTL_SECONDS:
+        submit_state["gas_price"] = w3.eth.gas_price
+        submit_state["gas_price_at"] = time.monotonic()
+
+
+def next_nonce():
+    \"\"\"Nonce for the next submission: the cached one with CACHE_NONCE, else read right before signing\"\"\"
+    if not CACHE_NONCE or submit_state["nonce"] is None:
+        submit_state["nonce"] = w3.eth.get_transaction_count(submit_account.address, 'pending')
+    return submit_state["nonce"]
+
+
 def submit_prediction_onchain(ctx, agent_addr, predicted_price):
     \"\"\"Submit prediction to smart contract\"\"\"
     try:
@@ -508,42 +983,46 @@ def submit_prediction_onchain(ctx, agent_addr, predicted_price):
         ctx.logger.info(f"Agent: {{agent_addr}}")
         ctx.logger.info(f"Price: ${{predicted_price}}")
         
-        # Use the global w3 and contract instances
-        global w3, contract
-            
-        account = w3.eth.account.from_key(PRIVATE_KEY)
-        ctx.logger.info(f"Account: {{account.address}}")
-        
         # Convert price to int (multiply by 1e8 for 8 decimal precision - matching Pyth format)
         price_int = int(round(float(predicted_price) * 1e8))
         ctx.logger.info(f"Price as int: {{price_int}}")
         
-        # Get current nonce and gas price (use 'pending' to include pending transactions)
-        nonce = w3.eth.get_transaction_count(account.address, 'pending')
-        gas_price = w3.eth.gas_price
-        ctx.logger.info(f"Nonce: {{nonce}}")
-        ctx.logger.info(f"Gas price: {{gas_price}} wei")
+        # Gas price comes from the warm cache (see prepare_submission)
+        prepare_submission()
+        nonce = next_nonce()
+        gas_price = submit_state["gas_price"]
+        ctx.logger.info(f"Account: {{submit_account.address}}, nonce: {{nonce}}, gas price: {{gas_price}} wei")
         
-        # Build transaction
-        transaction = contract.functions.submitPrediction(agent_addr, price_int).build_transaction({{
-            'from': account.address,
+        # Build the transaction locally - no build_transaction, no estimate/fee RPCs
+        transaction = {{
+            'to': contract.address,
+            'data': submit_calldata_for(agent_addr, price_int),
+            'value': 0,
             'nonce': nonce,
-            'gas': 500000,
+            'gas': SUBMIT_GAS_LIMIT,
             'gasPrice': gas_price,
-            'chainId': 84532  # Sepolia
-        }})
-        
-        ctx.logger.info("Signing transaction...")
+            'chainId': CHAIN_ID
+        }}
         
-        # Sign and send
-        signed_txn = account.sign_transaction(transaction)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        signed_txn = submit_account.sign_transaction(transaction)
+        try:
+            tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            # Our cached nonce was taken (e.g. by another sender on the same key) - resync once
+            if not any(s in str(e).lower() for s in ('nonce', 'already known', 'replacement')):
+                raise
+            ctx.logger.warning(f"WARNING: Nonce {{nonce}} rejected ({{e}}), resyncing")
+            submit_state["nonce"] = None
+            transaction['nonce'] = next_nonce()
+            signed_txn = submit_account.sign_transaction(transaction)
+            tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        submit_state["nonce"] = transaction['nonce'] + 1
         
         ctx.logger.info(f"TX sent: {{tx_hash.hex()}}")
         
         # Wait for receipt to get actual gas used
         try:
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            receipt = receipts.wait(tx_hash, timeout=60)
             gas_used = receipt['gasUsed']
             ctx.logger.info(f"Gas used: {{gas_used}}")
             
@@ -570,16 +1049,44 @@ def submit_prediction_onchain(ctx, agent_addr, predicted_price):
             except Exception as e:
                 ctx.logger.warning(f"WARNING: Could not record gas usage: {{e}}")
         except Exception as e:
+            # Possibly dropped: a nonce counted past it would leave every later submission behind a gap
+            submit_state["nonce"] = None
             ctx.logger.warning(f"WARNING: Could not get receipt: {{e}}")
         
         return tx_hash.hex()
     except Exception as e:
+        submit_state["nonce"] = None  # Resync on the next submission
         ctx.logger.error(f"ERROR: {{e}}")
         import traceback
         ctx.logger.error(traceback.format_exc())
         return None
 
 
+def submit_prediction_via_relayer(ctx, agent_addr, round_id, predicted_price):
+    \"\"\"Send a prediction intent signed by this agent's identity to the backend relayer\"\"\"
+    price_int = int(round(float(predicted_price) * 1e8))
+    message = f"poi-relay:{{CONTRACT_ADDRESS_TEMPLATE}}:{{agent_addr}}:{{round_id}}:{{price_int}}"
+    signature = agent.sign_digest(hashlib.sha256(message.encode()).digest())
+    
+    response = httpx.post(
+        f"{{BACKEND_URL}}/relay/prediction",
+        json={{
+            "agent_address": agent_addr,
+            "round_id": round_id,
+            "predicted_price": price_int,
+            "signature": signature
+        }},
+        timeout=10.0
+    )
+    if response.status_code != 200:
+        ctx.logger.error(f"ERROR: Relayer rejected prediction: {{response.text}}")
+        return None
+    
+    tx_hash = response.json()["tx_hash"]
+    ctx.logger.info(f"TX relayed: {{tx_hash}} (gas is recorded by the relayer)")
+    return tx_hash
+
+
 @agent.on_interval(period=5.0)
 async def check_and_submit_prediction(ctx: Context):
     \"\"\"Check every 10 seconds if we can submit a prediction\"\"\"
@@ -629,6 +1136,13 @@ async def check_and_submit_prediction(ctx: Context):
         ctx.logger.info(f"  Will submit using: {{AGENT_ADDRESS}}")
         ctx.logger.info("=" * 60)
         
+        # Warm the submission cache while we still have time to spare
+        if submit_account and not USE_RELAYER:
+            try:
+                prepare_submission()
+            except Exception as e:
+                ctx.logger.warning(f"WARNING: Could not prepare submission: {{e}}")
+        
         # Get current ETH price
         eth_price_data = fetch_pyth_hermes()
         if not eth_price_data:
@@ -637,14 +1151,14 @@ async def check_and_submit_prediction(ctx: Context):
         
         ctx.logger.info(f"Current ETH price: ${{eth_price_data['price']}}")
         
-        # Get AI prediction with MeTTa validation
-        predicted_price = get_ai_prediction(eth_price_data)
-        ctx.logger.info(f"AI Prediction (validated): ${{predicted_price}}")
-        
-        # Fetch analysis for dynamic deviation
+        # Fetch history once - shared by the predictor and the dynamic deviation
         history = fetch_agent_history()
         analysis = analyze_history(history)
         
+        # Get prediction from the configured strategy
+        predicted_price, strategy_used, elapsed_ms = predict_price(eth_price_data, history)
+        ctx.logger.info(f"Prediction ({{strategy_used}}, {{elapsed_ms:.1f}} ms): ${{predicted_price}}")
+        
         # FIX: DEVIATION SHOULD BE SMALL! Convert 10-99 to 1-9.9% max
         # Original deviation (10-99) becomes (1-9.9%) adjustment
         actual_deviation_percent = DEVIATION / 10.0  # 84 becomes 8.4%, 50 becomes 5%
@@ -704,8 +1218,8 @@ async def check_and_submit_prediction(ctx: Context):
                 remaining = stats['stats']['remaining']
                 
                 # Estimate gas cost (500k gas * current gas price)
-                gas_price = w3.eth.gas_price
-                estimated_cost = (500000 * gas_price) / 1e18
+                gas_price = submit_state["gas_price"] or w3.eth.gas_price
+                estimated_cost = (SUBMIT_GAS_LIMIT * gas_price) / 1e18
                 
                 ctx.logger.info(f"Remaining balance: {{remaining:.6f}} ETH")
                 ctx.logger.info(f"Estimated cost: {{estimated_cost:.6f}} ETH")
@@ -720,8 +1234,15 @@ async def check_and_submit_prediction(ctx: Context):
         except Exception as e:
             ctx.logger.warning(f"WARNING: Gas balance check failed: {{e}}, proceeding anyway")
         
-        # Submit to blockchain
-        tx_hash = submit_prediction_onchain(ctx, AGENT_ADDRESS, adjusted_price)
+        # Submit to blockchain (via the relayer, or locally if it cannot be reached)
+        if USE_RELAYER:
+            try:
+                tx_hash = submit_prediction_via_relayer(ctx, AGENT_ADDRESS, round_id, adjusted_price)
+            except httpx.HTTPError as e:
+                ctx.logger.warning(f"WARNING: Relayer unreachable ({{e}}), signing locally")
+                tx_hash = submit_prediction_onchain(ctx, AGENT_ADDRESS, adjusted_price)
+        else:
+            tx_hash = submit_prediction_onchain(ctx, AGENT_ADDRESS, adjusted_price)
         if tx_hash:
             ctx.logger.info(f"Prediction submitted! TX: {{tx_hash}}")
         else:
@@ -733,6 +1254,17 @@ async def check_and_submit_prediction(ctx: Context):
         ctx.logger.error(traceback.format_exc())
 
 
+@agent.on_interval(period=5.0)
+async def sample_price_ticks(ctx: Context):
+    \"\"\"Keep the tick window warm for the local predictor\"\"\"
+    if PREDICTOR == "llm":
+        return
+    if USE_BACKEND_TICKS:
+        load_backend_ticks()
+    else:
+        fetch_pyth_hermes()
+
+
 @protocol.on_message(ChatMessage)
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     ctx.logger.info(f"[CHAT] Received message from {{sender}}")
@@ -906,28 +1438,34 @@ Your response MUST include:
 
 Format your response with clear sections using markdown.\"\"\"
 
-            ctx.logger.info("[CHAT] Calling AI model...")
-            
-            try:
-                r = client.chat.completions.create(
-                    model="asi1-fast",
-                    messages=[
-                        {{"role": "system", "content": system_prompt}},
-                        {{"role": "user", "content": text}},
-                    ],
-                    max_tokens=2048,
-                )
-                
-                if r and r.choices and len(r.choices) > 0 and r.choices[0].message:
-                    prediction_response = str(r.choices[0].message.content)
-                    ctx.logger.info(f"[CHAT] AI response received: {{len(prediction_response)}} chars")
-                else:
-                    ctx.logger.warning("[CHAT] Empty or invalid AI response")
-                    prediction_response = None
+            def complete():
+                ctx.logger.info("[CHAT] Calling AI model...")
+                try:
+                    r = client.chat.completions.create(
+                        model="asi1-fast",
+                        messages=[
+                            {{"role": "system", "content": system_prompt}},
+                            {{"role": "user", "content": text}},
+                        ],
+                        max_tokens=2048,
+                    )
                     
-            except Exception as ai_error:
-                ctx.logger.error(f"[CHAT] AI call failed: {{str(ai_error)}}")
-                prediction_response = None
+                    if r and r.choices and len(r.choices) > 0 and r.choices[0].message:
+                        reply = str(r.choices[0].message.content)
+                        ctx.logger.info(f"[CHAT] AI response received: {{len(reply)}} chars")
+                        return reply
+                    ctx.logger.warning("[CHAT] Empty or invalid AI response")
+                        
+                except Exception as ai_error:
+                    ctx.logger.error(f"[CHAT] AI call failed: {{str(ai_error)}}")
+                return None
+
+            # Keyed by the question, timeframe, price bucket and the latest scored round (the analysis snapshot)
+            recent = analysis['recent_predictions']
+            question = hashlib.sha256(" ".join(text.lower().split()).encode()).hexdigest()
+            cache_key = (question, timeframe, int(curr_price // CHAT_PRICE_BUCKET), recent[-1]['round'] if recent else 0)
+            prediction_response = await reply_cache.get(cache_key, complete)
+            ctx.logger.info(f"[CHAT] Reply cache: {{reply_cache.stats}}")
             
             # Fallback if AI fails
             if not prediction_response or len(prediction_response.strip()) < 10:
@@ -1084,7 +1622,8 @@ async def create_agent(agent_details: AgentDetails):
         agent_code = get_eth_prediction_agent_code(
             agent_details.name, 
             agent_details.agent_seed or "default_seed",
-            agent_details.deviation
+            agent_details.deviation,
+            agent_details.predictor
         )
         code_payload = json.dumps([{
             "id": 0,
@@ -1126,6 +1665,21 @@ async def create_agent(agent_details: AgentDetails):
         
         # Step 5: Register agent on-chain
         onchain_result = await register_onchain(agent_address, agent_details.agentverse_api_key)
+
+        # Step 6: Track it in the fleet registry (health monitoring, code rollouts)
+        registry = await asyncio.to_thread(get_fleet_registry)
+        await asyncio.to_thread(
+            registry.register,
+            agent_address,
+            agent_details.name,
+            agent_details.agent_seed or "default_seed",
+            agent_details.deviation,
+            agent_details.predictor,
+            agent_details.wallet_address,
+            agent_details.agentverse_api_key,
+            code_hash(agent_code),
+            replace=True  # Agentverse just accepted this key for the agent's code upload and start
+        )
         
         return {
             "status": "success",
@@ -1135,6 +1689,209 @@ async def create_agent(agent_details: AgentDetails):
             "onchain_registration": onchain_result
         }
 
+# Fleet Registry / Health
+#
+# Every deployed agent is recorded with the parameters its code was rendered from. The
+# monitor polls Agentverse for each one and cross-checks its last indexed
+# PredictionSubmitted, so crashed, stopped or silent agents show up as alerts.
+
+# Holds agent seeds and Agentverse API keys, so it lives outside the working tree by default
+FLEET_DB = os.getenv("FLEET_DB", str(Path.home() / ".proof-of-intelligence" / "fleet.db"))
+
+fleet_registry = None
+fleet_monitor = None
+
+def get_fleet_registry() -> FleetRegistry:
+    """Registry database (opened on first use, owner-only permissions)"""
+    global fleet_registry
+    with clients_lock:
+        if fleet_registry is None:
+            fleet_registry = FleetRegistry(Path(FLEET_DB))
+    return fleet_registry
+
+def fleet_submissions() -> Optional[Dict]:
+    """Latest indexed round and every agent's last submitted round (None without an indexer)"""
+    if not CONTRACT_ADDRESS:
+        return None
+    store = get_chain_indexer().store
+    latest = store.query("SELECT MAX(round_id) AS round_id FROM rounds")
+    rows = store.query(
+        "SELECT agent_address, MAX(round_id) AS last_round, MAX(chain_block) AS last_block "
+        "FROM predictions GROUP BY agent_address"
+    )
+    return {
+        "latest_round": latest[0]["round_id"] if latest else None,
+        "agents": {row["agent_address"]: row for row in rows}
+    }
+
+def get_fleet_monitor() -> FleetMonitor:
+    """Health monitor over the registry (created on first use)"""
+    global fleet_monitor
+    with clients_lock:
+        if fleet_monitor is None:
+            fleet_monitor = FleetMonitor(get_fleet_registry(), AGENTVERSE_BASE_URL, fleet_submissions)
+    return fleet_monitor
+
+async def run_fleet_monitor():
+    monitor = await asyncio.to_thread(get_fleet_monitor)
+    await monitor.run()
+
+class FleetAgent(BaseModel):
+    agent_address: str
+    agentverse_api_key: str
+    name: str
+    agent_seed: str  # the seed the agent was created with; rollouts re-render its code from it
+    wallet_address: str
+    deviation: int = 50
+    predictor: PredictorName = "ensemble"
+
+async def agentverse_controls(agent_address: str, api_key: str) -> bool:
+    """Whether Agentverse serves this hosted agent to the given API key"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            response = await client.get(
+                f"{AGENTVERSE_BASE_URL}/hosting/agents/{agent_address}",
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+        except httpx.HTTPError:
+            raise HTTPException(status_code=502, detail="Could not reach Agentverse to verify the agent")
+    return response.status_code == 200
+
+@app.post("/fleet/agents")
+async def register_fleet_agent(agent: FleetAgent):
+    """Track an agent deployed before the registry existed (or outside POST /agent)
+
+    The Agentverse API key must own the hosted agent; that proof also allows replacing
+    an existing row (e.g. after a key rotation).
+    """
+    if not await agentverse_controls(agent.agent_address, agent.agentverse_api_key):
+        raise HTTPException(status_code=403, detail="Agentverse API key does not control this agent")
+    registry = await asyncio.to_thread(get_fleet_registry)
+    await asyncio.to_thread(
+        registry.register,
+        agent.agent_address,
+        agent.name,
+        agent.agent_seed,
+        agent.deviation,
+        agent.predictor,
+        agent.wallet_address,
+        agent.agentverse_api_key,
+        replace=True
+    )
+    return {
+        "status": "success",
+        "agent_address": agent.agent_address
+    }
+
+@app.delete("/fleet/agents/{agent_address}")
+async def remove_fleet_agent(agent_address: str, request: Request):
+    """Stop tracking an agent; the X-Agentverse-Key header must match the registered key"""
+    api_key = request.headers.get("x-agentverse-key")
+    if not api_key:
+        raise HTTPException(status_code=401, detail="X-Agentverse-Key header is required")
+    registry = await asyncio.to_thread(get_fleet_registry)
+    agent = await asyncio.to_thread(registry.get, agent_address)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not in fleet registry")
+    if not hmac.compare_digest(agent["api_key"].encode(), api_key.encode()):
+        raise HTTPException(status_code=403, detail="X-Agentverse-Key does not match the registered agent")
+    await asyncio.to_thread(registry.remove, agent_address)
+    return {
+        "status": "success",
+        "agent_address": agent_address
+    }
+
+@app.get("/fleet/health")
+async def get_fleet_health(state: Optional[str] = None, limit: int = 100, offset: int = 0):
+    """Agents per health state, staleness / crash alerts and a page of per-agent health"""
+    if state is not None and state not in FLEET_STATES:
+        raise HTTPException(status_code=400, detail=f"state must be one of {FLEET_STATES}")
+    return {
+        "status": "success",
+        **(await asyncio.to_thread(get_fleet_monitor)).summary(state, min(limit, 1000), offset)
+    }
+
+@app.get("/fleet/agents/{agent_address}")
+async def get_fleet_agent(agent_address: str):
+    """One agent's deployment parameters (without its API key) and health"""
+    agent = await asyncio.to_thread(lambda: get_fleet_registry().get(agent_address))
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not in fleet registry")
+    agent.pop("api_key")
+    return {
+        "status": "success",
+        "agent": agent,
+        "health": get_fleet_monitor().view(agent_address)
+    }
+
+# Fleet Code Rollout
+#
+# After get_eth_prediction_agent_code changes, deployed agents still run the code they were
+# created with. A rollout re-renders each agent's code from its registry parameters and
+# redeploys it: canaries first, then the rest once the canaries are submitting again.
+
+def render_agent_code(agent: Dict) -> str:
+    return get_eth_prediction_agent_code(agent["name"], agent["seed"], agent["deviation"], agent["predictor"])
+
+fleet_rollout = None
+
+def get_fleet_rollout_runner() -> FleetRollout:
+    """Rollout runner over the registry and monitor (created on first use)"""
+    global fleet_rollout
+    with clients_lock:
+        if fleet_rollout is None:
+            fleet_rollout = FleetRollout(get_fleet_registry(), get_fleet_monitor(), AGENTVERSE_BASE_URL, render_agent_code)
+    return fleet_rollout
+
+class RolloutRequest(BaseModel):
+    parallelism: int = ROLLOUT_PARALLELISM
+    canary_percent: float = ROLLOUT_CANARY_PERCENT
+    agent_addresses: Optional[List[str]] = None  # default: the whole fleet
+    force: bool = False  # redeploy agents whose code is already current
+
+@app.post("/fleet/rollout")
+async def start_fleet_rollout(request: RolloutRequest):
+    """Redeploy every out-of-date agent with freshly rendered code"""
+    rollout = await asyncio.to_thread(get_fleet_rollout_runner)
+    if rollout.running():
+        raise HTTPException(status_code=409, detail="A rollout is already in progress")
+    if not 1 <= request.parallelism <= 100:
+        raise HTTPException(status_code=400, detail="parallelism must be between 1 and 100")
+    if not 0 <= request.canary_percent <= 100:
+        raise HTTPException(status_code=400, detail="canary_percent must be between 0 and 100")
+    agents = await asyncio.to_thread(rollout.plan, request.agent_addresses, request.force)
+    if not agents:
+        return {
+            "status": "success",
+            "message": "All agents are running the current code"
+        }
+    rollout.start(agents, request.parallelism, request.canary_percent)
+    return {
+        "status": "success",
+        "rollout": rollout.view()
+    }
+
+@app.get("/fleet/rollout")
+async def get_fleet_rollout():
+    """Progress of the current (or last) rollout"""
+    rollout = await asyncio.to_thread(get_fleet_rollout_runner)
+    return {
+        "status": "success",
+        "rollout": rollout.view()
+    }
+
+@app.post("/fleet/rollout/halt")
+async def halt_fleet_rollout():
+    """Stop the in-flight rollout; POST /fleet/rollout again later resumes where it left off"""
+    rollout = await asyncio.to_thread(get_fleet_rollout_runner)
+    if not rollout.running():
+        raise HTTPException(status_code=409, detail="No rollout in progress")
+    rollout.halt("halted by operator")
+    return {
+        "status": "success",
+        "rollout": rollout.view()
+    }
+
 # Gas Tracking API Endpoints
 
 class GasDepositRequest(BaseModel):
@@ -1200,7 +1957,9 @@ async def get_all_gas_summary():
             "staked": data["staked"],
             "spent": data["spent"],
             "remaining": data["remaining"],
-            "tx_count": len(data["transactions"]),
+            "tx_count": len(data["transactions"]) + data.get("compacted", 0),
+            "verified_count": data.get("verified_through", 0) + data.get("compacted", 0),
+            "mismatches": data.get("mismatches", 0),
             "created_at": data.get("created_at", "N/A")
         })
     
@@ -1209,5 +1968,890 @@ async def get_all_gas_summary():
         "agents": summary
     }
 
+# Gas Reconciliation
+#
+# Reported gas is provisional: a background job checks every new ledger entry against its
+# receipt, corrects spent / remaining and flags entries that disagree with the chain.
+# Another rolls settled entries past the retention horizon into hourly / daily summaries.
+
+gas_reconciler = None
+
+def get_gas_reconciler() -> "GasReconciler":
+    """Reconciler on the shared RPC pool (created on first use)"""
+    global gas_reconciler
+    with clients_lock:
+        if gas_reconciler is None:
+            from gas_ledger import GasReconciler
+
+            gas_reconciler = GasReconciler(get_w3(), get_gas_ledger(), get_gas_tx_log())
+    return gas_reconciler
+
+async def run_gas_reconciler():
+    reconciler = await asyncio.to_thread(get_gas_reconciler)
+    await reconciler.run()
+
+async def run_gas_compactor():
+    compactor = await asyncio.to_thread(get_gas_compactor)
+    await compactor.run()
+
+@app.post("/internal/reconcile-gas")
+async def reconcile_gas():
+    """Run a reconciliation pass now instead of waiting for the next scheduled one"""
+    reconciler = await asyncio.to_thread(get_gas_reconciler)
+    try:
+        summary = await asyncio.to_thread(reconciler.reconcile_once)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Reconciliation failed: {e}")
+    return {
+        "status": "success",
+        "pass": summary
+    }
+
+gas_analytics = None
+
+def get_gas_analyzer() -> "GasAnalytics":
+    """Vectorized spend analytics over the transaction log (created on first use)"""
+    global gas_analytics
+    with clients_lock:
+        if gas_analytics is None:
+            from gas_analytics import GasAnalytics
+
+            gas_analytics = GasAnalytics(get_gas_tx_log(), get_gas_ledger())
+    return gas_analytics
+
+@app.get("/agents/gas-analytics")
+async def get_gas_analytics(bucket: str = "hour", days: int = 7):
+    """Fleet spend per hour/day, per-agent gas percentiles and projected runway (reconciled transactions)"""
+    if bucket not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="bucket must be 'hour' or 'day'")
+    return {
+        "status": "success",
+        **await asyncio.to_thread(lambda: get_gas_analyzer().get(bucket, min(max(days, 1), 366)))
+    }
+
+@app.get("/agents/gas-compaction")
+async def get_gas_compaction():
+    """Ledger compaction counters and the last pass"""
+    return {
+        "status": "success",
+        "horizon_days": GAS_COMPACT_HORIZON_DAYS,
+        **(await asyncio.to_thread(get_gas_compactor)).stats
+    }
+
+@app.get("/agents/gas-reconciliation")
+async def get_gas_reconciliation():
+    """Reconciliation progress, counters and recent mismatches"""
+    reconciler = await asyncio.to_thread(get_gas_reconciler)
+    return {
+        "status": "success",
+        **reconciler.status()
+    }
+
+# Prediction Relayer
+#
+# Agents sign an intent with their Agentverse identity and the backend submits it from a
+# single account, so nonces are assigned in exactly one place instead of every agent racing
+# on get_transaction_count(..., 'pending') with the same key.
+
+RELAY_GAS_LIMIT = 500000
+RELAY_GAS_PRICE_TTL = 30  # seconds
+RELAY_ROUND_TTL = 2  # seconds
+
+class RelayIntent(BaseModel):
+    agent_address: str
+    round_id: int
+    predicted_price: int  # ×1e8, as stored on-chain
+    signature: str
+
+def relay_intent_digest(agent_address: str, round_id: int, predicted_price: int) -> bytes:
+    """Digest the agent signs; binds the intent to this contract and round"""
+    message = f"poi-relay:{CONTRACT_ADDRESS}:{agent_address}:{round_id}:{predicted_price}"
+    return hashlib.sha256(message.encode()).digest()
+
+def verify_relay_intent(intent: RelayIntent) -> bool:
+    """Check the intent was signed by the agent's own Agentverse identity"""
+    from uagents.crypto import Identity
+
+    digest = relay_intent_digest(intent.agent_address, intent.round_id, intent.predicted_price)
+    try:
+        return Identity.verify_digest(intent.agent_address, digest, intent.signature)
+    except Exception:
+        return False
+
+registered_agents = set()  # agents seen registered on-chain (registration is permanent)
+
+def is_registered_agent(agent_address: str) -> bool:
+    """Whether the contract has the agent registered (positive answers are cached)"""
+    if agent_address not in registered_agents:
+        if not get_poi_contract().functions.getAgent(agent_address).call()[0]:
+            return False
+        registered_agents.add(agent_address)
+    return True
+
+def read_current_round() -> Dict:
+    """Current round id, submission deadline and finalized flag, read at one block"""
+    head = get_w3().eth.block_number
+    contract = get_poi_contract()
+    round_id = contract.functions.currentPredictionRound().call(block_identifier=head)
+    fields = contract.functions.predictionRounds(round_id).call(block_identifier=head)
+    return {"round_id": round_id, "deadline": fields[2], "finalized": fields[4]}
+
+class Relayer:
+    """Single sender for agent predictions: serialized nonces, pipelined sends, async receipts"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.account = None
+        self.nonce: Optional[int] = None
+        self.gas_price: Optional[int] = None
+        self.gas_price_at = 0.0
+        self.round: Optional[Dict] = None
+        self.round_at = 0.0
+        self.submitted: Dict[tuple, str] = {}  # (agent, round) -> tx hash
+        self.pending: Dict[str, Dict] = {}  # tx hash -> agent + send info
+        self.stats = {"sent": 0, "confirmed": 0, "failed": 0, "expired": 0, "nonce_resyncs": 0}
+
+    async def current_round(self) -> Dict:
+        if self.round is None or time.monotonic() - self.round_at > RELAY_ROUND_TTL:
+            self.round = await asyncio.to_thread(read_current_round)
+            self.round_at = time.monotonic()
+        return self.round
+
+    async def check(self, intent: RelayIntent):
+        """Reject intents submitPrediction would revert on, before paying for them"""
+        current = await self.current_round()
+        if intent.round_id != current["round_id"]:
+            raise HTTPException(status_code=409, detail=f"Round #{intent.round_id} is not the current round")
+        if current["finalized"] or time.time() > current["deadline"]:
+            raise HTTPException(status_code=409, detail=f"Round #{intent.round_id} is closed for submissions")
+        if not await asyncio.to_thread(is_registered_agent, intent.agent_address):
+            raise HTTPException(status_code=403, detail="Agent is not registered on-chain")
+
+    async def _next_nonce(self) -> int:
+        """Assign the next nonce (caller holds the lock)"""
+        if self.nonce is None:
+            self.nonce = await asyncio.to_thread(get_w3().eth.get_transaction_count, self.account.address, 'pending')
+        nonce = self.nonce
+        self.nonce += 1
+        return nonce
+
+    async def _send(self, intent: RelayIntent) -> tuple:
+        """Sign and send the intent's transaction, returns (tx hash, nonce)"""
+        await self.check(intent)
+
+        data = get_poi_contract().encode_abi("submitPrediction", args=[intent.agent_address, intent.predicted_price])
+
+        for attempt in range(2):
+            # Only nonce assignment and signing are serialized; the sends themselves overlap
+            async with self.lock:
+                if self.gas_price is None or time.monotonic() - self.gas_price_at > RELAY_GAS_PRICE_TTL:
+                    self.gas_price = await asyncio.to_thread(lambda: get_w3().eth.gas_price)
+                    self.gas_price_at = time.monotonic()
+                nonce = await self._next_nonce()
+                signed = self.account.sign_transaction({
+                    'to': get_poi_contract().address,
+                    'data': data,
+                    'value': 0,
+                    'nonce': nonce,
+                    'gas': RELAY_GAS_LIMIT,
+                    'gasPrice': self.gas_price,
+                    'chainId': CHAIN_ID
+                })
+            try:
+                tx_hash = (await asyncio.to_thread(get_w3().eth.send_raw_transaction, signed.raw_transaction)).to_0x_hex()
+                break
+            except Exception as e:
+                async with self.lock:
+                    # Re-read the pending nonce so a burned nonce gets reused instead of leaving a gap
+                    self.nonce = None
+                    self.stats["nonce_resyncs"] += 1
+                if attempt == 0 and any(s in str(e).lower() for s in ('nonce', 'already known', 'replacement')):
+                    continue
+                self.stats["failed"] += 1
+                raise HTTPException(status_code=502, detail=f"Relay failed: {e}")
+        return tx_hash, nonce
+
+    async def submit(self, intent: RelayIntent) -> str:
+        if not RELAYER_PRIVATE_KEY:
+            raise HTTPException(status_code=503, detail="Relayer needs a dedicated RELAYER_PRIVATE_KEY")
+        if self.account is None:
+            self.account = get_w3().eth.account.from_key(RELAYER_PRIVATE_KEY)
+
+        key = (intent.agent_address, intent.round_id)
+        async with self.lock:
+            # Claimed before any await so a concurrent duplicate is rejected instead of sent
+            if key in self.submitted:
+                raise HTTPException(status_code=409, detail=f"Already relayed: {self.submitted[key]}")
+            self.submitted[key] = "pending"
+        try:
+            tx_hash, nonce = await self._send(intent)
+        except BaseException:
+            if self.submitted.get(key) == "pending":
+                del self.submitted[key]
+            raise
+
+        self.submitted[key] = tx_hash
+        self.pending[tx_hash] = {
+            "agent_address": intent.agent_address,
+            "round_id": intent.round_id,
+            "nonce": nonce,
+            "sent_at": time.time()
+        }
+        self.stats["sent"] += 1
+        loop = asyncio.get_running_loop()
+        receipts.track(tx_hash, callback=lambda receipt: loop.call_soon_threadsafe(self.on_receipt, tx_hash, receipt))
+
+        # Forget intents from rounds that can no longer be submitted
+        for old_key in [k for k in self.submitted if k[1] < intent.round_id - 1]:
+            del self.submitted[old_key]
+
+        return tx_hash
+
+    def on_receipt(self, tx_hash: str, receipt):
+        """Receipt tracker callback (on the event loop): settle the relay and record its gas"""
+        info = self.pending.pop(tx_hash, None)
+        if info is None:
+            return
+        if receipt is None:
+            # Expired unmined: nothing was spent, the agent's next intent gets a fresh send
+            self.stats["expired"] += 1
+            asyncio.create_task(self.on_expired(tx_hash, info))
+            return
+        if receipt['status'] == 1:
+            self.stats["confirmed"] += 1
+        else:
+            self.stats["failed"] += 1
+        record_gas_usage(info["agent_address"], tx_hash, receipt['gasUsed'], receipt['effectiveGasPrice'])
+
+    async def on_expired(self, tx_hash: str, info: Dict):
+        """Free a dropped transaction's nonce and its (agent, round) slot"""
+        async with self.lock:
+            # Later sends queue behind the dropped nonce; the 'pending' count refills the gap
+            self.nonce = None
+            self.stats["nonce_resyncs"] += 1
+            key = (info["agent_address"], info["round_id"])
+            if self.submitted.get(key) == tx_hash:
+                del self.submitted[key]
+
+relayer = Relayer()
+
+@app.post("/relay/prediction")
+async def relay_prediction(intent: RelayIntent):
+    """Submit an agent's signed prediction intent from the shared relayer account"""
+    if not verify_relay_intent(intent):
+        raise HTTPException(status_code=401, detail="Invalid intent signature")
+    from rpc import rpc_priority
+
+    with rpc_priority("agent"):
+        tx_hash = await relayer.submit(intent)
+    return {
+        "status": "success",
+        "tx_hash": tx_hash
+    }
+
+@app.get("/rpc/stats")
+async def rpc_stats():
+    """Per-endpoint latency, error rate and hedging counters, plus read cache hit rate"""
+    provider = (await asyncio.to_thread(get_w3)).provider
+    return {
+        **provider.stats(),
+        "cache": rpc_cache.stats(),
+        "receipts": receipts.stats()
+    }
+
+@app.get("/relay/stats")
+async def relay_stats():
+    """Relayer throughput and backlog"""
+    return {
+        "relayer_address": relayer.account.address if relayer.account else None,
+        "next_nonce": relayer.nonce,
+        "pending": len(relayer.pending),
+        **relayer.stats
+    }
+
+# LLM Gateway
+#
+# Agents send their asi1-fast completions here instead of to ASI:One. Within a round most
+# prompts are identical (same price and EMA), so the fleet's upstream calls collapse to
+# roughly the number of distinct prompts. OpenAI-compatible: agents only change base_url.
+
+LLM_SIGNATURE_WINDOW = 60  # seconds a signed gateway request is accepted for
+
+llm_gateway = LLMGateway(ASI_ONE_API_KEY)
+llm_nonces: Dict[str, float] = {}  # nonce -> when it can be forgotten
+
+def llm_request_digest(agent_address: str, timestamp: str, nonce: str, body: bytes) -> bytes:
+    """Digest the agent signs; binds the request body to one moment and one use"""
+    message = f"poi-llm:{agent_address}:{timestamp}:{nonce}:{hashlib.sha256(body).hexdigest()}"
+    return hashlib.sha256(message.encode()).digest()
+
+def verify_llm_request(agent_address: str, timestamp: str, nonce: str, signature: str, body: bytes) -> bool:
+    """Check a gateway request is fresh, unseen and signed by the agent's own identity"""
+    from uagents.crypto import Identity
+
+    now = time.time()
+    try:
+        if abs(now - int(timestamp)) > LLM_SIGNATURE_WINDOW:
+            return False
+    except ValueError:
+        return False
+    # Nonces are stored in expiry order, so only the oldest need checking
+    while llm_nonces and next(iter(llm_nonces.values())) < now:
+        del llm_nonces[next(iter(llm_nonces))]
+    if nonce in llm_nonces:
+        return False
+    try:
+        valid = Identity.verify_digest(agent_address, llm_request_digest(agent_address, timestamp, nonce, body), signature)
+    except Exception:
+        return False
+    if valid:
+        llm_nonces[nonce] = now + 2 * LLM_SIGNATURE_WINDOW
+    return valid
+
+@app.post("/llm/v1/chat/completions")
+async def llm_chat_completion(request: Request):
+    """Chat completion for a registered agent, signed with its identity (X-Agent-* headers)"""
+    agent_address = request.headers.get("x-agent-address")
+    timestamp = request.headers.get("x-agent-timestamp")
+    nonce = request.headers.get("x-agent-nonce")
+    signature = request.headers.get("x-agent-signature")
+    if not (agent_address and timestamp and nonce and signature):
+        raise HTTPException(status_code=401, detail="Signed X-Agent-* headers are required")
+    raw = await request.body()
+    if not verify_llm_request(agent_address, timestamp, nonce, signature, raw):
+        raise HTTPException(status_code=401, detail="Invalid or expired agent signature")
+    # On-chain registration, not the fleet registry: that also covers agents deployed before it
+    if not await asyncio.to_thread(is_registered_agent, agent_address):
+        raise HTTPException(status_code=403, detail="Agent is not registered on-chain")
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    if not isinstance(body, dict) or not body.get("messages"):
+        raise HTTPException(status_code=400, detail="messages is required")
+    try:
+        return await llm_gateway.complete(agent_address, body)
+    except AgentBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except LLMUpstreamError as e:
+        raise HTTPException(status_code=502, detail=f"LLM upstream failed: {e}")
+
+@app.get("/llm/stats")
+async def llm_stats(agent_address: Optional[str] = None):
+    """Gateway cache / coalescing hit rates, token usage and latency (optionally for one agent)"""
+    if agent_address is not None:
+        if agent_address not in llm_gateway.agents:
+            raise HTTPException(status_code=404, detail="No LLM requests from this agent")
+        return {
+            "status": "success",
+            "agent_address": agent_address,
+            **llm_gateway.agents[agent_address]
+        }
+    return {
+        "status": "success",
+        **llm_gateway.summary()
+    }
+
+# Price Ticks
+#
+# One Hermes stream subscription feeds a fixed-size ring buffer of ETH/USD ticks, so agents
+# and the frontend get a short price history (and OHLC windows) without polling Hermes.
+
+hermes_stream = None
+
+def get_hermes_stream() -> "HermesStream":
+    """Hermes subscription and the tick buffer it feeds (created on first use)"""
+    global hermes_stream
+    with clients_lock:
+        if hermes_stream is None:
+            from price_ticks import HermesStream, TickBuffer
+            hermes_stream = HermesStream(TickBuffer(), HERMES_URL)
+    return hermes_stream
+
+async def run_hermes_stream():
+    stream = await asyncio.to_thread(get_hermes_stream)
+    await stream.run()
+
+@app.get("/prices/ticks")
+async def get_price_ticks(n: int = 100):
+    """The newest n ticks as columns (publish_time, price, conf, ema), oldest first"""
+    stream = await asyncio.to_thread(get_hermes_stream)
+    price_ticks = stream.buffer
+    if not 1 <= n <= price_ticks.capacity:
+        raise HTTPException(status_code=400, detail=f"n must be between 1 and {price_ticks.capacity}")
+    return {
+        "status": "success",
+        **price_ticks.last(n),
+        "stream": stream.status()
+    }
+
+@app.get("/prices/ohlc")
+async def get_price_ohlc(interval: int = 60, limit: int = 60):
+    """Open/high/low/close per interval seconds for the newest limit windows"""
+    from price_ticks import OHLC_MAX_WINDOWS
+
+    if interval < 1:
+        raise HTTPException(status_code=400, detail="interval must be at least 1 second")
+    if not 1 <= limit <= OHLC_MAX_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {OHLC_MAX_WINDOWS}")
+    return {
+        "status": "success",
+        "interval": interval,
+        "candles": await asyncio.to_thread(lambda: get_hermes_stream().buffer.ohlc(interval, limit))
+    }
+
+# Live Round Snapshot
+#
+# The live page needs the current round, its participants, their predictions and agent
+# stats. Everything is read pinned to one chain block with two JSON-RPC batches (round +
+# participants, then predictions + every participant's agent record), and the document is
+# shared by all viewers until the head moves.
+
+LIVE_ROUND_HEAD_TTL = 1.0  # seconds between eth_blockNumber checks
+
+class LiveRoundCache:
+    """Live round document, rebuilt at most once per chain block"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.snapshot: Optional[Dict] = None
+        self.head: Optional[int] = None
+        self.head_checked_at = 0.0
+        self.stats = {"requests": 0, "builds": 0}
+
+    def build(self, block_number: int) -> Dict:
+        """Read the live round at block_number"""
+        contract = get_poi_contract()
+        with get_w3().batch_requests() as batch:
+            batch.add(contract.functions.currentPredictionRound().call(block_identifier=block_number))
+            batch.add(contract.functions.getCurrentRound().call(block_identifier=block_number))
+            try:
+                round_id, current = batch.execute()
+            except Exception:
+                # getCurrentRound reverts before the first round is started
+                if contract.functions.currentPredictionRound().call(block_identifier=block_number) == 0:
+                    return {"block_number": block_number, "round": None, "participants": [], "predictions": []}
+                raise
+
+        participants = list(current[7])
+        with get_w3().batch_requests() as batch:
+            batch.add(contract.functions.getRoundPredictions(round_id).call(block_identifier=block_number))
+            for agent_address in participants:
+                batch.add(contract.functions.getAgent(agent_address).call(block_identifier=block_number))
+            results = batch.execute()
+
+        _, predictions = results[0]
+        predictions_data = []
+        for prediction, agent_data in zip(predictions, results[1:]):
+            total_guesses, best_guesses = agent_data[2], agent_data[3]
+            predictions_data.append({
+                "agent_address": prediction[0],
+                "agent_wallet": agent_data[1],
+                "predicted_price": prediction[1],
+                "timestamp": prediction[2],
+                "submitted": prediction[3],
+                "total_guesses": total_guesses,
+                "best_guesses": best_guesses,
+                "accuracy": agent_data[4],
+                "win_rate": (best_guesses / total_guesses * 100) if total_guesses > 0 else 0,
+                "last_guess_block": agent_data[5],
+                "deviation": agent_data[6]
+            })
+
+        return {
+            "block_number": block_number,
+            "round": {
+                "round_id": round_id,
+                "for_block_number": current[0],
+                "start_time": current[1],
+                "submission_deadline": current[2],
+                "prediction_count": current[3],
+                "finalized": current[4],
+                "winner_agent": current[5],
+                "actual_price": current[6]
+            },
+            "participants": participants,
+            "predictions": predictions_data
+        }
+
+    async def get(self) -> Dict:
+        """Snapshot for the latest block; concurrent callers share one build"""
+        self.stats["requests"] += 1
+        async with self.lock:
+            now = time.time()
+            if self.head is None or now - self.head_checked_at >= LIVE_ROUND_HEAD_TTL:
+                self.head = await asyncio.to_thread(lambda: get_w3().eth.block_number)
+                self.head_checked_at = now
+            if self.snapshot is None or self.snapshot["block_number"] != self.head:
+                self.snapshot = await asyncio.to_thread(self.build, self.head)
+                self.stats["builds"] += 1
+            return self.snapshot
+
+live_round_cache = LiveRoundCache()
+
+@app.get("/live-round")
+async def get_live_round():
+    """Current round, participants, predictions and agent stats in one document"""
+    if not CONTRACT_ADDRESS:
+        raise HTTPException(status_code=503, detail="CONTRACT_ADDRESS not set")
+    try:
+        snapshot = await live_round_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to read live round: {e}")
+
+    round_info = snapshot["round"]
+    if round_info is None:
+        status, time_remaining = "no-round", 0
+    else:
+        time_remaining = max(0, round_info["submission_deadline"] - int(time.time()))
+        if round_info["finalized"]:
+            status = "finalized"
+        elif time_remaining == 0:
+            status = "judging"
+        else:
+            status = "active"
+
+    return {
+        "status": "success",
+        **snapshot,
+        "round_status": status,
+        "time_remaining": time_remaining
+    }
+
+# Chain Indexer
+#
+# Tails ProofOfIntelligence events into SQLite so round/prediction/block history is served
+# from local indexed queries instead of contract reads on every request.
+
+INDEXER_DB = os.getenv("INDEXER_DB", "indexer.db")
+INDEXER_START_BLOCK = os.getenv("INDEXER_START_BLOCK")
+
+chain_indexer = None
+leaderboard = None
+
+def get_chain_indexer() -> "ChainIndexer":
+    """Indexer with the leaderboard and round stream attached (created on first use)"""
+    global chain_indexer, leaderboard
+    with clients_lock:
+        if chain_indexer is None:
+            from indexer import ChainIndexer
+            from leaderboard import Leaderboard
+
+            indexer = ChainIndexer(
+                get_w3(), CONTRACT_ADDRESS, Path(INDEXER_DB),
+                start_block=int(INDEXER_START_BLOCK) if INDEXER_START_BLOCK else None
+            )
+            leaderboard = Leaderboard(indexer)
+            leaderboard.rebuild()
+            indexer.subscribe(leaderboard.on_indexed)
+            indexer.subscribe(round_events.on_indexed)
+            chain_indexer = indexer
+    return chain_indexer
+
+async def run_chain_indexer():
+    """Open the index off the event loop, then tail the chain"""
+    indexer = await asyncio.to_thread(get_chain_indexer)
+    await indexer.run()
+
+def require_indexer() -> "ChainIndexer":
+    """Return the indexer or fail the request if no contract is configured"""
+    if not CONTRACT_ADDRESS:
+        raise HTTPException(status_code=503, detail="Indexer disabled: CONTRACT_ADDRESS not set")
+    return get_chain_indexer()
+
+@app.get("/indexer/status")
+async def indexer_status():
+    """Indexed block cursor and lag behind the chain head"""
+    indexer = await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        **indexer.status()
+    }
+
+@app.get("/rounds")
+async def list_rounds(limit: int = 50, before: Optional[int] = None):
+    """Indexed prediction rounds, newest first"""
+    indexer = await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        "rounds": await asyncio.to_thread(indexer.rounds, min(limit, 500), before)
+    }
+
+@app.get("/rounds/{round_id}")
+async def get_round(round_id: int):
+    """One indexed round with all of its predictions"""
+    indexer = await asyncio.to_thread(require_indexer)
+    round_info = await asyncio.to_thread(indexer.round, round_id)
+    if not round_info:
+        raise HTTPException(status_code=404, detail="Round not indexed")
+    return {
+        "status": "success",
+        "round": round_info
+    }
+
+@app.get("/rounds/{round_id}/predictions")
+async def get_round_predictions(round_id: int):
+    """Indexed predictions for a round, in submission order"""
+    indexer = await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        "predictions": await asyncio.to_thread(indexer.predictions, round_id)
+    }
+
+@app.get("/agents/{agent_address}/predictions")
+async def get_agent_predictions(agent_address: str, limit: int = 50):
+    """An agent's indexed predictions with their outcome, newest first"""
+    indexer = await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        "predictions": await asyncio.to_thread(indexer.agent_predictions, agent_address, min(limit, 500))
+    }
+
+@app.get("/blocks")
+async def list_blocks(limit: int = 50, before: Optional[int] = None):
+    """Indexed mined blocks, newest first"""
+    indexer = await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        "blocks": await asyncio.to_thread(indexer.blocks, min(limit, 500), before)
+    }
+
+# Block / Round History
+#
+# Mined blocks and finalized rounds never change, so they are served from a permanent
+# content-addressed cache and only gaps are read from chain.
+
+HISTORY_DB = os.getenv("HISTORY_DB", "history.db")
+HISTORY_MAX_RANGE = 500
+
+history_cache = None
+
+def require_history() -> "HistoryCache":
+    """Return the history cache (created on first use) or fail if no contract is configured"""
+    global history_cache
+    if not CONTRACT_ADDRESS:
+        raise HTTPException(status_code=503, detail="CONTRACT_ADDRESS not set")
+    with clients_lock:
+        if history_cache is None:
+            from history_cache import HistoryCache
+
+            round_struct = next(
+                entry for entry in json.loads(CONTRACT_ABI_JSON) if entry.get("name") == "getCurrentRound"
+            )["outputs"][0]
+            history_cache = HistoryCache(get_w3(), CONTRACT_ADDRESS, Path(HISTORY_DB), round_struct)
+    return history_cache
+
+def history_range(start: Optional[int], end: Optional[int], latest: int) -> tuple:
+    """Validate a history query: explicit start/end, or the latest N entries"""
+    if start is None and end is None:
+        return None, min(latest, HISTORY_MAX_RANGE)
+    if start is None or end is None or end < start:
+        raise HTTPException(status_code=400, detail="Pass both start and end (start <= end), or latest")
+    if end - start + 1 > HISTORY_MAX_RANGE:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {HISTORY_MAX_RANGE})")
+    return (start, end), None
+
+@app.get("/history/blocks")
+async def get_block_history(start: Optional[int] = None, end: Optional[int] = None, latest: int = 10):
+    """Mined blocks by range, or the latest N (oldest first, like getLatestBlocks)"""
+    history = await asyncio.to_thread(require_history)
+    block_range, count = history_range(start, end, latest)
+    try:
+        if block_range:
+            blocks = await asyncio.to_thread(history.blocks, *block_range)
+        else:
+            blocks = await asyncio.to_thread(history.latest_blocks, count)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to read blocks: {e}")
+    return {
+        "status": "success",
+        "current_block": history.heads["latest_block"],
+        "blocks": blocks
+    }
+
+@app.get("/history/rounds")
+async def get_round_history(start: Optional[int] = None, end: Optional[int] = None, latest: int = 10):
+    """Prediction rounds by range, or the latest N (oldest first)"""
+    history = await asyncio.to_thread(require_history)
+    round_range, count = history_range(start, end, latest)
+    try:
+        if round_range:
+            rounds = await asyncio.to_thread(history.rounds, *round_range)
+        else:
+            rounds = await asyncio.to_thread(history.latest_rounds, count)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to read rounds: {e}")
+    return {
+        "status": "success",
+        "current_round": history.heads["latest_round"],
+        "rounds": rounds
+    }
+
+@app.get("/history/stats")
+async def get_history_stats():
+    """Cache hits, misses, live reads and chain range calls"""
+    return (await asyncio.to_thread(require_history)).stats
+
+# Leaderboard
+#
+# The contract only tracks a top 10; the full ranking is kept off-chain and folded forward
+# from every finalized round the indexer sees.
+
+# Built and subscribed alongside the indexer in get_chain_indexer()
+
+@app.get("/leaderboard")
+async def get_leaderboard(limit: int = 10, offset: int = 0):
+    """Top agents by accuracy, then best guesses"""
+    await asyncio.to_thread(require_indexer)
+    return {
+        "status": "success",
+        "total_agents": leaderboard.size(),
+        "last_round": leaderboard.last_round,
+        "agents": leaderboard.top(max(0, min(limit, 500)), max(0, offset))
+    }
+
+@app.get("/leaderboard/{agent_address}")
+async def get_agent_rank(agent_address: str, window: int = 5):
+    """An agent's rank with its neighbours above and below"""
+    await asyncio.to_thread(require_indexer)
+    result = leaderboard.around(agent_address, max(0, min(window, 100)))
+    if not result:
+        raise HTTPException(status_code=404, detail="Agent has no finalized rounds")
+    return {
+        "status": "success",
+        "total_agents": leaderboard.size(),
+        **result
+    }
+
+# Round Event Stream
+#
+# Server-Sent Events fan-out of round lifecycle updates. The chain indexer is the only
+# upstream watcher; every client gets its own bounded queue so one slow reader cannot hold
+# up the others.
+
+SUBMISSION_WINDOW = 30  # ProofOfIntelligence.SUBMISSION_WINDOW
+STREAM_QUEUE_SIZE = 100  # events buffered per client before it is dropped
+STREAM_REPLAY_SIZE = 256  # recent events kept for Last-Event-ID resume
+STREAM_HEARTBEAT = 15.0  # seconds between keep-alive comments
+STREAM_MAX_LAG_BLOCKS = 30  # events further behind the head are backfill, not news
+
+STREAM_EVENT_NAMES = {
+    "PredictionRoundStarted": "round-started",
+    "PredictionSubmitted": "prediction-submitted",
+    "RoundFinalized": "finalized",
+    "Rollback": "reorg",
+}
+
+class RoundEventStream:
+    """Fans indexer events out to SSE clients"""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.clients: List[asyncio.Queue] = []
+        self.recent = deque(maxlen=STREAM_REPLAY_SIZE)
+        self.next_id = 1
+        self.finalized_rounds = set()
+        self.timers = set()  # pending deadline tasks, referenced until done
+        self.stats = {"published": 0, "dropped_clients": 0}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def on_indexed(self, name: str, payload: Dict):
+        """Indexer listener (runs on the indexer's worker thread)"""
+        event = STREAM_EVENT_NAMES.get(name)
+        if not event or not self.loop:
+            return
+        head = chain_indexer.head
+        if name != "Rollback" and head is not None and head - payload["chain_block"] > STREAM_MAX_LAG_BLOCKS:
+            return
+        self.loop.call_soon_threadsafe(self.publish, event, payload)
+        if name == "PredictionRoundStarted":
+            # Deadline is anchored to the start block's timestamp, read here off the event loop
+            started_at = get_w3().eth.get_block(payload["chain_block"])["timestamp"]
+            self.loop.call_soon_threadsafe(
+                self.schedule_deadline, payload["round_id"], started_at + SUBMISSION_WINDOW
+            )
+
+    def publish(self, event: str, payload: Dict):
+        if event == "finalized":
+            self.finalized_rounds = {r for r in self.finalized_rounds if r > payload["round_id"] - 100}
+            self.finalized_rounds.add(payload["round_id"])
+        message = (self.next_id, event, json.dumps(payload))
+        self.next_id += 1
+        self.recent.append(message)
+        self.stats["published"] += 1
+        for queue in list(self.clients):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Backpressure: drop the slow client, it resumes with Last-Event-ID
+                self.clients.remove(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                self.stats["dropped_clients"] += 1
+
+    def schedule_deadline(self, round_id: int, deadline: int):
+        async def fire():
+            await asyncio.sleep(max(0, deadline - time.time()))
+            if round_id not in self.finalized_rounds:
+                self.publish("deadline-reached", {"round_id": round_id, "submission_deadline": deadline})
+        task = asyncio.create_task(fire())
+        self.timers.add(task)
+        task.add_done_callback(self.timers.discard)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        if last_event_id is not None:
+            for message in self.recent:
+                if message[0] > last_event_id and not queue.full():
+                    queue.put_nowait(message)
+        self.clients.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.clients:
+            self.clients.remove(queue)
+
+round_events = RoundEventStream()
+
+@app.get("/events/rounds")
+async def stream_round_events(request: Request):
+    """Server-Sent Events: round-started, prediction-submitted, deadline-reached, finalized"""
+    await asyncio.to_thread(require_indexer)
+    last_event_id = request.headers.get("last-event-id")
+    queue = round_events.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+
+    async def event_source():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break  # Dropped for falling behind
+                event_id, event, data = message
+                yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+        finally:
+            round_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/events/stats")
+async def round_event_stats():
+    """Connected stream clients and fan-out counters"""
+    return {
+        "clients": len(round_events.clients),
+        **round_events.stats
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=3002)
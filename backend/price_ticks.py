@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict
+
+import httpx
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+ETH_USD_FEED_ID = "0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace"
+TICK_CAPACITY = 131072  # ticks kept (~36 h: publish_time has 1 s resolution), 4 MB of columns
+TICK_COLUMNS = {"publish_time": np.int64, "price": np.float64, "conf": np.float64, "ema": np.float64}
+OHLC_MAX_WINDOWS = 1440
+HERMES_RECONNECT_MIN = 1.0  # seconds before reconnecting a dropped stream (doubles per failure)
+HERMES_RECONNECT_MAX = 60.0
+HERMES_READ_TIMEOUT = 30.0  # a stream silent for this long is treated as dropped
+
+
+def parse_price_update(update: Dict) -> tuple:
+    """(publish_time, price, conf, ema) in USD from one parsed Hermes price update"""
+    price = update["price"]
+    ema = update["ema_price"]
+    scale = 10.0 ** int(price["expo"])
+    return (
+        int(price["publish_time"]),
+        int(price["price"]) * scale,
+        int(price["conf"]) * scale,
+        int(ema["price"]) * 10.0 ** int(ema["expo"]),
+    )
+
+
+class TickBuffer:
+    """Fixed-size ring buffer of price ticks, one NumPy array per column
+
+    Ticks are appended in publish_time order (older or repeated updates are dropped), so
+    the live region is always sorted and windows can be found with searchsorted.
+    """
+
+    def __init__(self, capacity: int = TICK_CAPACITY):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in TICK_COLUMNS.items()}
+        self.head = 0  # next write position
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def append(self, publish_time: int, price: float, conf: float, ema: float) -> bool:
+        with self.lock:
+            if self.count and publish_time <= self.columns["publish_time"][self.head - 1]:
+                return False
+            for name, value in zip(TICK_COLUMNS, (publish_time, price, conf, ema)):
+                self.columns[name][self.head] = value
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            return True
+
+    def _latest(self, n: int) -> Dict[str, np.ndarray]:
+        """Copies of the newest n ticks of every column, oldest first"""
+        with self.lock:
+            n = min(n, self.count)
+            index = (self.head - n + np.arange(n)) % self.capacity
+            return {name: column[index] for name, column in self.columns.items()}
+
+    def last(self, n: int) -> Dict[str, list]:
+        return {name: column.tolist() for name, column in self._latest(n).items()}
+
+    def ohlc(self, interval: int, limit: int) -> list:
+        """Open/high/low/close per `interval` seconds for the newest `limit` windows"""
+        ticks = self._latest(self.count)
+        times = ticks["publish_time"]
+        if not len(times):
+            return []
+        first_window = times[-1] // interval - limit + 1
+        ticks = {name: column[np.searchsorted(times, first_window * interval):] for name, column in ticks.items()}
+        windows, starts = np.unique(ticks["publish_time"] // interval, return_index=True)
+        ends = np.append(starts[1:], len(ticks["price"])) - 1
+        price = ticks["price"]
+        high = np.maximum.reduceat(price, starts)
+        low = np.minimum.reduceat(price, starts)
+        return [
+            {
+                "start": int(window * interval),
+                "open": float(price[s]),
+                "high": float(h),
+                "low": float(l),
+                "close": float(price[e]),
+                "ema": float(ticks["ema"][e]),
+                "conf": float(ticks["conf"][e]),
+                "ticks": int(e - s + 1),
+            }
+            for window, s, e, h, l in zip(windows, starts, ends, high, low)
+        ]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            latest = int(self.columns["publish_time"][self.head - 1]) if self.count else None
+            oldest = int(self.columns["publish_time"][(self.head - self.count) % self.capacity]) if self.count else None
+        return {"ticks": self.count, "capacity": self.capacity, "oldest_publish_time": oldest, "latest_publish_time": latest}
+
+
+class HermesStream:
+    """Feeds a TickBuffer from one Hermes server-sent event subscription, reconnecting on failure"""
+
+    def __init__(self, buffer: TickBuffer, hermes_url: str, feed_id: str = ETH_USD_FEED_ID):
+        self.buffer = buffer
+        self.url = f"{hermes_url}/v2/updates/price/stream"
+        self.feed_id = feed_id
+        self.connected = False
+        self.stats = {"received": 0, "appended": 0, "connects": 0, "errors": 0, "last_error": None}
+
+    def handle(self, data: str):
+        for update in json.loads(data).get("parsed", []):
+            self.stats["received"] += 1
+            if self.buffer.append(*parse_price_update(update)):
+                self.stats["appended"] += 1
+
+    async def run(self):
+        delay = HERMES_RECONNECT_MIN
+        timeout = httpx.Timeout(10.0, read=HERMES_READ_TIMEOUT)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            while True:
+                try:
+                    params = {"ids[]": self.feed_id, "parsed": "true", "encoding": "hex"}
+                    async with client.stream("GET", self.url, params=params) as response:
+                        response.raise_for_status()
+                        self.connected = True
+                        self.stats["connects"] += 1
+                        delay = HERMES_RECONNECT_MIN
+                        async for line in response.aiter_lines():
+                            if line.startswith("data:"):
+                                self.handle(line[len("data:"):].strip())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    self.stats["last_error"] = str(e) or type(e).__name__
+                    logger.warning("Hermes stream dropped: %s", self.stats["last_error"])
+                self.connected = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, HERMES_RECONNECT_MAX)
+
+    def status(self) -> Dict:
+        return {"connected": self.connected, **self.stats, **self.buffer.stats()}
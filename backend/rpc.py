@@ -0,0 +1,663 @@
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import requests
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+from web3.middleware import Web3Middleware
+from web3.providers.base import JSONBaseProvider
+
+
+# Shared RPC provider layer. Kept free of backend imports: main.py inlines this file into
+# the generated agent code, so agents get the same provider as the backend and the judge.
+
+RPC_TIMEOUT = 10.0  # seconds per HTTP request
+RPC_EWMA_ALPHA = 0.2  # weight of the newest sample in latency / error averages
+RPC_LATENCY_WINDOW = 100  # samples kept per endpoint for the hedge percentile
+RPC_HEDGE_PERCENTILE = 90  # a read slower than this percentile gets a second request
+RPC_HEDGE_MIN_DELAY = 0.05  # seconds; never hedge sooner than this
+RPC_HEDGE_DEFAULT_DELAY = 0.5  # seconds; used until an endpoint has enough samples
+RPC_PROBE_INTERVAL = 30.0  # seconds; an endpoint not measured for this long gets re-probed
+RPC_COOLDOWN = 2.0  # seconds an endpoint sits out after a failure (doubles per failure)
+RPC_MAX_COOLDOWN = 60.0
+RPC_RATE_LIMIT_CODES = {429, -32005}  # JSON-RPC error codes that mean "try another endpoint"
+RPC_WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+RPC_PRIORITIES = ["consensus", "judge", "agent", "analytics"]  # highest first
+RPC_CLASS_CONCURRENCY = {"consensus": 4, "judge": 8, "agent": 8, "analytics": 4}
+RPC_QUEUE_WINDOW = 500  # queue-time samples kept per class for percentiles
+RECEIPT_POLL_INTERVAL = 1.0  # seconds between head checks while transactions are outstanding
+RECEIPT_MAX_AGE = 600.0  # seconds before an unmined transaction is given up on
+RPC_CACHE_MAX_ENTRIES = 2048  # per BlockReadCache, least recently used evicted first
+RECEIPT_INT_FIELDS = {"blockNumber", "cumulativeGasUsed", "gasUsed", "effectiveGasPrice", "status",
+                      "transactionIndex", "type", "blobGasUsed", "blobGasPrice", "logIndex"}
+RECEIPT_BYTES_FIELDS = {"blockHash", "transactionHash", "logsBloom", "data", "root"}
+RECEIPT_ADDRESS_FIELDS = {"from", "to", "contractAddress", "address"}
+
+logger = logging.getLogger("rpc")
+RPC_CACHE_HEAD_TTL = 1.0  # seconds a head number is trusted before eth_blockNumber is re-read
+RPC_CACHED_METHODS = {"eth_call", "eth_gasPrice", "eth_blockNumber"}
+
+
+RPC_PRIORITY = contextvars.ContextVar("rpc_priority", default=None)
+
+
+@contextmanager
+def rpc_priority(name: str):
+    """Run the enclosed RPC calls in a scheduler class (also usable as a decorator)"""
+    if name not in RPC_PRIORITIES:
+        raise ValueError(f"Unknown RPC priority: {name}")
+    token = RPC_PRIORITY.set(name)
+    try:
+        yield
+    finally:
+        RPC_PRIORITY.reset(token)
+
+
+class RpcScheduler:
+    """Token bucket shared by all RPC traffic of a process, granted in priority order
+
+    Every request waits for a token; when several are waiting, the highest class whose
+    in-flight count is under its cap goes first, so consensus writes jump ahead of judge,
+    agent and analytics reads under rate limiting. A rate-limit answer from a provider
+    empties the bucket.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 concurrency: Optional[Dict[str, int]] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.concurrency = {**RPC_CLASS_CONCURRENCY, **(concurrency or {})}
+        self.condition = threading.Condition()
+        self.tokens = self.burst
+        self.refilled_at = time.monotonic()
+        self.waiting = []  # heap of (priority index, sequence, class)
+        self.sequence = itertools.count()
+        self.in_flight = {name: 0 for name in RPC_PRIORITIES}
+        self.granted = {name: 0 for name in RPC_PRIORITIES}
+        self.queue_times = {name: deque(maxlen=RPC_QUEUE_WINDOW) for name in RPC_PRIORITIES}
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def _next_eligible(self):
+        eligible = [w for w in self.waiting if self.in_flight[w[2]] < self.concurrency[w[2]]]
+        return min(eligible) if eligible else None
+
+    def acquire(self, name: str) -> float:
+        """Block until this class may send; returns the seconds spent queued"""
+        queued_at = time.monotonic()
+        ticket = (RPC_PRIORITIES.index(name), next(self.sequence), name)
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            while True:
+                self._refill()
+                if self._next_eligible() == ticket and self.tokens >= 1:
+                    break
+                wait_for = (1 - self.tokens) / self.rate if self.tokens < 1 else None
+                self.condition.wait(timeout=wait_for)
+            self.waiting.remove(ticket)
+            heapq.heapify(self.waiting)
+            self.tokens -= 1
+            self.in_flight[name] += 1
+            self.granted[name] += 1
+            waited = time.monotonic() - queued_at
+            self.queue_times[name].append(waited)
+            self.condition.notify_all()
+        return waited
+
+    def release(self, name: str):
+        with self.condition:
+            self.in_flight[name] -= 1
+            self.condition.notify_all()
+
+    def throttle(self):
+        """Provider said slow down: spend the bucket"""
+        with self.condition:
+            self._refill()
+            self.tokens = min(self.tokens, 0)
+            self.throttled += 1
+
+    def stats(self) -> Dict:
+        with self.condition:
+            classes = {}
+            for name in RPC_PRIORITIES:
+                samples = sorted(self.queue_times[name])
+                classes[name] = {
+                    "granted": self.granted[name],
+                    "in_flight": self.in_flight[name],
+                    "waiting": sum(1 for w in self.waiting if w[2] == name),
+                    "queue_ms_avg": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+                    "queue_ms_p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1) if samples else 0.0,
+                    "queue_ms_max": round(samples[-1] * 1000, 1) if samples else 0.0,
+                }
+            return {"rate": self.rate, "burst": self.burst, "throttled": self.throttled, "classes": classes}
+
+
+class RpcEndpointError(Exception):
+    """Transport failure, HTTP error or rate limit from one endpoint"""
+
+
+class RpcEndpoint:
+    """One upstream URL with its health and latency history"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.session = requests.Session()
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.latencies = deque(maxlen=RPC_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_sample = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self, now: float) -> float:
+        """Expected cost of a request: latency inflated by the recent error rate
+
+        Unmeasured or long-unused endpoints score 0 so they get probed once instead of
+        being starved by whichever endpoint happened to answer first.
+        """
+        if self.latency_ewma is None or now - self.last_sample > RPC_PROBE_INTERVAL:
+            return 0.0
+        return self.latency_ewma * (1 + 4 * self.error_ewma)
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < 10:
+            return RPC_HEDGE_DEFAULT_DELAY
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * RPC_HEDGE_PERCENTILE / 100))
+        return max(RPC_HEDGE_MIN_DELAY, ordered[index])
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.last_sample = time.time()
+        self.latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += RPC_EWMA_ALPHA * (latency - self.latency_ewma)
+        self.error_ewma *= 1 - RPC_EWMA_ALPHA
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.requests += 1
+        self.errors += 1
+        self.last_sample = time.time()
+        self.error_ewma += RPC_EWMA_ALPHA * (1 - self.error_ewma)
+        self.consecutive_failures += 1
+        cooldown = min(RPC_MAX_COOLDOWN, RPC_COOLDOWN * 2 ** (self.consecutive_failures - 1))
+        self.cooldown_until = time.time() + cooldown
+
+    def stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy(time.time()),
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_ewma, 3),
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class RpcPool(JSONBaseProvider):
+    """web3 provider over several RPC endpoints
+
+    Reads go to the healthiest, fastest endpoint; if the answer has not arrived by that
+    endpoint's latency percentile, the same request is hedged to the next endpoint and the
+    first answer wins. Failed endpoints cool down with exponential backoff. Signed writes
+    fail over too: resending the same raw transaction is idempotent, and an "already
+    known" answer after an ambiguous attempt means it went through.
+    """
+
+    def __init__(self, urls: List[str], timeout: float = RPC_TIMEOUT,
+                 scheduler: Optional[RpcScheduler] = None, default_priority: str = "agent", **kwargs):
+        super().__init__(**kwargs)
+        if not urls:
+            raise ValueError("RpcPool needs at least one endpoint")
+        self.endpoints = [RpcEndpoint(url) for url in urls]
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.default_priority = default_priority
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(urls)), thread_name_prefix="rpc")
+        self.pool_stats = {"reads": 0, "writes": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+
+    def __str__(self) -> str:
+        return f"RpcPool({', '.join(e.url for e in self.endpoints)})"
+
+    def ranked(self) -> List[RpcEndpoint]:
+        """Healthy endpoints fastest first, then cooling-down ones by soonest recovery"""
+        now = time.time()
+        with self.lock:
+            healthy = sorted((e for e in self.endpoints if e.healthy(now)), key=lambda e: e.score(now))
+            cooling = sorted((e for e in self.endpoints if not e.healthy(now)), key=lambda e: e.cooldown_until)
+        return healthy + cooling
+
+    def _post(self, endpoint: RpcEndpoint, body: bytes):
+        """One HTTP round trip; endpoint health is updated here"""
+        started = time.perf_counter()
+        try:
+            response = endpoint.session.post(
+                endpoint.url, data=body, timeout=self.timeout,
+                headers={"Content-Type": "application/json"}
+            )
+            if response.status_code == 429 and self.scheduler:
+                self.scheduler.throttle()
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RpcEndpointError(f"{endpoint.url}: HTTP {response.status_code}")
+            response.raise_for_status()
+            decoded = self.decode_rpc_response(response.content)
+            for item in decoded if isinstance(decoded, list) else [decoded]:
+                error = item.get("error") if isinstance(item, dict) else None
+                if isinstance(error, dict) and error.get("code") in RPC_RATE_LIMIT_CODES:
+                    if self.scheduler:
+                        self.scheduler.throttle()
+                    raise RpcEndpointError(f"{endpoint.url}: rate limited ({error.get('message')})")
+        except Exception as e:
+            with self.lock:
+                endpoint.record_failure()
+            if isinstance(e, RpcEndpointError):
+                raise
+            raise RpcEndpointError(f"{endpoint.url}: {e}") from e
+        with self.lock:
+            endpoint.record_success(time.perf_counter() - started)
+        return decoded
+
+    def _read(self, body: bytes):
+        """Send to the best endpoint, hedge once it is slow, fail over on errors"""
+        self.pool_stats["reads"] += 1
+        candidates = self.ranked()
+        primary = candidates[0]
+        pending = {self.executor.submit(self._post, primary, body): primary}
+        next_candidate = 1
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        while pending:
+            can_hedge = not hedged and next_candidate < len(candidates)
+            done, _ = wait(
+                pending,
+                timeout=primary.hedge_delay() if can_hedge else None,
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                # Primary is slower than its usual percentile: race the next endpoint
+                hedged = True
+                self.pool_stats["hedged"] += 1
+                endpoint = candidates[next_candidate]
+                next_candidate += 1
+                pending[self.executor.submit(self._post, endpoint, body)] = endpoint
+                continue
+
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if endpoint is not primary:
+                    self.pool_stats["hedge_wins" if hedged else "failovers"] += 1
+                return result
+
+            if not pending and next_candidate < len(candidates):
+                endpoint = candidates[next_candidate]
+                next_candidate += 1
+                pending[self.executor.submit(self._post, endpoint, body)] = endpoint
+
+        raise last_error or RpcEndpointError("No RPC endpoint available")
+
+    def _write(self, method: str, params, body: bytes):
+        """Send a transaction, failing over without double-submitting"""
+        self.pool_stats["writes"] += 1
+        ambiguous = False
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(self.ranked()):
+            try:
+                response = self._post(endpoint, body)
+            except Exception as e:
+                # The endpoint may or may not have forwarded the transaction
+                ambiguous = True
+                last_error = e
+                continue
+            if attempt:
+                self.pool_stats["failovers"] += 1
+            error = response.get("error") if isinstance(response, dict) else None
+            message = str(error.get("message", "")).lower() if isinstance(error, dict) else ""
+            if method == "eth_sendRawTransaction" and message:
+                tx_hash = Web3.keccak(hexstr=params[0]).to_0x_hex()
+                # "already known": our earlier attempt is in the mempool. "nonce too low" after an
+                # ambiguous failure only counts if the nonce went to our transaction, not another one
+                if ("already known" in message or "known transaction" in message
+                        or (ambiguous and "nonce too low" in message and self._transaction_exists(tx_hash))):
+                    return {"jsonrpc": "2.0", "id": response.get("id"), "result": tx_hash}
+            return response
+        raise last_error or RpcEndpointError("No RPC endpoint available")
+
+    def _transaction_exists(self, tx_hash: str) -> bool:
+        try:
+            response = self._read(self.encode_rpc_request("eth_getTransactionByHash", [tx_hash]))
+        except Exception:
+            return False
+        return isinstance(response, dict) and response.get("result") is not None
+
+    @contextmanager
+    def _scheduled(self):
+        if not self.scheduler:
+            yield
+            return
+        name = RPC_PRIORITY.get() or self.default_priority
+        self.scheduler.acquire(name)
+        try:
+            yield
+        finally:
+            self.scheduler.release(name)
+
+    def make_request(self, method, params):
+        body = self.encode_rpc_request(method, params)
+        with self._scheduled():
+            if method in RPC_WRITE_METHODS:
+                return self._write(method, params, body)
+            return self._read(body)
+
+    def make_batch_request(self, batch_requests):
+        body = self.encode_batch_rpc_request(batch_requests)
+        if any(method in RPC_WRITE_METHODS for method, _ in batch_requests):
+            raise ValueError("Transactions cannot be batched through RpcPool")
+        with self._scheduled():
+            response = self._read(body)
+        if not isinstance(response, list):
+            return response  # Whole-batch error object
+        return sorted(response, key=lambda r: r.get("id", 0))
+
+    def stats(self) -> Dict:
+        return {
+            **self.pool_stats,
+            "endpoints": [e.stats() for e in self.endpoints],
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+        }
+
+
+class BlockReadCache:
+    """Read results keyed by (block number, method, call data), shared by every request of a Web3
+
+    Calls against "latest" are keyed by the current head and dropped as soon as a new head
+    is seen; calls pinned to an explicit block stay until evicted. The head itself is
+    re-read at most every RPC_CACHE_HEAD_TTL seconds, sooner after this process sends a
+    transaction or sees a receipt from a newer block.
+    """
+
+    def __init__(self, max_entries: int = RPC_CACHE_MAX_ENTRIES, head_ttl: float = RPC_CACHE_HEAD_TTL):
+        self.max_entries = max_entries
+        self.head_ttl = head_ttl
+        self.lock = threading.Lock()
+        self.latest = OrderedDict()
+        self.pinned = OrderedDict()
+        self.chain_id = None
+        self.head: Optional[int] = None
+        self.head_checked_at = 0.0
+        self.counters = {"hits": 0, "misses": 0, "new_heads": 0, "evictions": 0}
+
+    def expire_head(self):
+        """Force the next cached read to re-check the head"""
+        with self.lock:
+            self.head_checked_at = 0.0
+
+    def observe_block(self, number: int):
+        """A response mentioned block `number`; anything older than it is stale"""
+        with self.lock:
+            if self.head is not None and number > self.head:
+                self.head_checked_at = 0.0
+
+    def current_head(self, make_request) -> int:
+        with self.lock:
+            if self.head is not None and time.time() - self.head_checked_at < self.head_ttl:
+                return self.head
+        response = make_request("eth_blockNumber", [])
+        head = int(response["result"], 16)
+        with self.lock:
+            if head != self.head:
+                self.latest.clear()
+                self.counters["new_heads"] += 1
+            self.head = head
+            self.head_checked_at = time.time()
+        return head
+
+    def get(self, store: OrderedDict, key):
+        with self.lock:
+            result = store.get(key)
+            if result is None:
+                self.counters["misses"] += 1
+                return None
+            store.move_to_end(key)
+            self.counters["hits"] += 1
+            return result
+
+    def put(self, store: OrderedDict, key, result):
+        with self.lock:
+            store[key] = result
+            while len(self.latest) + len(self.pinned) > self.max_entries:
+                (self.pinned if self.pinned else self.latest).popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self.latest) + len(self.pinned),
+            "head": self.head,
+        }
+
+
+class BlockCacheMiddleware(Web3Middleware):
+    """Serves eth_call / eth_gasPrice / eth_chainId / eth_blockNumber from a BlockReadCache"""
+
+    cache: BlockReadCache = None
+
+    def wrap_make_request(self, make_request):
+        cache = self.cache
+
+        def middleware(method, params):
+            if method == "eth_chainId":
+                if cache.chain_id is None:
+                    response = make_request(method, params)
+                    if "result" not in response:
+                        return response
+                    cache.chain_id = response
+                return cache.chain_id
+
+            if method not in RPC_CACHED_METHODS:
+                response = make_request(method, params)
+                if method in RPC_WRITE_METHODS:
+                    cache.expire_head()
+                elif method == "eth_getTransactionReceipt" and isinstance(response.get("result"), dict):
+                    cache.observe_block(int(response["result"]["blockNumber"], 16))
+                return response
+
+            head = cache.current_head(make_request)
+            if method == "eth_blockNumber":
+                return {"jsonrpc": "2.0", "id": 0, "result": hex(head)}
+
+            tag = params[1] if method == "eth_call" and len(params) > 1 else "latest"
+            if tag == "latest":
+                store, block = cache.latest, head
+            elif isinstance(tag, int) or (isinstance(tag, str) and tag.startswith("0x") and len(tag) < 20):
+                store, block = cache.pinned, int(tag, 16) if isinstance(tag, str) else tag
+            else:
+                return make_request(method, params)  # pending / safe / finalized / block hash
+
+            key = (block, method, json.dumps(params[0] if method == "eth_call" else None, sort_keys=True, default=str))
+            cached = cache.get(store, key)
+            if cached is not None:
+                return cached
+            response = make_request(method, params)
+            if "result" in response:
+                cache.put(store, key, response)
+            return response
+
+        return middleware
+
+
+def enable_block_cache(w3: Web3, max_entries: int = RPC_CACHE_MAX_ENTRIES) -> BlockReadCache:
+    """Install a block-scoped read cache on w3 and return it (for stats / expire_head)"""
+    cache = BlockReadCache(max_entries)
+    w3.middleware_onion.add(type("BlockCacheMiddleware", (BlockCacheMiddleware,), {"cache": cache}), "block_cache")
+    return cache
+
+
+def format_receipt(raw: Dict) -> AttributeDict:
+    """Decode a raw eth_getTransactionReceipt result the way w3.eth.get_transaction_receipt returns it"""
+    def decode(entry: Dict) -> Dict:
+        formatted = {}
+        for key, value in entry.items():
+            if value is None:
+                formatted[key] = value
+            elif key in RECEIPT_INT_FIELDS:
+                formatted[key] = int(value, 16)
+            elif key in RECEIPT_BYTES_FIELDS:
+                formatted[key] = HexBytes(value)
+            elif key in RECEIPT_ADDRESS_FIELDS:
+                formatted[key] = Web3.to_checksum_address(value)
+            elif key == "topics":
+                formatted[key] = [HexBytes(topic) for topic in value]
+            elif key == "logs":
+                formatted[key] = [decode(log) for log in value]
+            else:
+                formatted[key] = value
+        return formatted
+
+    return AttributeDict.recursive(decode(raw))
+
+
+class ReceiptTracker:
+    """Background resolver for outstanding transactions
+
+    Tracked hashes are looked up with a single JSON-RPC batch of eth_getTransactionReceipt
+    per new block (plus once right after being tracked), instead of one polling loop per
+    transaction. Each hash gets a Future and optional callbacks, run on the tracker thread.
+    Callbacks get the receipt, or None if the transaction expired unmined.
+    """
+
+    def __init__(self, w3: Web3, poll_interval: float = RECEIPT_POLL_INTERVAL, max_age: float = RECEIPT_MAX_AGE,
+                 priority: Optional[str] = None):
+        self.w3 = w3
+        self.priority = priority  # scheduler class for the tracker thread's lookups
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.pending: Dict[str, Dict] = {}
+        self.last_block: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self.counters = {"tracked": 0, "resolved": 0, "expired": 0, "batches": 0}
+
+    def track(self, tx_hash, callback: Optional[Callable[[AttributeDict], None]] = None) -> Future:
+        """Start watching tx_hash; the Future resolves to its receipt"""
+        tx_hash = tx_hash if isinstance(tx_hash, str) else tx_hash.to_0x_hex()
+        with self.lock:
+            entry = self.pending.get(tx_hash)
+            if entry is None:
+                entry = self.pending[tx_hash] = {
+                    "future": Future(), "callbacks": [], "since": time.time(), "checked": False
+                }
+                self.counters["tracked"] += 1
+            if callback:
+                entry["callbacks"].append(callback)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+                self.thread.start()
+        self.wake.set()
+        return entry["future"]
+
+    def wait(self, tx_hash, timeout: float = 120) -> AttributeDict:
+        """Drop-in for w3.eth.wait_for_transaction_receipt"""
+        future = self.track(tx_hash)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            raise TimeExhausted(f"Transaction {tx_hash} is not in the chain after {timeout} seconds")
+
+    def _resolve(self, tx_hash: str, receipt: Optional[AttributeDict], error: Optional[Exception] = None):
+        with self.lock:
+            entry = self.pending.pop(tx_hash, None)
+        if entry is None:
+            return
+        if error:
+            entry["future"].set_exception(error)
+        else:
+            entry["future"].set_result(receipt)
+        for callback in entry["callbacks"]:
+            try:
+                callback(receipt)
+            except Exception as e:
+                logger.error(f"Receipt callback failed for {tx_hash}: {e}")
+
+    def poll_once(self):
+        """Look up outstanding receipts if the head moved or new hashes arrived"""
+        with self.lock:
+            if not self.pending:
+                return
+            hashes = list(self.pending)
+            unchecked = any(not e["checked"] for e in self.pending.values())
+        head = self.w3.eth.block_number
+        if head == self.last_block and not unchecked:
+            return
+
+        responses = self.w3.provider.make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+        )
+        self.counters["batches"] += 1
+        self.last_block = head
+        if not isinstance(responses, list):
+            raise RpcEndpointError(f"Receipt batch failed: {responses.get('error')}")
+
+        now = time.time()
+        for tx_hash, response in zip(hashes, responses):
+            raw = response.get("result")
+            if raw:
+                self.counters["resolved"] += 1
+                self._resolve(tx_hash, format_receipt(raw))
+                continue
+            with self.lock:
+                entry = self.pending.get(tx_hash)
+                if entry:
+                    entry["checked"] = True
+                    expired = now - entry["since"] > self.max_age
+            if entry and expired:
+                self.counters["expired"] += 1
+                self._resolve(tx_hash, None, TimeExhausted(f"Transaction {tx_hash} not mined after {self.max_age}s"))
+
+    def _run(self):
+        if self.priority:
+            RPC_PRIORITY.set(self.priority)
+        while True:
+            self.wake.wait(timeout=self.poll_interval)
+            self.wake.clear()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Receipt tracker poll failed: {e}")
+                time.sleep(self.poll_interval)
+
+    def stats(self) -> Dict:
+        return {**self.counters, "pending": len(self.pending), "last_block": self.last_block}
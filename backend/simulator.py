@@ -0,0 +1,449 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import random
+import shutil
+import statistics
+import subprocess
+import threading
+import time
+import types
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from eth_abi import encode
+from web3 import Web3
+
+from rpc import ReceiptTracker
+
+
+# Default dev-node accounts (anvil / hardhat node mnemonic "test test ... junk")
+JUDGE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+AGENT_KEY = "0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d"
+
+ARTIFACTS_DIR = Path(__file__).resolve().parent.parent / "hardhat_contract" / "artifacts" / "contracts"
+PYTH_ADDRESS = "0xA2aa501b19aff244D90cc15a4Cf739D2725B5729"  # Hardcoded in ProofOfIntelligence.sol
+SUBMISSION_WINDOW = 30
+PRICE_EXPO = -8
+
+logger = logging.getLogger("simulator")
+
+
+def load_artifact(source: str, name: str) -> Dict:
+    """Read a Hardhat artifact (run `npx hardhat compile` in hardhat_contract first)"""
+    path = ARTIFACTS_DIR / source / f"{name}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found - compile the contracts first")
+    with open(path) as f:
+        return json.load(f)
+
+
+def send(w3: Web3, account, tx) -> Dict:
+    """Sign, send and wait for a transaction built by build_transaction"""
+    tx.update({
+        "from": account.address,
+        "nonce": w3.eth.get_transaction_count(account.address, "pending"),
+        "gasPrice": w3.eth.gas_price,
+        "chainId": w3.eth.chain_id,
+    })
+    tx.setdefault("gas", 8_000_000)
+    signed = account.sign_transaction(tx)
+    receipt = w3.eth.wait_for_transaction_receipt(w3.eth.send_raw_transaction(signed.raw_transaction))
+    if receipt["status"] != 1:
+        raise RuntimeError(f"Transaction reverted: {receipt['transactionHash'].hex()}")
+    return receipt
+
+
+def deploy(w3: Web3, account, artifact: Dict, *args):
+    """Deploy a contract from its artifact and return the bound contract"""
+    factory = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+    receipt = send(w3, account, factory.constructor(*args).build_transaction({"gas": 15_000_000}))
+    return w3.eth.contract(address=receipt["contractAddress"], abi=artifact["abi"])
+
+
+def dev_rpc(w3: Web3, method: str, *params):
+    """Call a dev-node method, trying the anvil_ then hardhat_ / evm_ spelling"""
+    names = [method] if method.startswith("evm_") else [f"anvil_{method}", f"hardhat_{method}"]
+    for name in names:
+        response = w3.provider.make_request(name, list(params))
+        if "error" not in response:
+            return response.get("result")
+    raise RuntimeError(f"Dev node does not support {method}: {response['error']}")
+
+
+class RpcCounter:
+    """JSON-RPC proxy in front of the dev node that counts requests per method"""
+
+    def __init__(self, upstream: str, port: int = 0):
+        self.upstream = upstream
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.client = httpx.Client(timeout=60.0)
+        counter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                payload = json.loads(body)
+                calls = payload if isinstance(payload, list) else [payload]
+                with counter.lock:
+                    counter.counts.update(call["method"] for call in calls)
+                response = counter.client.post(counter.upstream, content=body,
+                                               headers={"Content-Type": "application/json"})
+                self.send_response(response.status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response.content)))
+                self.end_headers()
+                self.wfile.write(response.content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def snapshot(self) -> Counter:
+        """Return and reset the counts since the last snapshot"""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+
+class StubServices:
+    """Stub Hermes (random-walk ETH/USD in MockPythOracle format) plus the backend gas endpoints"""
+
+    def __init__(self, w3: Web3, feed_id: str, start_price: float = 3900.0, seed: int = 0, port: int = 0):
+        self.w3 = w3
+        self.feed_id = bytes.fromhex(feed_id.removeprefix("0x"))
+        self.price = start_price
+        self.rng = random.Random(seed)
+        self.gas_records: List[Dict] = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/v2/updates/price/latest"):
+                    self.reply(200, stub.latest_update())
+                elif self.path.endswith("/gas-stats"):
+                    self.reply(200, {"stats": {"remaining": 1.0}})
+                else:
+                    self.reply(404, {"detail": "Not found"})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path == "/internal/record-gas":
+                    with stub.lock:
+                        stub.gas_records.append(body)
+                    self.reply(200, {"status": "success"})
+                else:
+                    self.reply(404, {"detail": "Not found"})
+
+            def reply(self, status, data):
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def latest_update(self) -> Dict:
+        """Hermes /v2/updates/price/latest response, published at the dev chain's time"""
+        with self.lock:
+            self.price *= 1 + self.rng.gauss(0, 0.0005)
+            price = int(self.price * 10 ** -PRICE_EXPO)
+        publish_time = self.w3.eth.get_block("latest")["timestamp"]
+        conf = price // 1000
+        price_tuple = (price, conf, PRICE_EXPO, publish_time)
+        update = encode(
+            ["(bytes32,(int64,uint64,int32,uint256),(int64,uint64,int32,uint256))"],
+            [(self.feed_id, price_tuple, price_tuple)],
+        )
+        parsed_price = {"price": str(price), "conf": str(conf), "expo": PRICE_EXPO, "publish_time": publish_time}
+        return {
+            "binary": {"encoding": "hex", "data": [update.hex()]},
+            "parsed": [{"id": self.feed_id.hex(), "price": parsed_price, "ema_price": parsed_price}],
+        }
+
+
+def load_agents(count: int, predictor: str) -> List[types.ModuleType]:
+    """Render and load `count` generated agents in-process (main's config must already point at the sim)"""
+    import main
+
+    agents = []
+    for i in range(count):
+        code = main.get_eth_prediction_agent_code(f"sim_agent_{i}", f"sim_seed_{i}", 10 + (i * 7) % 90, predictor)
+        module = types.ModuleType(f"sim_agent_{i}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            exec(compile(code, f"<sim_agent_{i}>", "exec"), module.__dict__)
+        agents.append(module)
+    return agents
+
+
+def finalize_optimistically(w3: Web3, judge_ctx, round_info: Dict, judge_sent: List) -> Counter:
+    """Claim the round, jump past the challenge window, settle and record every result
+
+    Returns the gas used per contract function (claim, settle and the result batches).
+    """
+    import judging_agent
+
+    round_id = round_info["round_id"]
+    judge_sent.clear()
+    if not judging_agent.claim_round(judge_ctx, round_info):
+        raise RuntimeError(f"Judge failed to claim round #{round_id}")
+    dev_rpc(w3, "evm_increaseTime", judging_agent.CHALLENGE_WINDOW + 1)
+    dev_rpc(w3, "evm_mine")
+
+    claim = judging_agent.get_round_claim(judge_ctx, round_id)
+    if not claim or not judging_agent.settle_round(judge_ctx, round_info, claim):
+        raise RuntimeError(f"Judge failed to settle round #{round_id}")
+    deadline = time.monotonic() + 120
+    while round_id in judging_agent.results_due:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Round #{round_id} results were not all recorded")
+        if round_id not in judging_agent.results_pending:
+            judging_agent.check_round_results(judge_ctx)
+        time.sleep(0.05)
+
+    gas = Counter()
+    for function, tx_hash in judge_sent:
+        gas[function] += w3.eth.get_transaction_receipt(tx_hash)["gasUsed"]
+    return gas
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def simulate(node_url: str, n_agents: int, n_rounds: int, predictor: str = "local",
+                   finalize_mode: str = "auto") -> Dict:
+    """Deploy the contracts, run the judge plus n_agents generated agents for n_rounds rounds"""
+    direct = Web3(Web3.HTTPProvider(node_url))
+    counter = RpcCounter(node_url)
+    judge_account = direct.eth.account.from_key(JUDGE_KEY)
+    agent_account = direct.eth.account.from_key(AGENT_KEY)
+
+    import judging_agent
+
+    stubs = StubServices(direct, judging_agent.PYTH_PRICE_FEED_ID)
+
+    # Contracts: POIToken, ProofOfIntelligence, and the mock oracle at the hardcoded Pyth address
+    token = deploy(direct, judge_account, load_artifact("POIToken.sol", "POIToken"))
+    poi_artifact = load_artifact("ProofOfIntelligence.sol", "ProofOfIntelligence")
+    poi = deploy(direct, judge_account, poi_artifact, token.address)
+    send(direct, judge_account, token.functions.setProofOfIntelligenceContract(poi.address).build_transaction({}))
+    mock = deploy(direct, judge_account, load_artifact("mocks/MockPythOracle.sol", "MockPythOracle"))
+    dev_rpc(direct, "setCode", PYTH_ADDRESS, direct.eth.get_code(mock.address).to_0x_hex())
+    logger.info(f"Deployed ProofOfIntelligence at {poi.address}")
+
+    # Point the judge and the agent template at the simulated chain and stubs
+    import main
+
+    main.SEPOLIA_RPC = counter.url
+    main.SEPOLIA_RPC_URLS = [counter.url]
+    main.CHAIN_ID = direct.eth.chain_id
+    main.CONTRACT_ADDRESS = poi.address
+    main.SEPOLIA_PRIVATE_KEY = AGENT_KEY
+    main.ASI_ONE_API_KEY = "simulator"
+    main.BACKEND_URL = stubs.url
+    main.HERMES_URL = stubs.url
+
+    judge_w3 = Web3(Web3.HTTPProvider(counter.url))
+    judging_agent.w3 = judge_w3
+    judging_agent.receipts = ReceiptTracker(judge_w3)
+    judging_agent.contract = judge_w3.eth.contract(address=poi.address, abi=judging_agent.contract_abi)
+    judging_agent.pyth_contract = judge_w3.eth.contract(address=Web3.to_checksum_address(PYTH_ADDRESS),
+                                                        abi=judging_agent.pyth_abi)
+    judging_agent.PRIVATE_KEY = JUDGE_KEY
+    judging_agent.CHAIN_ID = main.CHAIN_ID
+    judging_agent.HERMES_URL = stubs.url
+    judging_agent.FINALIZE_MODE = finalize_mode
+    judge_ctx = types.SimpleNamespace(logger=logging.getLogger("simulator.judge"))
+
+    # Record the claim / settle / result batch transactions so their gas can be reported
+    judge_sent = []
+    send_judge_transaction = judging_agent.send_judge_transaction
+
+    def recording_send(account, call, *args):
+        tx_hash = send_judge_transaction(account, call, *args)
+        judge_sent.append((call.fn_name, tx_hash))
+        return tx_hash
+
+    judging_agent.send_judge_transaction = recording_send
+
+    agents = load_agents(n_agents, predictor)
+    for i, agent in enumerate(agents):
+        registration = (agent.AGENT_ADDRESS, agent_account.address.lower(), 0, 0, 0, 0, agent.DEVIATION)
+        send(direct, judge_account, poi.functions.registerAgent(registration).build_transaction({}))
+    agent_ctxs = [types.SimpleNamespace(logger=logging.getLogger(f"simulator.agent{i}")) for i in range(n_agents)]
+    logger.info(f"Registered {n_agents} agents")
+
+    rounds = []
+    for _ in range(n_rounds):
+        send(direct, judge_account, poi.functions.submitMockMempoolTx(1_000_000).build_transaction({}))
+        counter.snapshot()
+        stubs.gas_records.clear()
+
+        round_start = time.perf_counter()
+        if not judging_agent.start_new_round(judge_ctx):
+            raise RuntimeError("Judge failed to start a round")
+        round_id = poi.functions.currentPredictionRound().call()
+        for agent in agents:
+            agent.rpc_cache.expire_head()  # the node mines instantly; don't wait out the head TTL
+        start_rpcs = counter.snapshot()
+
+        submit_start = time.perf_counter()
+        for agent, ctx in zip(agents, agent_ctxs):
+            await agent.check_and_submit_prediction(ctx)
+        submit_seconds = time.perf_counter() - submit_start
+        agent_rpcs = counter.snapshot()
+
+        # Jump past the submission deadline instead of waiting for it
+        dev_rpc(direct, "evm_increaseTime", SUBMISSION_WINDOW + 1)
+        dev_rpc(direct, "evm_mine")
+
+        finalize_start = time.perf_counter()
+        round_info = judging_agent.get_current_round_info(judge_ctx)
+        optimistic = judging_agent.use_optimistic(round_info["prediction_count"])
+        if optimistic:
+            gas = finalize_optimistically(direct, judge_ctx, round_info, judge_sent)
+        else:
+            tx_hash = judging_agent.finalize_round(judge_ctx)
+            if not tx_hash:
+                raise RuntimeError(f"Judge failed to finalize round #{round_id}")
+            receipt = direct.eth.wait_for_transaction_receipt(tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}")
+            gas = Counter(finalizeRoundAndMineBlock=receipt["gasUsed"])
+        finalize_seconds = time.perf_counter() - finalize_start
+        finalize_rpcs = counter.snapshot()
+
+        round_data = poi.functions.predictionRounds(round_id).call()
+        participants = round_data[3]
+        submit_gas = [r["gas_used"] for r in stubs.gas_records]
+        finalize_gas = sum(gas.values())
+        rounds.append({
+            "round_id": round_id,
+            "mode": "optimistic" if optimistic else "direct",
+            "participants": participants,
+            "winner": round_data[5],
+            "rpcs": sum((start_rpcs + agent_rpcs + finalize_rpcs).values()),
+            "judge_rpcs": sum((start_rpcs + finalize_rpcs).values()),
+            "agent_rpcs": sum(agent_rpcs.values()),
+            "rpc_methods": dict(start_rpcs + agent_rpcs + finalize_rpcs),
+            "submit_seconds": submit_seconds,
+            "finalize_seconds": finalize_seconds,
+            "round_seconds": time.perf_counter() - round_start,
+            "finalize_gas": finalize_gas,
+            "finalize_gas_per_participant": finalize_gas / max(1, participants),
+            "direct_finalize_gas": gas["finalizeRoundAndMineBlock"],
+            "claim_gas": gas["claimRoundWinner"],
+            "settle_gas": gas["settleRound"],
+            "results_gas": gas["recordRoundResults"],
+            "submit_gas_mean": statistics.mean(submit_gas) if submit_gas else 0,
+        })
+        logger.info(f"Round #{round_id}: {participants} predictions, {rounds[-1]['mode']} finalize "
+                    f"{finalize_seconds * 1000:.0f} ms, {dict(gas)} gas")
+
+    counter.server.shutdown()
+    stubs.server.shutdown()
+    return summarize(rounds, n_agents)
+
+
+def mode_mean(rounds: List[Dict], mode: str, key: str) -> Optional[float]:
+    """Mean of `key` over the rounds finalized in `mode`, None if there were none"""
+    values = [r[key] for r in rounds if r["mode"] == mode]
+    return statistics.mean(values) if values else None
+
+
+def summarize(rounds: List[Dict], n_agents: int) -> Dict:
+    finalize = [r["finalize_seconds"] * 1000 for r in rounds]
+    return {
+        "agents": n_agents,
+        "rounds": len(rounds),
+        "rpcs_per_round": statistics.mean(r["rpcs"] for r in rounds),
+        "judge_rpcs_per_round": statistics.mean(r["judge_rpcs"] for r in rounds),
+        "agent_rpcs_per_round": statistics.mean(r["agent_rpcs"] for r in rounds),
+        "finalize_latency_ms_p50": percentile(finalize, 50),
+        "finalize_latency_ms_p95": percentile(finalize, 95),
+        "finalize_gas_mean": statistics.mean(r["finalize_gas"] for r in rounds),
+        "finalize_gas_per_participant": statistics.mean(r["finalize_gas_per_participant"] for r in rounds),
+        "direct_rounds": sum(r["mode"] == "direct" for r in rounds),
+        "direct_finalize_gas_mean": mode_mean(rounds, "direct", "direct_finalize_gas"),
+        "optimistic_rounds": sum(r["mode"] == "optimistic" for r in rounds),
+        "claim_gas_mean": mode_mean(rounds, "optimistic", "claim_gas"),
+        "settle_gas_mean": mode_mean(rounds, "optimistic", "settle_gas"),
+        "results_gas_mean": mode_mean(rounds, "optimistic", "results_gas"),
+        "submit_gas_mean": statistics.mean(r["submit_gas_mean"] for r in rounds),
+        "per_round": rounds,
+    }
+
+
+@contextlib.contextmanager
+def dev_node(url: Optional[str], port: int):
+    """Use the given dev node, or spawn anvil for the duration of the run"""
+    if url:
+        yield url
+        return
+
+    anvil = shutil.which("anvil")
+    if not anvil:
+        raise RuntimeError("anvil not found - install foundry or pass --rpc to a running anvil/hardhat node")
+
+    process = subprocess.Popen([anvil, "--port", str(port), "--silent", "--gas-limit", "60000000"])
+    node_url = f"http://127.0.0.1:{port}"
+    try:
+        w3 = Web3(Web3.HTTPProvider(node_url))
+        for _ in range(100):
+            if w3.is_connected():
+                break
+            time.sleep(0.1)
+        yield node_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the judge and N generated agents against a local dev chain")
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--predictor", choices=["local", "llm", "ensemble"], default="local")
+    parser.add_argument("--finalize-mode", choices=["auto", "direct", "optimistic"], default="auto",
+                        help="Judge FINALIZE_MODE: auto claims rounds of OPTIMISTIC_MIN_PARTICIPANTS or more, "
+                             "direct finalizeRoundAndMineBlock runs out of gas above ~18 agents")
+    parser.add_argument("--rpc", help="Existing anvil/hardhat node URL (default: spawn anvil)")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--json", type=Path, help="Write the full report (including per-round data) here")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    with dev_node(args.rpc, args.port) as node_url:
+        report = asyncio.run(simulate(node_url, args.agents, args.rounds, args.predictor, args.finalize_mode))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for key, value in report.items():
+        if key != "per_round":
+            print(f"{key:>30}: {value:,.1f}" if isinstance(value, float) else f"{key:>30}: {value}")
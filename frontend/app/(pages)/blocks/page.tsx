@@ -1,6 +1,5 @@
 "use client";
 import React, { useState, useEffect } from "react";
-import { ethers } from "ethers";
 import Sidebar from "../../components/Sidebar";
 
 // --- Type Definitions ---
@@ -13,42 +12,6 @@ interface OnchainBlock {
   targetPrice: number;
 }
 
-const CONTRACT_ADDRESS = process.env.NEXT_PUBLIC_CONTRACT_ADDRESS || "error";
-const CONTRACT_ABI = [
-  {
-    inputs: [],
-    name: "currentBlockNumber",
-    outputs: [{ internalType: "uint256", name: "", type: "uint256" }],
-    stateMutability: "view",
-    type: "function",
-  },
-  {
-    inputs: [{ internalType: "uint256", name: "count", type: "uint256" }],
-    name: "getLatestBlocks",
-    outputs: [
-      {
-        components: [
-          { internalType: "uint256", name: "blockNumber", type: "uint256" },
-          { internalType: "uint256", name: "timestamp", type: "uint256" },
-          { internalType: "string", name: "minerAgent", type: "string" },
-          { internalType: "bytes32", name: "blockHash", type: "bytes32" },
-          {
-            internalType: "bytes32",
-            name: "previousBlockHash",
-            type: "bytes32",
-          },
-          { internalType: "int256", name: "targetPrice", type: "int256" },
-        ],
-        internalType: "struct ProofOfIntelligence.Block[]",
-        name: "",
-        type: "tuple[]",
-      },
-    ],
-    stateMutability: "view",
-    type: "function",
-  },
-];
-
 const BlockCard = ({ block }: { block: OnchainBlock }) => (
   <div className="bg-[#13141B] border border-[#1F2937] rounded-xl p-6 mb-4 hover:border-[#2D3748] transition-all duration-200">
     <div className="flex justify-between items-start mb-4">
@@ -114,72 +77,15 @@ const BlocksPage = () => {
     setLoading(true);
     setError(null);
     try {
-      const anyWindow: any = window;
-      const anyEthers: any = ethers;
-
-      // Robust provider creation: support ethers v6 BrowserProvider and v5 providers.Web3Provider
-      let provider: any;
-      if (anyWindow?.ethereum) {
-        if (typeof anyEthers.BrowserProvider === "function") {
-          provider = new anyEthers.BrowserProvider(anyWindow.ethereum);
-        } else if (
-          anyEthers.providers &&
-          typeof anyEthers.providers.Web3Provider === "function"
-        ) {
-          provider = new anyEthers.providers.Web3Provider(anyWindow.ethereum);
-        } else if (typeof anyEthers.getDefaultProvider === "function") {
-          provider = anyEthers.getDefaultProvider();
-        }
-      } else {
-        provider =
-          typeof anyEthers.getDefaultProvider === "function"
-            ? anyEthers.getDefaultProvider()
-            : undefined;
+      // Blocks are immutable once mined, so the backend serves them from its history cache
+      const response = await fetch("/api/blocks?latest=10", { cache: "no-store" });
+      if (!response.ok) {
+        throw new Error(`Failed to load blocks (${response.status})`);
       }
+      const data = await response.json();
 
-      // Final fallback to a JsonRpcProvider if nothing else available
-      if (!provider) {
-        try {
-          provider = new anyEthers.JsonRpcProvider();
-        } catch (err) {
-          provider = undefined;
-        }
-      }
-
-      const contract = new anyEthers.Contract(
-        CONTRACT_ADDRESS,
-        CONTRACT_ABI,
-        provider
-      );
-
-      console.log("Fetching blocks from contract:", CONTRACT_ADDRESS);
-
-      // Check network first
-      const network = await provider.getNetwork();
-      const chainId =
-        typeof network.chainId === "number"
-          ? network.chainId
-          : Number(network.chainId);
-      console.log("Current network:", chainId);
-
-      if (chainId !== 84532) {
-        throw new Error(
-          `Please switch to Base Sepolia network (current: ${chainId})`
-        );
-      }
-
-      // Check how many blocks exist first
       // currentBlockNumber represents the highest block number (starts at 1 for genesis)
-      let currentBlock = 0;
-      try {
-        currentBlock = Number(await contract.currentBlockNumber());
-        console.log("Current block number:", currentBlock);
-      } catch (e) {
-        console.warn("Could not fetch current block number:", e);
-      }
-
-      // If currentBlockNumber is 0, no blocks exist (not even genesis)
-      // This shouldn't happen as constructor mines genesis, but handle it
+      const currentBlock = Number(data.current_block || 0);
       if (currentBlock === 0) {
         console.log("No blocks mined yet");
         setBlocks([]);
@@ -189,48 +95,14 @@ const BlocksPage = () => {
 
       setCurrentBlock(currentBlock);
 
-      // Fetch latest blocks
-      // currentBlockNumber = 1 means 1 block exists (genesis at blockchain[1])
-      // We can safely request up to currentBlockNumber blocks
-      const blocksToFetch = Math.min(10, currentBlock);
-
-      let rawBlocks;
-      try {
-        rawBlocks = await contract.getLatestBlocks(blocksToFetch);
-        console.log("Raw blocks from chain:", rawBlocks);
-      } catch (blockError: any) {
-        console.warn("Error fetching blocks:", blockError);
-        rawBlocks = [];
-      }
-
-      const parsedBlocks: OnchainBlock[] = (rawBlocks || []).map((b: any) => {
-        // Handle both array and object responses
-        const block = Array.isArray(b)
-          ? {
-              blockNumber: b[0],
-              timestamp: b[1],
-              minerAgent: b[2],
-              blockHash: b[3],
-              previousBlockHash: b[4],
-              targetPrice: b[5],
-            }
-          : b;
-
-        return {
-          blockNumber: Number(block.blockNumber || 0),
-          timestamp: Number(block.timestamp || 0),
-          minerAgent: String(block.minerAgent || ""),
-          blockHash:
-            typeof block.blockHash === "string"
-              ? block.blockHash
-              : block.blockHash?.toString() || "",
-          previousBlockHash:
-            typeof block.previousBlockHash === "string"
-              ? block.previousBlockHash
-              : block.previousBlockHash?.toString() || "",
-          targetPrice: Number(block.targetPrice || 0),
-        };
-      });
+      const parsedBlocks: OnchainBlock[] = (data.blocks || []).map((block: any) => ({
+        blockNumber: Number(block.block_number),
+        timestamp: Number(block.timestamp),
+        minerAgent: String(block.miner_agent || ""),
+        blockHash: block.block_hash,
+        previousBlockHash: block.previous_block_hash,
+        targetPrice: Number(block.target_price || 0),
+      }));
 
       console.log("Parsed blocks:", parsedBlocks);
 
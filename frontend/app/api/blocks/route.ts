@@ -0,0 +1,18 @@
+import { NextResponse } from "next/server";
+
+export async function GET(req: Request) {
+  try {
+    // Mined blocks come from the backend's permanent history cache
+    const BACKEND_URL = process.env.BACKEND_URL!;
+    const { search } = new URL(req.url);
+    const res = await fetch(`${BACKEND_URL}/history/blocks${search}`, { cache: "no-store" });
+
+    const text = await res.text();
+    return new NextResponse(text, {
+      status: res.status,
+      headers: { "Content-Type": "application/json" },
+    });
+  } catch (err: any) {
+    return new NextResponse(err?.message || "Internal error", { status: 500 });
+  }
+}
@@ -0,0 +1,17 @@
+import { NextResponse } from "next/server";
+
+export async function GET() {
+  try {
+    // One backend snapshot per chain block, shared by every viewer
+    const BACKEND_URL = process.env.BACKEND_URL!;
+    const res = await fetch(`${BACKEND_URL}/live-round`, { cache: "no-store" });
+
+    const text = await res.text();
+    return new NextResponse(text, {
+      status: res.status,
+      headers: { "Content-Type": "application/json" },
+    });
+  } catch (err: any) {
+    return new NextResponse(err?.message || "Internal error", { status: 500 });
+  }
+}
@@ -1,76 +1,27 @@
 import { useEffect, useState } from 'react';
-import { createPublicClient, http } from 'viem';
-import { baseSepolia } from 'viem/chains';
 
-const CONTRACT_ADDRESS = process.env.NEXT_PUBLIC_CONTRACT_ADDRESS as `0x${string}`;  
-const RPC_URL = 'https://base-sepolia.g.alchemy.com/v2/FTdaypPQy2TZuLJhehmqRullM2x0dJPJ';
-
-const contractABI = [
-  {
-    inputs: [],
-    name: 'currentPredictionRound',
-    outputs: [{ type: 'uint256' }],
-    stateMutability: 'view',
-    type: 'function',
-  },
-  {
-    inputs: [{ type: 'uint256' }],
-    name: 'predictionRounds',
-    outputs: [
-      { type: 'uint256', name: 'forBlockNumber' },
-      { type: 'uint256', name: 'startTime' },
-      { type: 'uint256', name: 'submissionDeadline' },
-      { type: 'uint256', name: 'predictionCount' },
-      { type: 'bool', name: 'finalized' },
-      { type: 'string', name: 'winnerAgent' },
-      { type: 'int256', name: 'actualPrice' },
-    ],
-    stateMutability: 'view',
-    type: 'function',
-  },
-  {
-    inputs: [{ type: 'uint256', name: 'roundId' }],
-    name: 'getRoundParticipants',
-    outputs: [{ type: 'string[]' }],
-    stateMutability: 'view',
-    type: 'function',
-  },
-  {
-    inputs: [{ type: 'string', name: 'agentAddress' }],
-    name: 'getAgent',
-    outputs: [
-      { type: 'string', name: 'agentAddress' },
-      { type: 'string', name: 'agentWalletAddress' },
-      { type: 'uint256', name: 'totalGuesses' },
-      { type: 'uint256', name: 'bestGuesses' },
-      { type: 'uint256', name: 'accuracy' },
-      { type: 'uint256', name: 'lastGuessBlock' },
-      { type: 'uint256', name: 'deviation' },
-    ],
-    stateMutability: 'view',
-    type: 'function',
-  },
-  {
-    inputs: [
-      { type: 'uint256', name: 'roundId' },
-      { type: 'string', name: 'agentAddress' }
-    ],
-    name: 'roundPredictions',
-    outputs: [
-      { type: 'string', name: 'agentAddress' },
-      { type: 'int256', name: 'predictedPrice' },
-      { type: 'uint256', name: 'timestamp' },
-      { type: 'bool', name: 'submitted' },
-    ],
-    stateMutability: 'view',
-    type: 'function',
-  },
-] as const;
-
-const publicClient = createPublicClient({
-  chain: baseSepolia,
-  transport: http(RPC_URL),
-});
+interface LiveRoundResponse {
+  block_number: number;
+  round: {
+    round_id: number;
+    for_block_number: number;
+    start_time: number;
+    submission_deadline: number;
+    prediction_count: number;
+    finalized: boolean;
+  } | null;
+  predictions: {
+    agent_address: string;
+    agent_wallet: string;
+    predicted_price: number;
+    timestamp: number;
+    submitted: boolean;
+    total_guesses: number;
+    best_guesses: number;
+  }[];
+  round_status: 'active' | 'judging' | 'finalized' | 'no-round';
+  time_remaining: number;
+}
 
 export interface LivePrediction {
   agentAddress: string;
@@ -101,14 +52,14 @@ export function useLiveRound(currentPrice: number) {
 
   const fetchRoundData = async () => {
     try {
-      // Get current round ID
-      const roundId = await publicClient.readContract({
-        address: CONTRACT_ADDRESS,
-        abi: contractABI,
-        functionName: 'currentPredictionRound',
-      });
+      // Round, participants, predictions and agent stats in one backend snapshot
+      const res = await fetch('/api/live-round', { cache: 'no-store' });
+      if (!res.ok) {
+        throw new Error(`Live round request failed: ${res.status}`);
+      }
+      const live: LiveRoundResponse = await res.json();
 
-      if (roundId === BigInt(0)) {
+      if (!live.round) {
         setRoundData({
           roundId: 0,
           forBlockNumber: 0,
@@ -124,99 +75,44 @@ export function useLiveRound(currentPrice: number) {
         return;
       }
 
-      // Get round details
-      const round = await publicClient.readContract({
-        address: CONTRACT_ADDRESS,
-        abi: contractABI,
-        functionName: 'predictionRounds',
-        args: [roundId],
-      }) as readonly [bigint, bigint, bigint, bigint, boolean, string, bigint];
-
-      const now = Math.floor(Date.now() / 1000);
-      const timeRemaining = Math.max(0, Number(round[2]) - now);
-      
-      let status: 'active' | 'judging' | 'finalized' | 'no-round' = 'active';
-      if (round[4]) {
-        status = 'finalized';
-      } else if (timeRemaining === 0) {
-        status = 'judging';
-      }
-
       setRoundData({
-        roundId: Number(roundId),
-        forBlockNumber: Number(round[0]),
-        startTime: Number(round[1]),
-        submissionDeadline: Number(round[2]),
-        predictionCount: Number(round[3]),
-        finalized: round[4],
-        timeRemaining,
-        status,
+        roundId: live.round.round_id,
+        forBlockNumber: live.round.for_block_number,
+        startTime: live.round.start_time,
+        submissionDeadline: live.round.submission_deadline,
+        predictionCount: live.round.prediction_count,
+        finalized: live.round.finalized,
+        timeRemaining: live.time_remaining,
+        status: live.round_status,
       });
 
-      // Get participants
-      const participants = await publicClient.readContract({
-        address: CONTRACT_ADDRESS,
-        abi: contractABI,
-        functionName: 'getRoundParticipants',
-        args: [roundId],
-      }) as `0x${string}`[];
-
-      // Fetch predictions for each participant
-      const predictionsData: LivePrediction[] = [];
-
-      for (const agentAddress of participants) {
-        try {
-          // Get agent stats
-          const agent = await publicClient.readContract({
-            address: CONTRACT_ADDRESS,
-            abi: contractABI,
-            functionName: 'getAgent',
-            args: [agentAddress],
-          }) as readonly [string, string, bigint, bigint, bigint, bigint, bigint];
-
-          // Get prediction for this round
-          const prediction = await publicClient.readContract({
-            address: CONTRACT_ADDRESS,
-            abi: contractABI,
-            functionName: 'roundPredictions',
-            args: [roundId, agentAddress],
-          }) as readonly [string, bigint, bigint, boolean];
-
-          // prediction[0] = agentAddress (string)
-          // prediction[1] = predictedPrice (int256)
-          // prediction[2] = timestamp (uint256)
-          // prediction[3] = submitted (bool)
-          
-          if (prediction[3]) { // submitted
-            const predictedPrice = Number(prediction[1]); // Already in ×1e8, keep it
-
-            // Calculate live accuracy
-            const accuracy = currentPrice > 0
-              ? 100 - (Math.abs((predictedPrice / 1e8) - currentPrice) / currentPrice) * 100
-              : 0;
-
-            // agent[2] = totalGuesses, agent[3] = bestGuesses
-            const totalGuesses = Number(agent[2]);
-            const bestGuesses = Number(agent[3]);
-            const winRate = totalGuesses > 0
-              ? (bestGuesses / totalGuesses) * 100
-              : 0;
-
-            predictionsData.push({
-              agentAddress: agentAddress,
-              agentWallet: agent[1], // agentWalletAddress at index 1
-              predictedPrice, // Keep as ×1e8 for display
-              timestamp: Number(prediction[2]),
-              accuracy,
-              totalGuesses,
-              bestGuesses,
-              winRate,
-            });
-          }
-        } catch (err) {
-          console.error(`Error fetching data for agent ${agentAddress}:`, err);
-        }
-      }
+      const predictionsData: LivePrediction[] = live.predictions
+        .filter((prediction) => prediction.submitted)
+        .map((prediction) => {
+          const predictedPrice = prediction.predicted_price; // Already in ×1e8, keep it
+
+          // Calculate live accuracy
+          const accuracy = currentPrice > 0
+            ? 100 - (Math.abs((predictedPrice / 1e8) - currentPrice) / currentPrice) * 100
+            : 0;
+
+          const totalGuesses = prediction.total_guesses;
+          const bestGuesses = prediction.best_guesses;
+          const winRate = totalGuesses > 0
+            ? (bestGuesses / totalGuesses) * 100
+            : 0;
+
+          return {
+            agentAddress: prediction.agent_address,
+            agentWallet: prediction.agent_wallet,
+            predictedPrice, // Keep as ×1e8 for display
+            timestamp: prediction.timestamp,
+            accuracy,
+            totalGuesses,
+            bestGuesses,
+            winRate,
+          };
+        });
 
       // Sort by accuracy (best first)
       predictionsData.sort((a, b) => b.accuracy - a.accuracy);
@@ -82,12 +82,28 @@ contract ProofOfIntelligence {
     uint256 public constant ROUND_DURATION = 30;
     uint256 public constant SUBMISSION_WINDOW = 30;
 
+    // Optimistic finalization: the winner is computed off-chain and claimed by its index in
+    // round.participants. During CHALLENGE_WINDOW anyone can replace the claim with a closer
+    // prediction, so claim, challenge and settle cost the same for 10 or 10,000 participants.
+    // Per-participant history, bias and participation rewards are recorded afterwards in
+    // bounded batches (recordRoundResults).
+    uint256 public constant CHALLENGE_WINDOW = 60;
+
+    struct RoundClaim {
+        uint256 winnerIndex;
+        uint256 claimedAt;
+        address claimer;
+        uint256 resultsRecorded; // participants whose results have been recorded
+        bool settled;
+    }
+
     uint256 public currentBlockNumber;
     uint256 public currentPredictionRound;
 
     mapping(uint256 => Block) public blockchain;
     mapping(uint256 => PredictionRound) public predictionRounds;
     mapping(uint256 => mapping(string => Prediction)) public roundPredictions;
+    mapping(uint256 => RoundClaim) public roundClaims;
     
     // Self-learning mappings
     mapping(string => PredictionHistory[]) public agentHistory;
@@ -159,6 +175,24 @@ contract ProofOfIntelligence {
         string indexed agentAddress,
         uint256 amount
     );
+    event RoundClaimed(
+        uint256 indexed roundId,
+        string winner,
+        uint256 winnerIndex,
+        int256 actualPrice,
+        uint256 challengeDeadline
+    );
+    event ClaimChallenged(
+        uint256 indexed roundId,
+        string winner,
+        uint256 winnerIndex,
+        address challenger
+    );
+    event RoundResultsRecorded(
+        uint256 indexed roundId,
+        uint256 recorded,
+        uint256 total
+    );
 
     constructor(address _poiTokenAddress) {
         require(_poiTokenAddress != address(0), "Invalid token address");
@@ -289,6 +323,10 @@ contract ProofOfIntelligence {
         ];
 
         require(!round.finalized, "Already finalized");
+        require(
+            roundClaims[currentPredictionRound].claimedAt == 0,
+            "Round claimed - settle it instead"
+        );
         require(
             block.timestamp > round.submissionDeadline,
             "Still accepting predictions"
@@ -361,6 +399,144 @@ contract ProofOfIntelligence {
         );
     }
 
+    // Claim the current round's winner (computed off-chain) by index in round.participants
+    function claimRoundWinner(
+        bytes32 priceFeedId,
+        uint256 winnerIndex
+    ) external {
+        PredictionRound storage round = predictionRounds[
+            currentPredictionRound
+        ];
+        RoundClaim storage claim = roundClaims[currentPredictionRound];
+
+        require(!round.finalized, "Already finalized");
+        require(claim.claimedAt == 0, "Already claimed");
+        require(
+            block.timestamp > round.submissionDeadline,
+            "Still accepting predictions"
+        );
+        // Empty rounds have no winner; finalizeRoundAndMineBlock closes them in O(1)
+        require(winnerIndex < round.participants.length, "Invalid winner index");
+
+        _validatePendingMempoolTransactions();
+
+        (int256 actualPrice, ) = readPythPrice(priceFeedId);
+        require(actualPrice > 0, "Could not get valid price");
+
+        round.actualPrice = actualPrice;
+        claim.winnerIndex = winnerIndex;
+        claim.claimedAt = block.timestamp;
+        claim.claimer = msg.sender;
+
+        emit RoundClaimed(
+            currentPredictionRound,
+            round.participants[winnerIndex],
+            winnerIndex,
+            actualPrice,
+            block.timestamp + CHALLENGE_WINDOW
+        );
+    }
+
+    // Replace a claimed winner with a closer prediction (ties go to the earlier submission,
+    // matching _determineWinner)
+    function challengeRoundWinner(
+        uint256 roundId,
+        uint256 betterIndex
+    ) external {
+        RoundClaim storage claim = roundClaims[roundId];
+        require(claim.claimedAt != 0 && !claim.settled, "No open claim");
+        require(
+            block.timestamp <= claim.claimedAt + CHALLENGE_WINDOW,
+            "Challenge window closed"
+        );
+
+        PredictionRound storage round = predictionRounds[roundId];
+        require(betterIndex < round.participants.length, "Invalid winner index");
+
+        uint256 claimedDiff = _predictionDiff(
+            roundId,
+            round.participants[claim.winnerIndex],
+            round.actualPrice
+        );
+        uint256 betterDiff = _predictionDiff(
+            roundId,
+            round.participants[betterIndex],
+            round.actualPrice
+        );
+        require(
+            betterDiff < claimedDiff ||
+                (betterDiff == claimedDiff && betterIndex < claim.winnerIndex),
+            "Not closer than claimed winner"
+        );
+
+        claim.winnerIndex = betterIndex;
+        emit ClaimChallenged(
+            roundId,
+            round.participants[betterIndex],
+            betterIndex,
+            msg.sender
+        );
+    }
+
+    // Finalize a claimed round once its challenge window has passed: winner, reward and block
+    function settleRound(uint256 roundId) external {
+        RoundClaim storage claim = roundClaims[roundId];
+        require(claim.claimedAt != 0 && !claim.settled, "No open claim");
+        require(
+            block.timestamp > claim.claimedAt + CHALLENGE_WINDOW,
+            "Challenge window still open"
+        );
+
+        PredictionRound storage round = predictionRounds[roundId];
+        string memory winner = round.participants[claim.winnerIndex];
+
+        claim.settled = true;
+        round.finalized = true;
+        round.winnerAgent = winner;
+        agents[winner].bestGuesses++;
+
+        // Participation rewards are credited with each participant's results
+        pendingRewards[winner] += WINNER_REWARD;
+        emit RewardsDistributed(roundId, winner, WINNER_REWARD, PARTICIPANT_REWARD);
+
+        _mineBlock(winner, round.actualPrice);
+
+        emit RoundFinalized(roundId, winner, round.actualPrice);
+    }
+
+    // Record history, bias, accuracy, leaderboard and participation reward for up to
+    // maxCount more participants of a settled round
+    function recordRoundResults(uint256 roundId, uint256 maxCount) external {
+        RoundClaim storage claim = roundClaims[roundId];
+        require(claim.settled, "Round not settled");
+
+        PredictionRound storage round = predictionRounds[roundId];
+        uint256 total = round.participants.length;
+        uint256 end = claim.resultsRecorded + maxCount;
+        if (end > total) {
+            end = total;
+        }
+
+        for (uint256 i = claim.resultsRecorded; i < end; i++) {
+            string memory agentAddr = round.participants[i];
+            Prediction storage pred = roundPredictions[roundId][agentAddr];
+
+            _recordPredictionHistory(
+                agentAddr,
+                roundId,
+                pred.predictedPrice,
+                round.actualPrice
+            );
+            _updateAgentBias(agentAddr);
+            _updateAgentAccuracy(agentAddr);
+            _updateLeaderboard(agentAddr);
+            pendingRewards[agentAddr] += PARTICIPANT_REWARD;
+        }
+
+        claim.resultsRecorded = end;
+        emit RoundResultsRecorded(roundId, end, total);
+    }
+
     // Start new prediction round
     function _startNewRound() internal {
         currentPredictionRound++;
@@ -542,15 +718,7 @@ contract ProofOfIntelligence {
 
         for (uint256 i = 0; i < round.participants.length; i++) {
             string memory agentAddr = round.participants[i];
-            Prediction storage pred = roundPredictions[roundId][agentAddr];
-
-            // Calculate absolute difference
-            uint256 diff;
-            if (pred.predictedPrice > actualPrice) {
-                diff = uint256(int256(pred.predictedPrice - actualPrice));
-            } else {
-                diff = uint256(int256(actualPrice - pred.predictedPrice));
-            }
+            uint256 diff = _predictionDiff(roundId, agentAddr, actualPrice);
 
             if (diff < smallestDiff) {
                 smallestDiff = diff;
@@ -562,6 +730,19 @@ contract ProofOfIntelligence {
         return winner;
     }
 
+    // Absolute difference between an agent's prediction for a round and the actual price
+    function _predictionDiff(
+        uint256 roundId,
+        string memory agentAddr,
+        int256 actualPrice
+    ) internal view returns (uint256) {
+        int256 predicted = roundPredictions[roundId][agentAddr].predictedPrice;
+        if (predicted > actualPrice) {
+            return uint256(predicted - actualPrice);
+        }
+        return uint256(actualPrice - predicted);
+    }
+
     // Record prediction history for self-learning
     function _recordPredictionHistory(
         string memory agentAddr,
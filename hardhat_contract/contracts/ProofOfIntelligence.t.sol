@@ -0,0 +1,271 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.30;
+
+import {Test} from "forge-std/Test.sol";
+import "@pythnetwork/pyth-sdk-solidity/PythStructs.sol";
+import {ProofOfIntelligence} from "./ProofOfIntelligence.sol";
+import {POIToken} from "./POIToken.sol";
+import {MockPythOracle} from "./mocks/MockPythOracle.sol";
+
+/**
+ * @title ProofOfIntelligenceTest
+ * @dev Optimistic finalization: claim, challenge, settle and batched results.
+ * Run with `npx hardhat test solidity`. MockPythOracle's runtime code is placed at the
+ * Pyth address ProofOfIntelligence reads from.
+ */
+contract ProofOfIntelligenceTest is Test {
+
+    address constant PYTH = 0xA2aa501b19aff244D90cc15a4Cf739D2725B5729;
+    bytes32 constant ETH_USD_FEED_ID = 0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace;
+    int64 constant ACTUAL_PRICE = 3000_00000000; // $3000, expo -8
+
+    POIToken token;
+
+    function setUp() public {
+        vm.etch(PYTH, address(new MockPythOracle()).code);
+        vm.deal(address(this), 1 ether);
+        token = new POIToken();
+    }
+
+    // ===== HELPERS =====
+
+    function agentName(uint256 i) internal pure returns (string memory) {
+        return string.concat("agent", vm.toString(i));
+    }
+
+    function deploy(uint256 agentCount) internal returns (ProofOfIntelligence poi) {
+        poi = new ProofOfIntelligence(address(token));
+        for (uint256 i = 0; i < agentCount; i++) {
+            poi.registerAgent(ProofOfIntelligence.Agent({
+                agentAddress: agentName(i),
+                agentWalletAddress: vm.toString(address(uint160(0x1000 + i))),
+                totalGuesses: 0,
+                bestGuesses: 0,
+                accuracy: 0,
+                lastGuessBlock: 0,
+                deviation: 50
+            }));
+        }
+    }
+
+    function setPrice(int64 price) internal {
+        PythStructs.PriceFeed memory feed;
+        feed.id = ETH_USD_FEED_ID;
+        feed.price = PythStructs.Price({price: price, conf: 0, expo: -8, publishTime: block.timestamp});
+        feed.emaPrice = feed.price;
+
+        bytes[] memory updateData = new bytes[](1);
+        updateData[0] = abi.encode(feed);
+        MockPythOracle(PYTH).updatePriceFeeds{value: updateData.length}(updateData);
+    }
+
+    // Start a round, have agent i predict predictions[i], then close submissions at `price`
+    function playRound(
+        ProofOfIntelligence poi,
+        int256[] memory predictions,
+        int64 price
+    ) internal returns (uint256 roundId) {
+        poi.submitMockMempoolTx(1 gwei);
+        poi.startNewRound();
+        roundId = poi.currentPredictionRound();
+        for (uint256 i = 0; i < predictions.length; i++) {
+            poi.submitPrediction(agentName(i), predictions[i]);
+        }
+        vm.warp(poi.getCurrentRound().submissionDeadline + 1);
+        setPrice(price);
+    }
+
+    function claimedIndex(ProofOfIntelligence poi, uint256 roundId) internal view returns (uint256 winnerIndex) {
+        (winnerIndex, , , , ) = poi.roundClaims(roundId);
+    }
+
+    function threePredictions(int256 a, int256 b, int256 c) internal pure returns (int256[] memory predictions) {
+        predictions = new int256[](3);
+        predictions[0] = a;
+        predictions[1] = b;
+        predictions[2] = c;
+    }
+
+    // ===== CLAIM / CHALLENGE / SETTLE =====
+
+    function test_ChallengeReplacesWrongClaim() public {
+        ProofOfIntelligence poi = deploy(3);
+        uint256 roundId = playRound(poi, threePredictions(3010_00000000, 2999_00000000, 3050_00000000), ACTUAL_PRICE);
+
+        // agent0 is $10 off, agent1 $1 off
+        poi.claimRoundWinner(ETH_USD_FEED_ID, 0);
+        poi.challengeRoundWinner(roundId, 1);
+        assertEq(claimedIndex(poi, roundId), 1);
+
+        vm.expectRevert(bytes("Not closer than claimed winner"));
+        poi.challengeRoundWinner(roundId, 2);
+
+        vm.warp(block.timestamp + poi.CHALLENGE_WINDOW() + 1);
+        poi.settleRound(roundId);
+
+        ProofOfIntelligence.PredictionRound memory round = poi.getPredictionRound(roundId);
+        assertTrue(round.finalized);
+        assertEq(round.winnerAgent, agentName(1));
+        assertEq(round.actualPrice, int256(ACTUAL_PRICE));
+        assertEq(poi.getAgent(agentName(0)).bestGuesses, 0);
+        assertEq(poi.getAgent(agentName(1)).bestGuesses, 1);
+        assertEq(poi.getBlock(poi.currentBlockNumber()).minerAgent, agentName(1));
+    }
+
+    function test_TieGoesToLowerIndex() public {
+        ProofOfIntelligence poi = deploy(3);
+        // All three are $10 off
+        uint256 roundId = playRound(poi, threePredictions(2990_00000000, 3010_00000000, 2990_00000000), ACTUAL_PRICE);
+
+        poi.claimRoundWinner(ETH_USD_FEED_ID, 2);
+        poi.challengeRoundWinner(roundId, 0);
+        assertEq(claimedIndex(poi, roundId), 0);
+
+        vm.expectRevert(bytes("Not closer than claimed winner"));
+        poi.challengeRoundWinner(roundId, 1);
+        vm.expectRevert(bytes("Not closer than claimed winner"));
+        poi.challengeRoundWinner(roundId, 2);
+
+        vm.warp(block.timestamp + poi.CHALLENGE_WINDOW() + 1);
+        poi.settleRound(roundId);
+        assertEq(poi.getPredictionRound(roundId).winnerAgent, agentName(0));
+    }
+
+    function test_SettleRevertsInsideChallengeWindow() public {
+        ProofOfIntelligence poi = deploy(3);
+        uint256 roundId = playRound(poi, threePredictions(3010_00000000, 2999_00000000, 3050_00000000), ACTUAL_PRICE);
+        poi.claimRoundWinner(ETH_USD_FEED_ID, 1);
+        uint256 claimedAt = block.timestamp;
+
+        vm.expectRevert(bytes("Challenge window still open"));
+        poi.settleRound(roundId);
+
+        vm.warp(claimedAt + poi.CHALLENGE_WINDOW());
+        vm.expectRevert(bytes("Challenge window still open"));
+        poi.settleRound(roundId);
+
+        vm.warp(claimedAt + poi.CHALLENGE_WINDOW() + 1);
+        vm.expectRevert(bytes("Challenge window closed"));
+        poi.challengeRoundWinner(roundId, 0);
+
+        poi.settleRound(roundId);
+        assertTrue(poi.getPredictionRound(roundId).finalized);
+
+        vm.expectRevert(bytes("No open claim"));
+        poi.settleRound(roundId);
+    }
+
+    function test_FinalizeRefusesClaimedRound() public {
+        ProofOfIntelligence poi = deploy(3);
+        uint256 roundId = playRound(poi, threePredictions(3010_00000000, 2999_00000000, 3050_00000000), ACTUAL_PRICE);
+        poi.claimRoundWinner(ETH_USD_FEED_ID, 1);
+
+        vm.expectRevert(bytes("Round claimed - settle it instead"));
+        poi.finalizeRoundAndMineBlock(ETH_USD_FEED_ID);
+
+        vm.warp(block.timestamp + poi.CHALLENGE_WINDOW() + 1);
+        poi.settleRound(roundId);
+        vm.expectRevert(bytes("Already finalized"));
+        poi.finalizeRoundAndMineBlock(ETH_USD_FEED_ID);
+    }
+
+    function test_RecordResultsRequiresSettledRound() public {
+        ProofOfIntelligence poi = deploy(3);
+        uint256 roundId = playRound(poi, threePredictions(3010_00000000, 2999_00000000, 3050_00000000), ACTUAL_PRICE);
+        poi.claimRoundWinner(ETH_USD_FEED_ID, 1);
+
+        vm.expectRevert(bytes("Round not settled"));
+        poi.recordRoundResults(roundId, 10);
+    }
+
+    // ===== BATCHED RESULTS =====
+
+    // Two rounds finalized directly on one contract and by claim, settle and batches of two
+    // results on another must leave identical winners, blocks, history, bias, accuracy,
+    // rewards and leaderboard.
+    function test_BatchedResultsMatchDirectFinalization() public {
+        ProofOfIntelligence direct = deploy(5);
+        ProofOfIntelligence batched = deploy(5);
+
+        // Closest prediction wins, lowest index on ties: agent2 (tied with agent4 at $1 off)
+        finalizeBothWays(
+            direct,
+            batched,
+            fivePredictions(3004_00000000, 2990_00000000, 3001_00000000, 3020_00000000, 2999_00000000),
+            ACTUAL_PRICE,
+            2
+        );
+        // agent1 (tied with agent3 and agent4 at $1 off)
+        finalizeBothWays(
+            direct,
+            batched,
+            fivePredictions(3010_00000000, 3006_00000000, 2950_00000000, 3004_00000000, 3006_00000000),
+            3005_00000000,
+            1
+        );
+
+        assertSameResults(direct, batched, 5);
+    }
+
+    function fivePredictions(int256 a, int256 b, int256 c, int256 d, int256 e) internal pure returns (int256[] memory predictions) {
+        predictions = new int256[](5);
+        predictions[0] = a;
+        predictions[1] = b;
+        predictions[2] = c;
+        predictions[3] = d;
+        predictions[4] = e;
+    }
+
+    function finalizeBothWays(
+        ProofOfIntelligence direct,
+        ProofOfIntelligence batched,
+        int256[] memory predictions,
+        int64 price,
+        uint256 winnerIndex
+    ) internal {
+        playRound(direct, predictions, price);
+        direct.finalizeRoundAndMineBlock(ETH_USD_FEED_ID);
+
+        uint256 roundId = playRound(batched, predictions, price);
+        batched.claimRoundWinner(ETH_USD_FEED_ID, winnerIndex);
+        vm.warp(block.timestamp + batched.CHALLENGE_WINDOW() + 1);
+        batched.settleRound(roundId);
+        for (uint256 batch = 0; batch < (predictions.length + 1) / 2; batch++) {
+            batched.recordRoundResults(roundId, 2);
+        }
+
+        (, , , uint256 resultsRecorded, bool settled) = batched.roundClaims(roundId);
+        assertTrue(settled);
+        assertEq(resultsRecorded, predictions.length);
+        assertEq(batched.getPredictionRound(roundId).winnerAgent, agentName(winnerIndex));
+        assertEq(batched.getPredictionRound(roundId).winnerAgent, direct.getPredictionRound(roundId).winnerAgent);
+        assertEq(batched.getPredictionRound(roundId).actualPrice, direct.getPredictionRound(roundId).actualPrice);
+    }
+
+    function assertSameResults(ProofOfIntelligence direct, ProofOfIntelligence batched, uint256 agentCount) internal view {
+        assertEq(batched.currentBlockNumber(), direct.currentBlockNumber());
+        for (uint256 b = 2; b <= direct.currentBlockNumber(); b++) {
+            assertEq(batched.getBlock(b).minerAgent, direct.getBlock(b).minerAgent);
+            assertEq(batched.getBlock(b).targetPrice, direct.getBlock(b).targetPrice);
+        }
+        assertEq(keccak256(abi.encode(batched.getLeaderboard())), keccak256(abi.encode(direct.getLeaderboard())));
+
+        for (uint256 i = 0; i < agentCount; i++) {
+            string memory name = agentName(i);
+            assertEq(keccak256(abi.encode(batched.getAgent(name))), keccak256(abi.encode(direct.getAgent(name))));
+            assertEq(batched.pendingRewards(name), direct.pendingRewards(name));
+            assertEq(batched.agentBias(name), direct.agentBias(name));
+
+            // History timestamps are when results were recorded, so they differ by design
+            ProofOfIntelligence.PredictionHistory[] memory directHistory = direct.getAgentHistory(name);
+            ProofOfIntelligence.PredictionHistory[] memory batchedHistory = batched.getAgentHistory(name);
+            assertEq(batchedHistory.length, directHistory.length);
+            for (uint256 h = 0; h < directHistory.length; h++) {
+                assertEq(batchedHistory[h].roundId, directHistory[h].roundId);
+                assertEq(batchedHistory[h].predicted, directHistory[h].predicted);
+                assertEq(batchedHistory[h].actual, directHistory[h].actual);
+                assertEq(batchedHistory[h].difference, directHistory[h].difference);
+            }
+        }
+    }
+}
@@ -0,0 +1,42 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.30;
+
+import "@pythnetwork/pyth-sdk-solidity/PythStructs.sol";
+
+/**
+ * @title MockPythOracle
+ * @dev Minimal Pyth stand-in for local simulations (backend/simulator.py).
+ * Implements only what ProofOfIntelligence and the judging agent call.
+ * Update data is abi.encode(PythStructs.PriceFeed), as served by the simulator's stub Hermes.
+ * Holds no initialized storage, so its runtime code can be placed at the Pyth address directly.
+ */
+contract MockPythOracle {
+
+    uint256 public constant SINGLE_UPDATE_FEE = 1;
+
+    mapping(bytes32 => PythStructs.PriceFeed) internal priceFeeds;
+
+    function getUpdateFee(bytes[] calldata updateData) external pure returns (uint256) {
+        return SINGLE_UPDATE_FEE * updateData.length;
+    }
+
+    function updatePriceFeeds(bytes[] calldata updateData) external payable {
+        require(msg.value >= SINGLE_UPDATE_FEE * updateData.length, "Insufficient fee");
+
+        for (uint256 i = 0; i < updateData.length; i++) {
+            PythStructs.PriceFeed memory feed = abi.decode(updateData[i], (PythStructs.PriceFeed));
+            if (feed.price.publishTime > priceFeeds[feed.id].price.publishTime) {
+                priceFeeds[feed.id] = feed;
+            }
+        }
+    }
+
+    function getPriceNoOlderThan(
+        bytes32 id,
+        uint256 age
+    ) external view returns (PythStructs.Price memory price) {
+        price = priceFeeds[id].price;
+        require(price.publishTime != 0, "Price feed not found");
+        require(block.timestamp <= price.publishTime + age, "Stale price");
+    }
+}